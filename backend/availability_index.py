@@ -0,0 +1,317 @@
+import json
+import os
+import threading
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models import Candidate
+from match_features import day_ordinal
+
+
+# Opt-in: MatchingEngine(availability_mode=...) - None keeps the original scores
+AVAILABILITY_MODES = ('exclude', 'penalize')
+AVAILABILITY_CONFLICT_PENALTY = int(os.getenv("AVAILABILITY_CONFLICT_PENALTY", "15"))
+
+# Contract length assumed for jobs without contract_weeks (standard travel contract)
+DEFAULT_CONTRACT_WEEKS = 13
+
+# Stands in for a rule in RuleOutcome.rules so the conflict shows up in rule_notes
+ConflictNote = namedtuple('ConflictNote', 'note')
+EXCLUDE_NOTE = ConflictNote("❌ Availability conflict: blackout dates or outside availability windows")
+PENALIZE_NOTE = ConflictNote(f"⚠ Availability conflict: -{AVAILABILITY_CONFLICT_PENALTY} points")
+
+
+# ==================== INTERVALS ====================
+
+def parse_intervals(value) -> List[Tuple[int, int]]:
+    """
+    Parse availability_windows / blackout_dates into sorted, merged day-ordinal intervals
+
+    Accepts a list or JSON string of {'start': 'YYYY-MM-DD', 'end': 'YYYY-MM-DD'}
+    entries (or bare dates for single days). Malformed entries are skipped.
+    """
+    if not value:
+        return []
+    try:
+        items = value if isinstance(value, list) else json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+
+    intervals = []
+    for item in items:
+        try:
+            if isinstance(item, dict):
+                start = day_ordinal(item['start'])
+                end = day_ordinal(item.get('end') or item['start'])
+            else:
+                start = end = day_ordinal(item)
+        except Exception:
+            continue
+        if start <= end:
+            intervals.append((start, end))
+    return merge_intervals(intervals)
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def job_period(job) -> Optional[Tuple[int, int]]:
+    """Days a job's contract covers, None without a usable start date"""
+    if not job.start_date:
+        return None
+    try:
+        start = day_ordinal(job.start_date)
+    except Exception:
+        return None
+    weeks = job.contract_weeks if isinstance(job.contract_weeks, int) and job.contract_weeks > 0 else DEFAULT_CONTRACT_WEEKS
+    return start, start + weeks * 7 - 1
+
+
+class CandidateCalendar:
+    """
+    A candidate's availability windows and blackouts as sorted, merged intervals
+    A job conflicts when its contract overlaps a blackout, or it starts outside
+    every availability window (candidates without windows are always available)
+    """
+
+    __slots__ = ('windows', 'blackouts', '_window_starts', '_window_ends', '_blackout_starts', '_blackout_ends')
+
+    def __init__(self, windows: List[Tuple[int, int]], blackouts: List[Tuple[int, int]]):
+        self.windows = windows
+        self.blackouts = blackouts
+        self._window_starts = [start for start, _ in windows]
+        self._window_ends = [end for _, end in windows]
+        self._blackout_starts = [start for start, _ in blackouts]
+        self._blackout_ends = [end for _, end in blackouts]
+
+    @classmethod
+    def from_row(cls, candidate) -> "CandidateCalendar":
+        return cls(parse_intervals(candidate.availability_windows), parse_intervals(candidate.blackout_dates))
+
+    def __bool__(self):
+        return bool(self.windows or self.blackouts)
+
+    def blackout_overlapping(self, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """First blackout overlapping [start, end] - O(log n)"""
+        i = bisect_left(self._blackout_ends, start)
+        if i < len(self.blackouts) and self._blackout_starts[i] <= end:
+            return self.blackouts[i]
+        return None
+
+    def available_on(self, day: int) -> bool:
+        if not self.windows:
+            return True
+        i = bisect_right(self._window_starts, day) - 1
+        return i >= 0 and day <= self._window_ends[i]
+
+    def conflict(self, period: Optional[Tuple[int, int]]) -> Optional[str]:
+        """Why the job period conflicts, None when it doesn't"""
+        if period is None:
+            return None
+        start, end = period
+        blackout = self.blackout_overlapping(start, end)
+        if blackout is not None:
+            first, last = (date.fromordinal(day) for day in blackout)
+            return f"Contract overlaps blackout {first} to {last}"
+        if not self.available_on(start):
+            return f"Starts {date.fromordinal(start)}, outside availability windows"
+        return None
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over closed [start, end] day intervals, each tagged with a pool row
+    overlapping() costs O(log n + matches)
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, rows: np.ndarray):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.root = self._build(np.arange(len(self.rows)))
+
+    def _build(self, idx: np.ndarray):
+        if not len(idx):
+            return None
+        starts, ends = self.starts[idx], self.ends[idx]
+        # The median endpoint always splits the set or is covered by an interval
+        center = int(np.median(np.concatenate([starts, ends])))
+        here = idx[(starts <= center) & (ends >= center)]
+        by_start = here[np.argsort(self.starts[here], kind='stable')]
+        by_end = here[np.argsort(self.ends[here], kind='stable')]
+        return (
+            center,
+            self.starts[by_start], self.rows[by_start],
+            self.ends[by_end], self.rows[by_end],
+            self._build(idx[ends < center]),
+            self._build(idx[starts > center]),
+        )
+
+    def overlapping(self, start: int, end: int) -> np.ndarray:
+        """Rows of every interval overlapping [start, end] (may repeat)"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, sorted_starts, start_rows, sorted_ends, end_rows, left, right = node
+            if end < center:
+                found.append(start_rows[:np.searchsorted(sorted_starts, end, side='right')])
+                stack.append(left)
+            elif start > center:
+                found.append(end_rows[np.searchsorted(sorted_ends, start, side='left'):])
+                stack.append(right)
+            else:
+                found.append(start_rows)
+                stack.append(left)
+                stack.append(right)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(found)
+
+
+# ==================== POOL INDEXES ====================
+
+class CandidateAvailabilityIndex:
+    """Blackout and availability-window interval trees over a CandidatePool"""
+
+    def __init__(self, n: int, calendars: Dict[int, CandidateCalendar]):
+        self.n = n
+        self.calendars = calendars
+        self.has_windows = np.zeros(n, dtype=bool)
+
+        blackouts, windows = [], []
+        for row, calendar in calendars.items():
+            blackouts.extend((start, end, row) for start, end in calendar.blackouts)
+            windows.extend((start, end, row) for start, end in calendar.windows)
+            self.has_windows[row] = bool(calendar.windows)
+        self.blackouts = IntervalTree(*self._columns(blackouts))
+        self.windows = IntervalTree(*self._columns(windows))
+
+    @staticmethod
+    def _columns(intervals):
+        if not intervals:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        return tuple(np.array(column) for column in zip(*intervals))
+
+    def conflicts(self, period: Optional[Tuple[int, int]]) -> np.ndarray:
+        """Pool rows whose calendar conflicts with a job period"""
+        mask = np.zeros(self.n, dtype=bool)
+        if period is None:
+            return mask
+        start, end = period
+        mask[self.blackouts.overlapping(start, end)] = True
+        outside = self.has_windows.copy()
+        outside[self.windows.overlapping(start, start)] = False
+        return mask | outside
+
+
+class JobPeriodIndex:
+    """Interval tree over the contract periods of a JobPool"""
+
+    def __init__(self, pool):
+        self.n = pool.n
+        self.has_period = np.zeros(self.n, dtype=bool)
+        self.start = np.zeros(self.n, dtype=np.int64)
+        self.end = np.zeros(self.n, dtype=np.int64)
+        for i, row in enumerate(pool.rows):
+            period = job_period(row)
+            if period is not None:
+                self.has_period[i] = True
+                self.start[i], self.end[i] = period
+        rows = np.flatnonzero(self.has_period)
+        self.tree = IntervalTree(self.start[rows], self.end[rows], rows)
+
+    def conflicts(self, calendar: CandidateCalendar) -> np.ndarray:
+        """Pool rows whose contract period conflicts with a candidate's calendar"""
+        mask = np.zeros(self.n, dtype=bool)
+        for start, end in calendar.blackouts:
+            mask[self.tree.overlapping(start, end)] = True
+        if calendar.windows:
+            window_starts = np.array([start for start, _ in calendar.windows], dtype=np.int64)
+            window_ends = np.array([end for _, end in calendar.windows], dtype=np.int64)
+            i = np.searchsorted(window_starts, self.start, side='right') - 1
+            inside = (i >= 0) & (self.start <= window_ends[np.maximum(i, 0)])
+            mask |= self.has_period & ~inside
+        return mask
+
+
+def apply_conflicts(outcome, conflicts: np.ndarray, mode: str):
+    """Fold availability conflicts into a RuleOutcome (rows a rule already disqualified are left alone)"""
+    hit = conflicts & ~outcome.disqualified
+    # New list - outcome.rules is the compiled rule set's own list
+    outcome.rules = outcome.rules + [EXCLUDE_NOTE if mode == 'exclude' else PENALIZE_NOTE]
+    outcome.masks = outcome.masks + [hit]
+    if mode == 'exclude':
+        outcome.disqualified = outcome.disqualified | hit
+    else:
+        outcome.bonus = outcome.bonus - np.where(hit, AVAILABILITY_CONFLICT_PENALTY, 0).astype(outcome.bonus.dtype)
+    return outcome
+
+
+# ==================== CACHE ====================
+
+_cache_lock = threading.Lock()
+_candidate_indexes = weakref.WeakKeyDictionary()
+_job_indexes = weakref.WeakKeyDictionary()
+
+
+def get_candidate_availability(db: Optional[Session], pool) -> CandidateAvailabilityIndex:
+    """
+    Availability index for a CandidatePool, built once per pool
+    Calendars come from the pool rows when they carry the columns, otherwise one query
+    """
+    index = _candidate_indexes.get(pool)
+    if index is not None:
+        return index
+
+    calendars = {}
+    if pool.rows and hasattr(pool.rows[0], 'blackout_dates'):
+        sources = enumerate(pool.rows)
+    else:
+        position = {candidate_id: i for i, candidate_id in enumerate(pool.ids)}
+        rows = db.query(
+            Candidate.candidate_id, Candidate.availability_windows, Candidate.blackout_dates
+        ).filter(
+            Candidate.candidate_status.ilike("active"),
+            or_(Candidate.availability_windows.isnot(None), Candidate.blackout_dates.isnot(None))
+        ).all()
+        sources = ((position[row.candidate_id], row) for row in rows if row.candidate_id in position)
+    for i, row in sources:
+        calendar = CandidateCalendar.from_row(row)
+        if calendar:
+            calendars[i] = calendar
+
+    index = CandidateAvailabilityIndex(pool.n, calendars)
+    with _cache_lock:
+        _candidate_indexes[pool] = index
+    return index
+
+
+def get_job_periods(pool) -> JobPeriodIndex:
+    """Contract period index for a JobPool, built once per pool"""
+    index = _job_indexes.get(pool)
+    if index is None:
+        index = JobPeriodIndex(pool)
+        with _cache_lock:
+            _job_indexes[pool] = index
+    return index
@@ -0,0 +1,258 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job, Alert
+from vectorized_scoring import CANDIDATE_POOL_COLUMNS, JOB_POOL_COLUMNS, JobPool
+from matching_rules import get_compiled_rules
+
+
+# Worker processes for the scheduled batch run (1 = serial)
+BATCH_MATCH_WORKERS = int(os.getenv("BATCH_MATCH_WORKERS", str(os.cpu_count() or 1)))
+
+# Candidates per task - small enough to keep every worker busy until the end
+MAX_SHARD_SIZE = 500
+
+ALERT_CHUNK_SIZE = 1000
+
+# Per-process state, set once by _init_worker
+_worker: Dict = {}
+
+
+# ==================== WORKER ====================
+
+def _init_worker(job_rows: List, rules):
+    """Build the open job pool once per worker process"""
+    from matching_engine import MatchingEngine
+
+    engine = MatchingEngine(None)
+    _worker['engine'] = engine
+    _worker['pool'] = JobPool(job_rows, engine._get_state_region)
+    _worker['rules'] = rules
+
+
+def _match_shard(candidate_rows: List, min_score: int, top_n: int) -> List[Tuple]:
+    """
+    Score a shard of candidates against the open job pool
+    Returns [(candidate_id, match count, [(job_id, score), ...best top_n])]
+    """
+    engine, pool, rules = _worker['engine'], _worker['pool'], _worker['rules']
+
+    results = []
+    for candidate in candidate_rows:
+        factors, outcome, scores = engine.score_candidate_against_pool(candidate, pool, rules)
+        total = int(np.count_nonzero(~outcome.disqualified & (scores >= min_score)))
+        best = engine._rank_qualifying(outcome, scores, min_score, top_n)
+        results.append((candidate.candidate_id, total, [(pool.ids[i], int(scores[i])) for i in best]))
+    return results
+
+
+# ==================== PARENT ====================
+
+def _plain_rows(rows) -> List[SimpleNamespace]:
+    """Detach query rows into plain picklable objects"""
+    return [SimpleNamespace(**row._asdict()) for row in rows]
+
+
+def _shards(rows: List, workers: int) -> List[List]:
+    size = max(1, min(MAX_SHARD_SIZE, -(-len(rows) // (workers * 4))))
+    return [rows[start:start + size] for start in range(0, len(rows), size)]
+
+
+def run_parallel_batch(engine, min_score: int = 70, workers: int = BATCH_MATCH_WORKERS, top_n: int = 3) -> Dict:
+    """
+    Parallel batch_match_all_candidates
+
+    Jobs and rules are loaded once and shipped to each worker at start-up,
+    active candidates are sharded across a ProcessPoolExecutor. Workers only
+    score; the parent merges results and writes alerts in bulk.
+    """
+    db: Session = engine.db
+    results = {
+        'total_matches': 0,
+        'candidates_processed': 0,
+        'alerts_created': 0
+    }
+
+    rules = get_compiled_rules(db)
+    job_rows = _plain_rows(db.query(*JOB_POOL_COLUMNS).filter(Job.status == "Open").all())
+    candidate_rows = _plain_rows(db.query(*CANDIDATE_POOL_COLUMNS).filter(
+        Candidate.candidate_status.ilike("active")
+    ).all())
+
+    pending = []
+    # spawn, not fork: the scheduled run happens inside the multi-threaded API process, and a forked
+    # child can deadlock on a lock another thread held at fork time. Workers only need the pickled rows
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(job_rows, rules)) as executor:
+        # map() keeps candidate order, so alerts come out in the same order as the serial run
+        for shard in executor.map(_match_shard, _shards(candidate_rows, workers), repeat(min_score), repeat(top_n)):
+            for candidate_id, total, best in shard:
+                results['candidates_processed'] += 1
+                results['total_matches'] += total
+                pending.extend((candidate_id, job_id, score) for job_id, score in best)
+
+    results['alerts_created'] = write_new_match_alerts(engine, pending)
+    return results
+
+
+def existing_new_match_pairs(db: Session, job_id: Optional[str] = None,
+                             job_ids: Optional[List[str]] = None) -> Set[Tuple[str, str]]:
+    """(candidate_id, job_id) pairs that already have an unread new_match alert - one query per chunk of job_ids"""
+    query = db.query(Alert.candidate_id, Alert.job_id).filter(
+        and_(
+            Alert.alert_type == "new_match",
+            Alert.is_read == False
+        )
+    )
+    if job_id is not None:
+        query = query.filter(Alert.job_id == job_id)
+    if job_ids is None:
+        return {(candidate_id, alert_job_id) for candidate_id, alert_job_id in query.all()}
+
+    pairs = set()
+    for start in range(0, len(job_ids), ALERT_CHUNK_SIZE):
+        chunk = query.filter(Alert.job_id.in_(job_ids[start:start + ALERT_CHUNK_SIZE]))
+        pairs.update((candidate_id, alert_job_id) for candidate_id, alert_job_id in chunk.all())
+    return pairs
+
+
+def unread_alert_candidates(db: Session, alert_type: str, candidate_ids: List[str]) -> Set[str]:
+    """Candidates that already have an unread alert of alert_type - one query per chunk of candidate_ids"""
+    query = db.query(Alert.candidate_id).filter(
+        and_(
+            Alert.alert_type == alert_type,
+            Alert.is_read == False
+        )
+    )
+    found = set()
+    for start in range(0, len(candidate_ids), ALERT_CHUNK_SIZE):
+        chunk = query.filter(Alert.candidate_id.in_(candidate_ids[start:start + ALERT_CHUNK_SIZE]))
+        found.update(candidate_id for (candidate_id,) in chunk.distinct().all())
+    return found
+
+
+def insert_alerts(db: Session, mappings: List[Dict]):
+    """Bulk insert alert rows, one executemany per ALERT_CHUNK_SIZE rows"""
+    for start in range(0, len(mappings), ALERT_CHUNK_SIZE):
+        db.execute(insert(Alert), mappings[start:start + ALERT_CHUNK_SIZE])
+
+
+def insert_new_match_alerts(db: Session, mappings: List[Dict]) -> Set[Tuple[str, str]]:
+    """
+    Bulk insert new_match alert rows, skipping rows that hit uq_alerts_unread_new_match
+    (a concurrent run got there first). Returns the (candidate_id, job_id) pairs inserted.
+    """
+    if not mappings:
+        return set()
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        # No portable ON CONFLICT - rows were already filtered against existing_new_match_pairs()
+        insert_alerts(db, mappings)
+        return {(row['candidate_id'], row['job_id']) for row in mappings}
+
+    inserted = set()
+    stmt = dialect_insert(Alert).on_conflict_do_nothing().returning(Alert.candidate_id, Alert.job_id)
+    for start in range(0, len(mappings), ALERT_CHUNK_SIZE):
+        inserted.update(tuple(row) for row in db.execute(stmt, mappings[start:start + ALERT_CHUNK_SIZE]))
+    return inserted
+
+
+def unread_new_match_twin(db: Session, alert: Alert) -> Optional[str]:
+    """
+    Id of another unread new_match alert for the same candidate/job as a read one
+    Reopening the read one would violate uq_alerts_unread_new_match
+    """
+    if alert.alert_type != "new_match" or alert.is_read is False or not alert.candidate_id or not alert.job_id:
+        return None
+    twin = db.query(Alert.alert_id).filter(
+        Alert.alert_type == "new_match",
+        Alert.candidate_id == alert.candidate_id,
+        Alert.job_id == alert.job_id,
+        Alert.is_read == False
+    ).first()
+    return twin.alert_id if twin else None
+
+
+def reopen_all_alerts(db: Session) -> Tuple[int, int]:
+    """
+    Mark every read alert unread, within uq_alerts_unread_new_match
+    new_match pairs that already have an unread alert stay as they are, and of a
+    pair's read alerts only the newest is reopened. Returns (reopened, skipped).
+    """
+    read = or_(Alert.is_read == True, Alert.is_read.is_(None))
+    outside_index = or_(
+        Alert.alert_type != "new_match", Alert.alert_type.is_(None),
+        Alert.candidate_id.is_(None), Alert.job_id.is_(None)
+    )
+    reopened = db.query(Alert).filter(read, outside_index).update({Alert.is_read: False}, synchronize_session=False)
+
+    unread_pairs = existing_new_match_pairs(db)
+    reopen_ids, skipped = [], 0
+    rows = db.query(Alert.alert_id, Alert.candidate_id, Alert.job_id).filter(
+        read,
+        Alert.alert_type == "new_match",
+        Alert.candidate_id.isnot(None),
+        Alert.job_id.isnot(None)
+    ).order_by(Alert.created_at.desc().nulls_last(), Alert.alert_id.desc())
+    for alert_id, candidate_id, job_id in rows:
+        if (candidate_id, job_id) in unread_pairs:
+            skipped += 1
+            continue
+        unread_pairs.add((candidate_id, job_id))
+        reopen_ids.append(alert_id)
+
+    for start in range(0, len(reopen_ids), ALERT_CHUNK_SIZE):
+        reopened += db.query(Alert).filter(Alert.alert_id.in_(reopen_ids[start:start + ALERT_CHUNK_SIZE])).update(
+            {Alert.is_read: False}, synchronize_session=False
+        )
+    return reopened, skipped
+
+
+def write_new_match_alerts(engine, pending: List[Tuple[str, str, int]]) -> int:
+    """
+    Create 'Great match' new_match alerts for (candidate_id, job_id, score) triples
+    Pairs that already have an unread new_match alert (or repeat in pending) are skipped
+    """
+    db: Session = engine.db
+    if not pending:
+        return 0
+
+    existing = existing_new_match_pairs(db)
+    jobs = engine._load_by_ids(Job, Job.job_id, list({job_id for _, job_id, _ in pending}))
+
+    now = datetime.utcnow()
+    mappings = []
+    for candidate_id, job_id, score in pending:
+        if (candidate_id, job_id) in existing:
+            continue
+        existing.add((candidate_id, job_id))
+        job = jobs[job_id]
+        mappings.append({
+            'alert_type': "new_match",
+            'candidate_id': candidate_id,
+            'job_id': job_id,
+            'title': f"Great match: {job.specialty_required}",
+            'message': f"{score}% compatibility - {job.facility}, {job.state}",
+            'priority': "normal",
+            'is_read': False,
+            'created_at': now
+        })
+
+    created = len(insert_new_match_alerts(db, mappings))
+    db.commit()
+    return created
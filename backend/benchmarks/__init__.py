@@ -0,0 +1 @@
+"""Matching engine benchmarks - see run_benchmarks.py"""
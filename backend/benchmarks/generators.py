@@ -0,0 +1,163 @@
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job, Assignment, MatchingRule
+from match_features import US_STATES, STATE_REGIONS, candidate_features, job_features
+
+
+# Rows per table for each named scale (keyed by candidate count)
+SCALES = {
+    '1k': {'candidates': 1_000, 'jobs': 200, 'assignments': 250, 'rules': 5},
+    '10k': {'candidates': 10_000, 'jobs': 2_000, 'assignments': 2_500, 'rules': 10},
+    '100k': {'candidates': 100_000, 'jobs': 10_000, 'assignments': 25_000, 'rules': 20},
+    '1M': {'candidates': 1_000_000, 'jobs': 50_000, 'assignments': 250_000, 'rules': 40},
+}
+
+INSERT_CHUNK_SIZE = 5000
+
+# Weighted like a typical travel nursing / allied book of business
+SPECIALTIES = [
+    ('ICU', 14), ('Med-Surg', 14), ('ER', 12), ('Telemetry', 10), ('OR', 8), ('L&D', 6),
+    ('PACU', 5), ('Step-Down', 5), ('NICU', 4), ('PICU', 3), ('Oncology', 3), ('Cath Lab', 2),
+    ('Respiratory Therapist', 5), ('Physical Therapist', 3), ('Rad Tech', 3), ('CT Tech', 2), ('Surgical Tech', 1),
+]
+SHIFTS = ['Day', 'Night', 'Evening', 'Rotating']
+CONTRACT_WEEKS = [8, 13, 13, 13, 16, 26]
+# High-demand travel states get more jobs and more candidate interest
+STATE_WEIGHTS = {state: 1 for state in US_STATES}
+STATE_WEIGHTS.update({'CA': 12, 'TX': 10, 'FL': 8, 'NY': 7, 'AZ': 5, 'WA': 5, 'NC': 4, 'GA': 4, 'CO': 4, 'IL': 4})
+
+
+class SyntheticData:
+    """Seeded generator of realistic candidate / job / rule / assignment rows (plain dicts)"""
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.today = date.today()
+        self._specialties = [name for name, _ in SPECIALTIES]
+        self._specialty_weights = [weight for _, weight in SPECIALTIES]
+        self._states = list(STATE_WEIGHTS)
+        self._state_weights = list(STATE_WEIGHTS.values())
+
+    def _specialty(self) -> str:
+        return self.rng.choices(self._specialties, self._specialty_weights)[0]
+
+    def _states_sample(self, k: int) -> List[str]:
+        return list(dict.fromkeys(self.rng.choices(self._states, self._state_weights, k=k)))
+
+    def candidates(self, count: int) -> Iterator[Dict]:
+        rng = self.rng
+        for i in range(count):
+            primary = self._specialty()
+            row = {
+                'candidate_id': f"CND{i:012d}",
+                'first_name': f"First{i}",
+                'last_name': f"Last{i}",
+                'email': f"candidate{i}@bench.example",
+                'primary_specialty': primary,
+                'sub_specialties': rng.sample([s for s in self._specialties if s != primary], rng.randint(0, 3)),
+                'years_experience': rng.choice([0, 1, 1, 2, 2, 3, 4, 5, 6, 8, 10, 15, 20]),
+                'preferred_states': self._states_sample(rng.choice([0, 1, 2, 3, 3, 5])),
+                'preferred_regions': rng.sample(list(STATE_REGIONS), rng.choice([0, 0, 1, 2])),
+                'availability_date': self.today + timedelta(days=rng.randint(-30, 90)),
+                'desired_contract_weeks': rng.choice(CONTRACT_WEEKS),
+                'candidate_status': rng.choices(['active', 'Active', 'inactive', 'placed'], [70, 5, 15, 10])[0],
+            }
+            row.update(candidate_features(SimpleNamespace(**row)))
+            yield row
+
+    def jobs(self, count: int) -> Iterator[Dict]:
+        rng = self.rng
+        for i in range(count):
+            specialty = self._specialty()
+            state = rng.choices(self._states, self._state_weights)[0]
+            row = {
+                'job_id': f"JOB{i:012d}",
+                'title': f"Travel {specialty}",
+                'specialty_required': specialty,
+                'sub_specialties_accepted': rng.sample([s for s in self._specialties if s != specialty], rng.choice([0, 0, 1, 2])),
+                'facility': f"Facility {rng.randint(1, max(count // 5, 1))}",
+                'city': f"City {rng.randint(1, 500)}",
+                'state': state,
+                'shift_type': rng.choice(SHIFTS),
+                'min_years_experience': rng.choice([None, 1, 1, 2, 2, 3, 5]),
+                'contract_weeks': rng.choice(CONTRACT_WEEKS),
+                'start_date': self.today + timedelta(days=rng.randint(0, 75)),
+                'pay_rate_weekly': float(rng.randrange(1800, 4200, 50)),
+                'housing_stipend': rng.choice([None, 0.0, 1200.0, 1500.0]),
+                'status': rng.choices(['Open', 'Closed', 'Filled'], [75, 15, 10])[0],
+            }
+            row.update(job_features(SimpleNamespace(**row)))
+            yield row
+
+    def rules(self, count: int) -> Iterator[Dict]:
+        rng = self.rng
+        templates = [
+            ({'specialty_match_required': True}, 'disqualify', 0),
+            ({'min_experience': 2}, 'penalty', 10),
+            ({'min_experience': 5}, 'penalty', 5),
+            ({'state_required': True}, 'penalty', 5),
+            ({'specialty_match_required': True, 'state_required': True}, 'bonus', 5),
+        ]
+        for i in range(count):
+            conditions, action, points = rng.choice(templates)
+            yield {
+                'rule_id': f"RUL{i:012d}",
+                'rule_name': f"Benchmark rule {i}",
+                'description': f"Synthetic {action} rule",
+                'conditions': conditions,
+                'action': action,
+                'bonus_points': points,
+                # Most agencies keep only a few rules switched on
+                'is_active': i < 3 or rng.random() < 0.3,
+            }
+
+    def assignments(self, count: int, candidates: int, jobs: int) -> Iterator[Dict]:
+        rng = self.rng
+        for i in range(count):
+            end_date = self.today + timedelta(days=rng.randint(-60, 120))
+            yield {
+                'assignment_id': f"ASG{i:012d}",
+                'candidate_id': f"CND{rng.randrange(candidates):012d}",
+                'job_id': f"JOB{rng.randrange(jobs):012d}",
+                'start_date': end_date - timedelta(weeks=13),
+                'end_date': end_date,
+                'status': rng.choices(['active', 'completed', 'cancelled'], [60, 35, 5])[0],
+                'weekly_hours': 36.0,
+            }
+
+
+def _bulk_insert(db: Session, model, rows: Iterator[Dict]) -> int:
+    """Core executemany in chunks - bypasses ORM events, so feature columns come precomputed"""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == INSERT_CHUNK_SIZE:
+            db.execute(insert(model), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(insert(model), chunk)
+        total += len(chunk)
+    db.commit()
+    return total
+
+
+def load_dataset(db: Session, scale: str, seed: int = 42) -> Dict[str, int]:
+    """Fill an empty database with a synthetic dataset of the given scale"""
+    sizes = SCALES[scale]
+    data = SyntheticData(seed)
+    return {
+        'candidates': _bulk_insert(db, Candidate, data.candidates(sizes['candidates'])),
+        'jobs': _bulk_insert(db, Job, data.jobs(sizes['jobs'])),
+        'matching_rules': _bulk_insert(db, MatchingRule, data.rules(sizes['rules'])),
+        'assignments': _bulk_insert(db, Assignment, data.assignments(
+            sizes['assignments'], sizes['candidates'], sizes['jobs']
+        )),
+    }
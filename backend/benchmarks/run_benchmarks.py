@@ -0,0 +1,236 @@
+"""
+Matching engine benchmarks
+
+Generates a synthetic dataset, loads it into SQLite (default) or the database
+given with --database-url, times the matching entry points and writes a JSON
+report (p50 / p95 latency, rows/sec, peak RSS).
+
+Run from the backend folder:
+
+    python -m benchmarks.run_benchmarks --scale 10k --output bench_10k.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Candidate, Job, Assignment, Alert
+from matching_engine import MatchingEngine
+from benchmarks.generators import SCALES, load_dataset
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+MODES = ('scalar', 'vectorized')
+BENCHMARKS = ('job', 'candidate', 'batch', 'ending')
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(name: str, call: Callable, args: List, rows_per_call: int) -> Dict:
+    """
+    Time call(*arg) for every arg; the first call is reported separately as cold_ms
+    rows_per_sec = rows scanned per call / mean warm latency
+    """
+    timings = []
+    for arg in args:
+        started = time.perf_counter()
+        call(*arg)
+        timings.append(time.perf_counter() - started)
+
+    cold, warm = timings[0], np.array(timings[1:] or timings)
+    mean = float(warm.mean())
+    result = {
+        'name': name,
+        'calls': len(timings),
+        'cold_ms': round(cold * 1000, 3),
+        'p50_ms': round(float(np.percentile(warm, 50)) * 1000, 3),
+        'p95_ms': round(float(np.percentile(warm, 95)) * 1000, 3),
+        'mean_ms': round(mean * 1000, 3),
+        'rows_per_call': rows_per_call,
+        'rows_per_sec': round(rows_per_call / mean, 1) if mean else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(f"  {name:<40} p50 {result['p50_ms']:>10.2f} ms   p95 {result['p95_ms']:>10.2f} ms   "
+          f"{result['rows_per_sec'] or 0:>12,.0f} rows/s")
+    return result
+
+
+# ==================== BENCHMARKS ====================
+
+def _engine_call(Session, mode: str, method: str, **kwargs) -> Callable:
+    """Run one engine call on a fresh session, like one API request"""
+    def call(entity_id):
+        db = Session()
+        try:
+            engine = MatchingEngine(db, use_vectorized=(mode == 'vectorized'))
+            return getattr(engine, method)(entity_id, **kwargs)
+        finally:
+            db.close()
+    return call
+
+
+def _reset_alerts(Session, alert_type: str):
+    """Drop alerts written by a previous run so every run does the same work"""
+    db = Session()
+    try:
+        db.query(Alert).filter(Alert.alert_type == alert_type).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _batch_call(Session, mode: str, min_score: int, workers: int) -> Callable:
+    def call():
+        _reset_alerts(Session, "new_match")
+        db = Session()
+        try:
+            return MatchingEngine(db, use_vectorized=(mode == 'vectorized')).batch_match_all_candidates(
+                min_score=min_score, workers=workers
+            )
+        finally:
+            db.close()
+    return call
+
+
+def _ending_call(Session, mode: str) -> Callable:
+    def call():
+        _reset_alerts(Session, "contract_ending")
+        db = Session()
+        try:
+            return MatchingEngine(db, use_vectorized=(mode == 'vectorized')).scan_ending_assignments()
+        finally:
+            db.close()
+    return call
+
+
+def run(args) -> Dict:
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.gettempdir(), f"ats_bench_{args.scale}_{args.seed}.db"
+    )
+    bind = create_engine(database_url)
+    Session = sessionmaker(bind=bind, autoflush=False)
+
+    print(f"\n=== MATCHING BENCHMARK - scale {args.scale} ===\n")
+    db = Session()
+    dataset = {}
+    load_seconds = None
+    if args.reuse and db.query(func.count(Candidate.candidate_id)).scalar():
+        print(f"♻️ Reusing dataset in {database_url}")
+    else:
+        print(f"🔄 Generating dataset into {database_url}")
+        Base.metadata.drop_all(bind=bind)
+        Base.metadata.create_all(bind=bind)
+        started = time.perf_counter()
+        dataset = load_dataset(db, args.scale, args.seed)
+        load_seconds = round(time.perf_counter() - started, 2)
+        print(f"✅ Loaded {dataset} in {load_seconds}s")
+
+    active_candidates = db.query(func.count(Candidate.candidate_id)).filter(
+        Candidate.candidate_status.ilike("active")
+    ).scalar()
+    open_jobs = db.query(func.count(Job.job_id)).filter(Job.status == "Open").scalar()
+    ending_assignments = db.query(func.count(Assignment.assignment_id)).filter(
+        Assignment.status == "active",
+        Assignment.end_date <= date.today() + timedelta(days=28),
+        Assignment.end_date >= date.today()
+    ).scalar()
+    job_ids = [row[0] for row in db.query(Job.job_id).filter(Job.status == "Open")
+               .order_by(Job.job_id).limit(args.samples).all()]
+    candidate_ids = [row[0] for row in db.query(Candidate.candidate_id).filter(
+        Candidate.candidate_status.ilike("active")
+    ).order_by(Candidate.candidate_id).limit(args.samples).all()]
+    db.close()
+
+    results = []
+    for mode in args.modes:
+        print(f"\n━━━━━━━━━━ {mode.upper()} ━━━━━━━━━━")
+        if 'job' in args.benchmarks and job_ids:
+            results.append(measure(
+                f"find_matches_for_job[{mode}]",
+                _engine_call(Session, mode, 'find_matches_for_job', min_score=args.min_score, include_details=False),
+                [(job_id,) for job_id in job_ids], active_candidates
+            ))
+        if 'candidate' in args.benchmarks and candidate_ids:
+            results.append(measure(
+                f"find_matches_for_candidate[{mode}]",
+                _engine_call(Session, mode, 'find_matches_for_candidate', min_score=args.min_score, include_details=False),
+                [(candidate_id,) for candidate_id in candidate_ids], open_jobs
+            ))
+        if 'batch' in args.benchmarks:
+            results.append(measure(
+                f"batch_match_all_candidates[{mode}]",
+                _batch_call(Session, mode, args.batch_min_score, args.workers),
+                [()] * args.batch_runs, active_candidates * open_jobs
+            ))
+        if 'ending' in args.benchmarks:
+            results.append(measure(
+                f"scan_ending_assignments[{mode}]",
+                _ending_call(Session, mode),
+                [()] * args.batch_runs, ending_assignments * open_jobs
+            ))
+
+    return {
+        'generated_at': datetime.utcnow().isoformat(),
+        'scale': args.scale,
+        'seed': args.seed,
+        'database': bind.dialect.name,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': dataset,
+        'load_seconds': load_seconds,
+        'active_candidates': active_candidates,
+        'open_jobs': open_jobs,
+        'ending_assignments': ending_assignments,
+        'results': results,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the matching engine on synthetic data")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k")
+    parser.add_argument("--database-url", help="defaults to a SQLite file in the temp folder (DROPPED and reloaded)")
+    parser.add_argument("--reuse", action="store_true", help="reuse an already loaded dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--samples", type=int, default=25, help="jobs / candidates timed per lookup benchmark")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--min-score", type=int, default=50)
+    parser.add_argument("--batch-min-score", type=int, default=70)
+    parser.add_argument("--batch-runs", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="batch_match_all_candidates workers")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    payload = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(payload + "\n")
+        print(f"\n📄 Report written to {args.output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Scoring-equivalence harness and pair-level microbenchmarks
+
+Runs the reference per-pair scorer (MatchingEngine._calculate_match_score
+plus the original rule loop) and every registered alternative on the same
+randomized (candidate, job) pairs, asserts identical scores and rule
+outcomes, and reports pairs/sec for each implementation.
+
+Run from the backend folder:
+
+    python -m benchmarks.scoring_equivalence --seed 7 --candidates 400 --jobs 80
+
+To check a new scorer, add a function to IMPLEMENTATIONS that returns
+{(candidate_id, job_id): Outcome} for the given pairs, with the index of
+the pair key shared by a pool if it scores whole pools (a raise fails every
+pair of the pool) or None if it scores pair by pair.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import Candidate, Job, MatchingRule, ScoringProfile
+from match_features import STATE_REGIONS, candidate_features, job_features, apply_features
+from matching_engine import MatchingEngine
+from matching_rules import CompiledRule, CompiledRuleSet
+from scoring_profiles import AUTO_PROFILE, DEFAULT_WEIGHTS, CompiledProfile, ProfileSet
+from specialty_map import SEED_SYNONYMS, SpecialtyMap, normalize_specialty
+from vectorized_scoring import CandidatePool, JobPool
+
+
+# score / disqualified / bonus / notes of one pair, or error = exception type name
+Outcome = namedtuple('Outcome', 'score disqualified bonus notes error')
+
+SPECIALTIES = ['ICU', 'icu', 'CCU RN', 'Intensive Care', 'ER', 'ED', 'Med-Surg', 'Telemetry', 'OR', 'L&D', '', None]
+STATES = ['CA', 'TX', 'NY', 'FL', 'WA', 'AZ', 'ca', 'ZZ']
+REGIONS = list(STATE_REGIONS) + ['Other', 'Nowhere']
+FACILITIES = ['Mercy General', 'St. Luke', 'County Medical']
+
+
+def seed_specialty_map() -> SpecialtyMap:
+    """SpecialtyMap of the built-in synonyms (no database to load one from)"""
+    ids, names = {}, {}
+    for specialty_id, (name, synonyms) in enumerate(SEED_SYNONYMS.items(), start=1):
+        names[specialty_id] = name
+        for synonym in [name] + synonyms:
+            ids.setdefault(normalize_specialty(synonym), specialty_id)
+    return SpecialtyMap(ids, names)
+
+
+# ==================== RANDOM PAIRS ====================
+
+class EdgeCaseData:
+    """Transient candidates, jobs and rules covering the shapes real rows come in"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.today = date.today()
+
+    def _members(self, pool: List, k: int):
+        """None, a list, a JSON list string, a JSON object string or a bare JSON string"""
+        rng = self.rng
+        values = rng.sample([value for value in pool if value], rng.randint(0, k))
+        shape = rng.random()
+        if shape < 0.15:
+            return None
+        if shape < 0.45:
+            return json.dumps(values)
+        if shape < 0.50:
+            return json.dumps({value: True for value in values})
+        if shape < 0.53:
+            return json.dumps(rng.choice(STATES))
+        return values
+
+    def candidates(self, count: int, allow_null_years: bool) -> List[Candidate]:
+        rng = self.rng
+        years = [0, 1, 2, 3, 5, 8, 12] + ([None] if allow_null_years else [])
+        rows = []
+        for i in range(count):
+            candidate = Candidate(
+                candidate_id=f"CND{i:012d}",
+                first_name="Edge",
+                last_name=f"Case{i}",
+                email=f"edge{i}@bench.example",
+                primary_specialty=rng.choice(SPECIALTIES),
+                sub_specialties=self._members(SPECIALTIES, 3),
+                years_experience=rng.choice(years),
+                preferred_states=self._members(STATES, 3),
+                preferred_regions=self._members(REGIONS, 2),
+                # Negative gaps: available long before or after the job starts
+                availability_date=rng.choice([None, self.today + timedelta(days=rng.randint(-60, 90))]),
+                desired_contract_weeks=rng.choice([None, 0, 8, 13, 16, 26]),
+                candidate_status="active",
+            )
+            # Feature columns are left NULL on some rows so both code paths are exercised
+            if rng.random() < 0.7:
+                apply_features(candidate, candidate_features(candidate))
+            rows.append(candidate)
+        return rows
+
+    def jobs(self, count: int) -> List[Job]:
+        rng = self.rng
+        rows = []
+        for i in range(count):
+            job = Job(
+                job_id=f"JOB{i:012d}",
+                specialty_required=rng.choice(SPECIALTIES),
+                sub_specialties_accepted=self._members(SPECIALTIES, 3),
+                state=rng.choice(STATES + [None, '']),
+                min_years_experience=rng.choice([None, 0, 1, 3, 5]),
+                start_date=rng.choice([None, self.today + timedelta(days=rng.randint(-20, 80))]),
+                contract_weeks=rng.choice([None, 8, 13, 17]),
+                shift_type=rng.choice([None, 'Day', 'night', 'Weekend']),
+                housing_stipend=rng.choice([None, 0.0, 1500.0]),
+                status="Open",
+                facility=rng.choice(FACILITIES + [None]),
+            )
+            if rng.random() < 0.7:
+                apply_features(job, job_features(job))
+            rows.append(job)
+        return rows
+
+    def rules(self, count: int) -> List[MatchingRule]:
+        rng = self.rng
+        rows = []
+        for i in range(count):
+            keys = rng.sample(['specialty_match_required', 'min_experience', 'state_required', 'unknown_key'],
+                              rng.randint(0, 3))
+            conditions = {key: (rng.choice([0, 2, 4]) if key == 'min_experience' else rng.choice([True, False, 1]))
+                          for key in keys}
+            rows.append(MatchingRule(
+                rule_id=f"RUL{i:012d}",
+                rule_name=f"Edge rule {i}",
+                description="Synthetic rule",
+                conditions=json.dumps(conditions) if rng.random() < 0.3 else conditions,
+                action=rng.choice(['disqualify', 'bonus', 'bonus', 'penalty', 'unknown']),
+                bonus_points=rng.choice([None, 5, 10, -3]),
+                is_active=True,
+            ))
+        return rows
+
+    def profiles(self, count: int) -> List[ScoringProfile]:
+        """Weight profiles scoped to a specialty or a facility, with some factors left at their default"""
+        rng = self.rng
+        scopes = [('specialty', value) for value in SPECIALTIES if value] + [('facility', value) for value in FACILITIES]
+        rows = []
+        for i, (field, value) in enumerate(rng.sample(scopes, min(count, len(scopes)))):
+            weights = {factor: rng.randint(0, 40) for factor in rng.sample(list(DEFAULT_WEIGHTS), rng.randint(1, 7))}
+            rows.append(ScoringProfile(profile_id=f"PRF{i:012d}", name=f"Edge profile {i}", weights=weights,
+                                       is_active=True, **{field: value}))
+        return rows
+
+
+# ==================== IMPLEMENTATIONS ====================
+
+def _reference_rules(rules: List[MatchingRule], candidate, job) -> Dict:
+    """The original per-pair rule loop (uncompiled)"""
+    result = {'disqualified': False, 'bonus_points': 0, 'notes': []}
+    for rule in rules:
+        if not _reference_conditions(rule, candidate, job):
+            continue
+        if rule.action == "disqualify":
+            result['disqualified'] = True
+            result['notes'].append(f"❌ {rule.rule_name}: {rule.description}")
+            return result
+        elif rule.action == "bonus":
+            result['bonus_points'] += rule.bonus_points or 0
+            result['notes'].append(f"✓ {rule.rule_name}: +{rule.bonus_points} points")
+        elif rule.action == "penalty":
+            result['bonus_points'] -= abs(rule.bonus_points or 0)
+            result['notes'].append(f"⚠ {rule.rule_name}: {rule.bonus_points} points")
+    return result
+
+
+def _reference_conditions(rule, candidate, job) -> bool:
+    if not rule.conditions:
+        return False
+    conditions = rule.conditions if isinstance(rule.conditions, dict) else json.loads(rule.conditions)
+    for key, value in conditions.items():
+        if key == "specialty_match_required" and value:
+            if candidate.primary_specialty != job.specialty_required:
+                return True
+        if key == "min_experience" and value:
+            if candidate.years_experience < value:
+                return True
+        if key == "state_required" and value:
+            preferred = candidate.preferred_states if isinstance(candidate.preferred_states, list) else json.loads(candidate.preferred_states or '[]')
+            if job.state not in preferred:
+                return True
+    return False
+
+
+def _pair_outcome(score_pair: Callable, apply_rules: Callable, candidate, job) -> Outcome:
+    try:
+        base = score_pair(candidate, job)
+        rule_result = apply_rules(candidate, job)
+    except Exception as e:
+        return Outcome(None, None, None, None, type(e).__name__)
+    score = min(base + rule_result['bonus_points'], 100)
+    return Outcome(score, rule_result['disqualified'], rule_result['bonus_points'], tuple(rule_result['notes']), None)
+
+
+def reference(engine, candidates, jobs, rules) -> Dict[Tuple[str, str], Outcome]:
+    """MatchingEngine._calculate_match_score + the original rule loop, one pair at a time"""
+    return {
+        (candidate.candidate_id, job.job_id): _pair_outcome(
+            engine._calculate_match_score, lambda c, j: _reference_rules(rules, c, j), candidate, job
+        )
+        for job in jobs for candidate in candidates
+    }
+
+
+def scalar_breakdown(engine, candidates, jobs, rules) -> Dict[Tuple[str, str], Outcome]:
+    """Per-factor breakdown + compiled rules, one pair at a time (the scalar API path)"""
+    compiled = CompiledRuleSet([CompiledRule(rule) for rule in rules])
+    return {
+        (candidate.candidate_id, job.job_id): _pair_outcome(
+            lambda c, j: min(sum(engine._score_breakdown(c, j).values()), 100), compiled.apply, candidate, job
+        )
+        for job in jobs for candidate in candidates
+    }
+
+
+def _pool_outcomes(score_against_pool, outcomes: Dict, keys: List[Tuple[str, str]]):
+    """Score one entity against a pool; a raise fails every pair of that pool"""
+    try:
+        factors, outcome, scores = score_against_pool()
+    except Exception as e:
+        for key in keys:
+            outcomes[key] = Outcome(None, None, None, None, type(e).__name__)
+        return
+    for i, key in enumerate(keys):
+        outcomes[key] = Outcome(int(scores[i]), bool(outcome.disqualified[i]), int(outcome.bonus[i]),
+                                tuple(outcome.notes(i)), None)
+
+
+def vectorized_job(engine, candidates, jobs, rules) -> Dict[Tuple[str, str], Outcome]:
+    """One job against a CandidatePool per call"""
+    compiled = CompiledRuleSet([CompiledRule(rule) for rule in rules])
+    pool = CandidatePool(candidates)
+    outcomes = {}
+    for job in jobs:
+        _pool_outcomes(lambda: engine.score_job_against_pool(job, pool, compiled), outcomes,
+                       [(candidate_id, job.job_id) for candidate_id in pool.ids])
+    return outcomes
+
+
+def vectorized_candidate(engine, candidates, jobs, rules) -> Dict[Tuple[str, str], Outcome]:
+    """One candidate against a JobPool per call"""
+    compiled = CompiledRuleSet([CompiledRule(rule) for rule in rules])
+    pool = JobPool(jobs, engine._get_state_region)
+    outcomes = {}
+    for candidate in candidates:
+        _pool_outcomes(lambda: engine.score_candidate_against_pool(candidate, pool, compiled), outcomes,
+                       [(candidate.candidate_id, job_id) for job_id in pool.ids])
+    return outcomes
+
+
+# name -> (implementation, index of the (candidate_id, job_id) part shared by
+# one pool - None for pair-by-pair scorers)
+IMPLEMENTATIONS: Dict[str, Tuple[Callable, Optional[int]]] = {
+    'scalar_breakdown': (scalar_breakdown, None),
+    'vectorized_job': (vectorized_job, 1),
+    'vectorized_candidate': (vectorized_candidate, 0),
+}
+
+
+# ==================== HARNESS ====================
+
+def _mismatches(expected: Dict, actual: Dict, pool_key: Optional[int]) -> List[Tuple]:
+    """
+    Pairs whose outcome differs from the reference
+    Pool scorers raise for a whole pool when any pair raises - a failed pair is
+    excused only if the reference raised the same exception type for another
+    pair of the same pool (same job for job pools, same candidate for candidate pools).
+    """
+    pool_errors = set()
+    if pool_key is not None:
+        pool_errors = {(key[pool_key], outcome.error) for key, outcome in expected.items() if outcome.error}
+    found = []
+    for key, outcome in expected.items():
+        got = actual.get(key)
+        if got == outcome:
+            continue
+        if pool_key is not None and got is not None and (key[pool_key], got.error) in pool_errors:
+            continue
+        found.append((key, outcome, got))
+    return found
+
+
+def check_equivalence(seed: int = 0, candidates: int = 300, jobs: int = 60, rules: int = 6,
+                      allow_null_years: bool = False, implementations: Dict[str, Tuple[Callable, bool]] = None,
+                      use_distance: bool = False, profiles: int = 0, canonical: bool = False) -> Dict:
+    """
+    Score the same random pairs with the reference and every implementation
+    profiles > 0 scores with that many random weight profiles (scoring_profile='auto')
+    canonical=True compares specialties through the built-in synonym map
+    Returns a report with pairs/sec and mismatches per implementation
+    """
+    data = EdgeCaseData(seed)
+    candidate_rows = data.candidates(candidates, allow_null_years)
+    job_rows = data.jobs(jobs)
+    rule_rows = data.rules(rules)
+    engine = MatchingEngine(None, use_distance=use_distance, scoring_profile=AUTO_PROFILE if profiles else None,
+                            canonical_specialties=canonical)
+    if canonical:
+        engine._specialties = seed_specialty_map()
+    if profiles:
+        # Compiled from transient rows - no database to load them from
+        engine._profiles = ProfileSet([CompiledProfile(profile) for profile in data.profiles(profiles)])
+    pairs = len(candidate_rows) * len(job_rows)
+
+    report = {'seed': seed, 'pairs': pairs, 'rules': rules, 'implementations': {}}
+    started = time.perf_counter()
+    expected = reference(engine, candidate_rows, job_rows, rule_rows)
+    elapsed = time.perf_counter() - started
+    report['implementations']['reference'] = {
+        'seconds': round(elapsed, 4),
+        'pairs_per_sec': round(pairs / elapsed, 1),
+        'errors': sum(1 for outcome in expected.values() if outcome.error),
+    }
+
+    for name, (implementation, pool_key) in (implementations or IMPLEMENTATIONS).items():
+        started = time.perf_counter()
+        actual = implementation(engine, candidate_rows, job_rows, rule_rows)
+        elapsed = time.perf_counter() - started
+        found = _mismatches(expected, actual, pool_key)
+        report['implementations'][name] = {
+            'seconds': round(elapsed, 4),
+            'pairs_per_sec': round(pairs / elapsed, 1),
+            'speedup': round(report['implementations']['reference']['seconds'] / elapsed, 2),
+            'mismatches': len(found),
+            'examples': [
+                {'pair': list(key), 'expected': expected_outcome._asdict(),
+                 'actual': actual_outcome._asdict() if actual_outcome else None}
+                for key, expected_outcome, actual_outcome in found[:5]
+            ],
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check alternative scorers against the reference per-pair scorer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=5, help="seeds seed .. seed+rounds-1")
+    parser.add_argument("--candidates", type=int, default=300)
+    parser.add_argument("--jobs", type=int, default=60)
+    parser.add_argument("--rules", type=int, default=6)
+    parser.add_argument("--null-years", action="store_true",
+                        help="also generate NULL years_experience - min_experience rules raise on it, which fails "
+                             "whole pools in the vectorized scorers, so this only checks that errors match")
+    parser.add_argument("--distance", action="store_true", help="score with distance-aware location (use_distance)")
+    parser.add_argument("--profiles", type=int, default=0,
+                        help="score with this many random specialty / facility weight profiles (scoring_profile=auto)")
+    parser.add_argument("--canonical", action="store_true",
+                        help="compare specialties by canonical id through the built-in synonyms (canonical_specialties)")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    reports = []
+    failed = False
+    for seed in range(args.seed, args.seed + args.rounds):
+        report = check_equivalence(seed, args.candidates, args.jobs, args.rules, args.null_years,
+                                   use_distance=args.distance, profiles=args.profiles, canonical=args.canonical)
+        reports.append(report)
+        print(f"\n🔍 seed {seed}: {report['pairs']:,} pairs, {report['rules']} rules")
+        for name, result in report['implementations'].items():
+            status = "" if name == 'reference' else ("✅" if not result['mismatches'] else f"❌ {result['mismatches']} mismatches")
+            print(f"  {name:<22} {result['pairs_per_sec']:>14,.0f} pairs/s  {status}")
+            failed |= bool(result.get('mismatches'))
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(json.dumps(reports, indent=2, default=str) + "\n")
+        print(f"\n📄 Report written to {args.output}")
+
+    if failed:
+        print("\n❌ Scorers are NOT equivalent")
+        sys.exit(1)
+    print("\n✅ All scorers match the reference")
+
+
+if __name__ == "__main__":
+    main()
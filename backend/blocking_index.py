@@ -0,0 +1,189 @@
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Candidate
+from vectorized_scoring import CandidatePool, _members, load_candidate_pool
+from geo_distance import DISTANCE_TIERS, job_point, states_within
+from specialty_map import get_pool_specialties
+
+
+# Best possible points outside specialty (30) + location (25):
+# experience 20 + availability 15 + contract 5 + shift 3 + housing 2
+MAX_OTHER_POINTS = 45
+MAX_SPECIALTY_POINTS = 30
+MAX_LOCATION_POINTS = 25
+
+
+class CandidateBlockingIndex:
+    """
+    Blocking index over a CandidatePool for job -> candidate matching
+
+    Groups candidates by normalized specialty, sub-specialty and preferred
+    state / region so a job only scores the candidates that can still reach
+    min_score. A candidate is skipped only when
+
+        specialty_upper_bound + location_upper_bound + 45 + max_rule_bonus < min_score
+
+    so returned matches are identical to a full scan.
+    """
+
+    def __init__(self, pool: CandidatePool):
+        self.pool = pool
+        self.no_states = np.flatnonzero(~pool.has_states)
+        self.irregular = np.flatnonzero(pool.irregular)
+
+        # Lowercased primary specialty -> rows (only rows that score specialty at all)
+        by_specialty = {}
+        for i in np.flatnonzero(pool.has_specialty):
+            by_specialty.setdefault(int(pool.specialty[i]), []).append(i)
+        self.by_specialty = {code: np.array(rows, dtype=np.int64) for code, rows in by_specialty.items()}
+
+    def __len__(self):
+        return self.pool.n
+
+    def candidate_rows(self, job, min_score: int, max_bonus: int, region_of,
+                       use_distance: bool = False, profile=None, specialties=None) -> Optional[np.ndarray]:
+        """
+        Sorted pool rows that may score >= min_score for this job
+        None means nothing can be pruned (score the whole pool)
+        use_distance adds the distance tiers of geo_distance to the location bound
+        profile (a scoring_profiles.CompiledProfile) scales every bound by its weights
+        specialties (a specialty_map.SpecialtyMap) groups specialties by canonical id
+        """
+        if profile is None:
+            max_specialty, max_location, max_other = MAX_SPECIALTY_POINTS, MAX_LOCATION_POINTS, MAX_OTHER_POINTS
+        else:
+            max_specialty, max_location = profile.weights[0], profile.weights[1]
+            max_other = profile.max_other
+        threshold = min_score - max_other - max(max_bonus, 0)
+        if threshold <= 0:
+            return None
+
+        try:
+            if specialties is not None:
+                specialty_tiers = self._canonical_specialty_tiers(job, specialties)
+            else:
+                specialty_tiers = self._specialty_tiers(job)
+            location_tiers = self._location_tiers(job, region_of, use_distance)
+        except Exception:
+            # Unusual job values - let the scorer handle it on the full pool
+            return None
+        if profile is not None:
+            # Weighting is monotone, so scaled tier points stay exact upper bounds
+            specialty_tiers = [(profile.scale_points(0, points), rows) for points, rows in specialty_tiers]
+            location_tiers = [(profile.scale_points(1, points), rows) for points, rows in location_tiers]
+
+        # Every row outside the listed tiers scores 0 on that factor
+        candidates = None
+        if threshold > max_location:
+            candidates = self._union(rows for points, rows in specialty_tiers if points + max_location >= threshold)
+        if threshold > max_specialty:
+            located = self._union(rows for points, rows in location_tiers if points + max_specialty >= threshold)
+            candidates = located if candidates is None else np.intersect1d(candidates, located, assume_unique=True)
+        if candidates is None:
+            return None
+
+        # Exact upper bound on specialty + location for the remaining rows
+        upper = self._upper_bound(candidates, specialty_tiers) + self._upper_bound(candidates, location_tiers)
+        keep = candidates[upper >= threshold]
+
+        # Irregular rows are scored per pair and never pruned
+        return np.union1d(keep, self.irregular)
+
+    # ---------- helpers ----------
+
+    def _specialty_tiers(self, job):
+        if not job.specialty_required:
+            return []
+        pool = self.pool
+        tiers = [
+            (30, self.by_specialty.get(pool.specialty_codes.lookup(job.specialty_required.lower()))),
+            (25, pool.sub_specialties.get(job.specialty_required)),
+        ]
+        if job.sub_specialties_accepted:
+            codes = pool.primary_codes.lookup_many(_members(job.sub_specialties_accepted))
+            tiers.append((20, np.flatnonzero(np.isin(pool.primary, codes) & pool.has_specialty)))
+        return [(points, rows) for points, rows in tiers if rows is not None and len(rows)]
+
+    def _canonical_specialty_tiers(self, job, specialties):
+        if not job.specialty_required:
+            return []
+        canonical = get_pool_specialties(self.pool, specialties)
+        required = specialties.row_id(getattr(job, 'specialty_id', None), job.specialty_required)
+        tiers = [
+            (30, canonical.by_primary.get(required)),
+            (25, canonical.sub_specialties.get(required)),
+        ]
+        accepted = [canonical.by_primary[key] for key in specialties.ids_for(job.sub_specialties_accepted)
+                    if key in canonical.by_primary]
+        if accepted:
+            tiers.append((20, self._union(accepted)))
+        return [(points, rows) for points, rows in tiers if rows is not None and len(rows)]
+    
+    def _location_tiers(self, job, region_of, use_distance: bool = False):
+        if not job.state:
+            return []
+        pool = self.pool
+        tiers = [
+            (25, pool.states.get(job.state)),
+            (15, pool.regions.get(region_of(job.state))),
+            (10, self.no_states),
+        ]
+        point = job_point(job) if use_distance else None
+        if point is not None:
+            # Candidates with a preferred state within each radius
+            for miles, points in DISTANCE_TIERS:
+                rows = [pool.states[state] for state in states_within(point, miles) if state in pool.states]
+                tiers.append((points, self._union(rows)))
+        return [(points, rows) for points, rows in tiers if rows is not None and len(rows)]
+
+    @staticmethod
+    def _union(groups) -> np.ndarray:
+        groups = list(groups)
+        if not groups:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(groups))
+
+    @staticmethod
+    def _upper_bound(rows: np.ndarray, tiers) -> np.ndarray:
+        bound = np.zeros(len(rows), dtype=np.int32)
+        for points, tier_rows in tiers:
+            bound = np.where(np.isin(rows, tier_rows), np.maximum(bound, points), bound)
+        return bound
+
+
+# ==================== CACHE ====================
+
+_cache_lock = threading.Lock()
+_cached_index: Optional[Tuple] = None
+
+
+def candidate_table_version(db: Session) -> Tuple:
+    """Cheap version stamp of the candidates table (row count + last update)"""
+    count, last_updated = db.query(
+        func.count(Candidate.candidate_id), func.max(Candidate.updated_at)
+    ).one()
+    return (count, last_updated)
+
+
+def get_candidate_index(db: Session) -> Tuple[CandidatePool, CandidateBlockingIndex]:
+    """
+    Return the active candidate pool and its blocking index
+    Rebuilt only when the candidates table version changes
+    """
+    global _cached_index
+
+    version = candidate_table_version(db)
+    cached = _cached_index
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    pool = load_candidate_pool(db)
+    index = CandidateBlockingIndex(pool)
+    with _cache_lock:
+        _cached_index = (version, pool, index)
+    return pool, index
@@ -1,5 +1,8 @@
-from database import engine
-from models import Base
+from sqlalchemy import inspect, text
+from database import engine, SessionLocal
+from models import Base, Alert, Assignment, Candidate, Document, Expense, Job, MatchingRule, SpecialtySynonym
+from match_features import backfill_match_features
+from specialty_map import rebuild_specialty_map
 
 print("Creating all tables if they do not exist...")
 
@@ -9,4 +12,54 @@ try:
 except Exception as e:
     print("Error while creating tables:")
     import traceback
+    traceback.print_exc()
+
+# create_all doesn't touch existing tables - add columns introduced later (matching features, rule conditions)
+try:
+    inspector = inspect(engine)
+    added = []
+    for table in (Candidate.__table__, Job.__table__, MatchingRule.__table__):
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+    if added:
+        print(f"Added columns: {', '.join(added)}")
+    if any(not name.startswith(f"{MatchingRule.__tablename__}.") for name in added):
+        db = SessionLocal()
+        try:
+            print(f"Backfilled matching features: {backfill_match_features(db)}")
+        finally:
+            db.close()
+except Exception as e:
+    print("Error while adding new columns:")
+    import traceback
+    traceback.print_exc()
+
+# Seed the built-in specialty synonyms once and stamp specialty_id on existing candidates / jobs
+try:
+    db = SessionLocal()
+    try:
+        if not db.query(SpecialtySynonym.synonym).filter(SpecialtySynonym.source == "seed").first():
+            print(f"Built canonical specialty map: {rebuild_specialty_map(db)}")
+    finally:
+        db.close()
+except Exception as e:
+    print("Error while building the canonical specialty map:")
+    import traceback
+    traceback.print_exc()
+
+# create_all only builds indexes together with new tables - add the ones introduced later
+try:
+    for table in (Alert.__table__, Assignment.__table__, Candidate.__table__, Document.__table__,
+                  Expense.__table__, Job.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    print("Indexes are up to date.")
+except Exception as e:
+    print("Error while creating indexes (duplicate unread new_match alerts must be removed first):")
+    import traceback
     traceback.print_exc()
\ No newline at end of file
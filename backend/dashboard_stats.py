@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.orm import Session
+
+from models import Alert, Assignment, Candidate, Job
+
+
+# Longest a snapshot is served before it is recounted - bounds drift from writes
+# the session events can't see (other processes, raw SQL)
+DASHBOARD_STATS_TTL = float(os.getenv("DASHBOARD_STATS_TTL", "30"))
+
+# session.info keys: counter deltas of the current transaction / a bulk write happened
+_DELTAS_KEY = "dashboard_stat_deltas"
+_STALE_KEY = "dashboard_stats_stale"
+
+_UNKNOWN = object()
+
+
+# ==================== COUNTER KEYS ====================
+# Each row is counted under one key per table; the SQL below and the session
+# events must derive the same key from the same row
+
+def _status(value) -> Optional[str]:
+    # Statuses were always compared with ilike - "Active" and "active" are one status
+    return value.lower() if isinstance(value, str) else None
+
+
+def _candidate_key(candidate_status):
+    return _status(candidate_status)
+
+
+def _job_key(status):
+    return _status(status)
+
+
+def _assignment_key(status, end_date):
+    # Active assignments are kept per end date so "ending soon" follows the calendar
+    status = _status(status)
+    return status, end_date if status == "active" else None
+
+
+def _alert_key(is_read):
+    return None if is_read is None else bool(is_read)
+
+
+_TRACKED = {
+    Candidate: ("candidates", ("candidate_status",), _candidate_key),
+    Job: ("jobs", ("status",), _job_key),
+    Assignment: ("assignments", ("status", "end_date"), _assignment_key),
+    Alert: ("alerts", ("is_read",), _alert_key),
+}
+
+
+def count_dashboard_rows(db: Session) -> Dict[str, Counter]:
+    """One grouped aggregate query per table, counted under the same keys as the session events"""
+    candidate_status = func.lower(Candidate.candidate_status)
+    job_status = func.lower(Job.status)
+    assignment_status = func.lower(Assignment.status)
+    active_end_date = case((assignment_status == "active", Assignment.end_date), else_=None)
+
+    counts = {table: Counter() for table, _, _ in _TRACKED.values()}
+    for status, n in db.query(candidate_status, func.count()).group_by(candidate_status):
+        counts["candidates"][_candidate_key(status)] += n
+    for status, n in db.query(job_status, func.count()).group_by(job_status):
+        counts["jobs"][_job_key(status)] += n
+    for status, end_date, n in db.query(assignment_status, active_end_date, func.count()).group_by(
+            assignment_status, active_end_date):
+        counts["assignments"][_assignment_key(status, end_date)] += n
+    for is_read, n in db.query(Alert.is_read, func.count()).group_by(Alert.is_read):
+        counts["alerts"][_alert_key(is_read)] += n
+    return counts
+
+
+def _tracked_values(state, names, before: bool):
+    """Tracked attribute values before / after the flush - _UNKNOWN if one was never loaded"""
+    values = []
+    for name in names:
+        history = state.attrs[name].history
+        if before:
+            if history.deleted:
+                values.append(history.deleted[0])
+            elif history.unchanged and not history.added:
+                values.append(history.unchanged[0])
+            else:
+                return _UNKNOWN
+        elif history.added:
+            values.append(history.added[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        elif name in state.dict:
+            values.append(state.dict[name])
+        else:
+            return _UNKNOWN
+    return values
+
+
+# ==================== STATS ====================
+
+class DashboardStats:
+    """
+    Row counts behind /api/dashboard/stats
+
+    A snapshot is counted with count_dashboard_rows, then kept current by
+    session events: every committed insert / update / delete of a candidate,
+    job, assignment or alert moves its row between keys. Bulk ORM writes
+    (query.update(), insert(Alert) executemany) can't be attributed to keys,
+    so they drop the snapshot instead. A commit landing while a snapshot is
+    being counted may be off by one until the next recount (at most ttl).
+    """
+
+    def __init__(self, ttl: float = DASHBOARD_STATS_TTL):
+        self.ttl = ttl
+        self._counts: Optional[Dict[str, Counter]] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.recounts = 0
+        self.increments = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, ending_soon_days: int, refresh: bool = False) -> Dict:
+        with self._lock:
+            counts = self._counts if not refresh and self._expires_at > time.monotonic() else None
+            if counts is not None:
+                self.hits += 1
+                return self._format(counts, ending_soon_days)
+
+        counts = count_dashboard_rows(db)
+        with self._lock:
+            self._counts = counts
+            self._expires_at = time.monotonic() + self.ttl
+            self.recounts += 1
+            return self._format(counts, ending_soon_days)
+
+    def invalidate(self):
+        with self._lock:
+            self._counts = None
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'cached': self._counts is not None and self._expires_at > time.monotonic(),
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'recounts': self.recounts,
+                'increments': self.increments,
+                'invalidations': self.invalidations,
+            }
+
+    @staticmethod
+    def _format(counts: Dict[str, Counter], ending_soon_days: int) -> Dict:
+        today = date.today()
+        threshold_date = today + timedelta(days=ending_soon_days)
+        assignments = counts["assignments"]
+        return {
+            "candidates": {
+                "total": sum(counts["candidates"].values()),
+                "active": counts["candidates"]["active"],
+            },
+            "jobs": {
+                "total": sum(counts["jobs"].values()),
+                "open": counts["jobs"]["open"],
+            },
+            "assignments": {
+                "total": sum(assignments.values()),
+                "active": sum(n for (status, _), n in assignments.items() if status == "active"),
+                "completed": sum(n for (status, _), n in assignments.items() if status == "completed"),
+                "ending_soon": sum(
+                    n for (status, end_date), n in assignments.items()
+                    if status == "active" and end_date is not None and today < end_date <= threshold_date
+                ),
+                "ending_soon_days": ending_soon_days,
+            },
+            "alerts": {
+                "unread": counts["alerts"][False],
+            }
+        }
+
+    # ---------- session events ----------
+
+    def _collect(self, session, flush_context):
+        deltas = session.info.setdefault(_DELTAS_KEY, [])
+        deleted = session.deleted
+        changes = [(obj, False, True) for obj in session.new]
+        changes += [(obj, True, True) for obj in session.dirty if obj not in deleted]
+        changes += [(obj, True, False) for obj in deleted]
+        for obj, before, after in changes:
+            tracked = _TRACKED.get(type(obj))
+            if tracked is None:
+                continue
+            table, names, key = tracked
+            state = inspect(obj)
+            if before and after and not any(state.attrs[name].history.has_changes() for name in names):
+                continue
+            old = _tracked_values(state, names, before=True) if before else None
+            new = _tracked_values(state, names, before=False) if after else None
+            if old is _UNKNOWN or new is _UNKNOWN:
+                session.info[_STALE_KEY] = True
+                continue
+            if old is not None:
+                deltas.append((table, key(*old), -1))
+            if new is not None:
+                deltas.append((table, key(*new), 1))
+
+    def _bulk_write(self, orm_execute_state):
+        if orm_execute_state.is_select:
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in _TRACKED:
+            orm_execute_state.session.info[_STALE_KEY] = True
+
+    def _committed(self, session):
+        deltas = session.info.pop(_DELTAS_KEY, None)
+        if session.info.pop(_STALE_KEY, False):
+            self.invalidate()
+            return
+        if not deltas:
+            return
+        with self._lock:
+            if self._counts is None:
+                return
+            for table, key, delta in deltas:
+                self._counts[table][key] += delta
+            self.increments += len(deltas)
+
+    def _rolled_back(self, session):
+        session.info.pop(_DELTAS_KEY, None)
+        session.info.pop(_STALE_KEY, None)
+
+
+dashboard_stats = DashboardStats()
+_enabled = False
+
+
+def enable_dashboard_counters(session_class=Session):
+    """
+    Keep dashboard_stats current from committed writes of this process
+    Called once at app start-up; without it the snapshot is only recounted every ttl
+    """
+    global _enabled
+    if _enabled:
+        return
+    event.listen(session_class, "after_flush", dashboard_stats._collect)
+    event.listen(session_class, "do_orm_execute", dashboard_stats._bulk_write)
+    event.listen(session_class, "after_commit", dashboard_stats._committed)
+    event.listen(session_class, "after_rollback", dashboard_stats._rolled_back)
+    _enabled = True
@@ -90,10 +90,10 @@ def generate_initial_alerts():
         
         try:
             # Find top matches 
-            matches = engine.find_matches_for_candidate(candidate.candidate_id, min_score=70)
+            matches = engine.find_matches_for_candidate(candidate.candidate_id, min_score=70, top_k=3)
             
             # Create alerts
-            for match in matches[:3]:
+            for match in matches:
                 job = match['job']
                 
                 # Check if alert already exists
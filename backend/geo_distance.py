@@ -0,0 +1,178 @@
+import csv
+import math
+import os
+import threading
+import weakref
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from match_features import US_STATES
+
+
+# Approximate geographic centers (lat, lon) of the 50 states, same order as US_STATES
+STATE_CENTROIDS = {
+    'AL': (32.806671, -86.791130), 'AK': (61.370716, -152.404419), 'AZ': (33.729759, -111.431221),
+    'AR': (34.969704, -92.373123), 'CA': (36.116203, -119.681564), 'CO': (39.059811, -105.311104),
+    'CT': (41.597782, -72.755371), 'DE': (39.318523, -75.507141), 'FL': (27.766279, -81.686783),
+    'GA': (33.040619, -83.643074), 'HI': (21.094318, -157.498337), 'ID': (44.240459, -114.478828),
+    'IL': (40.349457, -88.986137), 'IN': (39.849426, -86.258278), 'IA': (42.011539, -93.210526),
+    'KS': (38.526600, -96.726486), 'KY': (37.668140, -84.670067), 'LA': (31.169546, -91.867805),
+    'ME': (44.693947, -69.381927), 'MD': (39.063946, -76.802101), 'MA': (42.230171, -71.530106),
+    'MI': (43.326618, -84.536095), 'MN': (45.694454, -93.900192), 'MS': (32.741646, -89.678696),
+    'MO': (38.456085, -92.288368), 'MT': (46.921925, -110.454353), 'NE': (41.125370, -98.268082),
+    'NV': (38.313515, -117.055374), 'NH': (43.452492, -71.563896), 'NJ': (40.298904, -74.521011),
+    'NM': (34.840515, -106.248482), 'NY': (42.165726, -74.948051), 'NC': (35.630066, -79.806419),
+    'ND': (47.528912, -99.784012), 'OH': (40.388783, -82.764915), 'OK': (35.565342, -96.928917),
+    'OR': (44.572021, -122.070938), 'PA': (40.590752, -77.209755), 'RI': (41.680893, -71.511780),
+    'SC': (33.856892, -80.945007), 'SD': (44.299782, -99.438828), 'TN': (35.747845, -86.692345),
+    'TX': (31.054487, -97.563461), 'UT': (40.150032, -111.862434), 'VT': (44.045876, -72.710686),
+    'VA': (37.769337, -78.169968), 'WA': (47.400902, -121.490494), 'WV': (38.491226, -80.954453),
+    'WI': (44.268543, -89.616508), 'WY': (42.755966, -107.302490),
+}
+
+# Optional offline zip centroid table: CSV with zip,latitude,longitude columns
+ZIP_CENTROIDS_CSV = os.getenv(
+    "ZIP_CENTROIDS_CSV", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zip_centroids.csv")
+)
+
+# Partial location credit by miles from the nearest preferred state (exact state stays 25)
+DISTANCE_TIERS = ((200, 20), (400, 15), (700, 8))
+
+EARTH_RADIUS_MILES = 3958.8
+
+
+# ==================== CENTROIDS ====================
+
+_zip_lock = threading.Lock()
+_zip_centroids: Optional[Dict[str, Tuple[float, float]]] = None
+
+
+def zip_centroids() -> Dict[str, Tuple[float, float]]:
+    """5-digit zip -> (lat, lon), loaded once (empty when no table is installed)"""
+    global _zip_centroids
+    if _zip_centroids is None:
+        with _zip_lock:
+            if _zip_centroids is None:
+                table = {}
+                if os.path.exists(ZIP_CENTROIDS_CSV):
+                    with open(ZIP_CENTROIDS_CSV, newline="") as handle:
+                        for row in csv.DictReader(handle):
+                            try:
+                                table[row['zip'].strip().zfill(5)] = (float(row['latitude']), float(row['longitude']))
+                            except (KeyError, ValueError, AttributeError):
+                                continue
+                    print(f"📍 Loaded {len(table)} zip centroids from {ZIP_CENTROIDS_CSV}")
+                _zip_centroids = table
+    return _zip_centroids
+
+
+def job_point(job) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of a job: its zip centroid, else its state centroid"""
+    if isinstance(job.zip_code, str) and job.zip_code.strip():
+        point = zip_centroids().get(job.zip_code.strip()[:5].zfill(5))
+        if point is not None:
+            return point
+    if isinstance(job.state, str):
+        return STATE_CENTROIDS.get(job.state.strip().upper())
+    return None
+
+
+# ==================== DISTANCES ====================
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in miles between two points given in degrees"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+@lru_cache(maxsize=65536)
+def state_miles(state: str, point: Tuple[float, float]) -> float:
+    """
+    Miles from a state centroid to a point
+    The one place distances are computed - pool scoring broadcasts these values,
+    so per-pair and vectorized tiering always compare the same floats
+    """
+    lat, lon = STATE_CENTROIDS[state]
+    return haversine_miles(lat, lon, point[0], point[1])
+
+
+def state_distances(point: Tuple[float, float]) -> np.ndarray:
+    """Miles from a point to every state centroid (US_STATES order)"""
+    return np.array([state_miles(state, point) for state in US_STATES])
+
+
+def distance_points(miles) -> np.ndarray:
+    """DISTANCE_TIERS points for distances in miles"""
+    miles = np.asarray(miles, dtype=float)
+    return np.select([miles <= limit for limit, _ in DISTANCE_TIERS], [points for _, points in DISTANCE_TIERS], 0)
+
+
+def states_within(point: Tuple[float, float], miles: float) -> Iterable[str]:
+    """States whose centroid is within `miles` of a point"""
+    return [US_STATES[i] for i in np.flatnonzero(state_distances(point) <= miles)]
+
+
+def nearest_state_miles(states: Iterable, point: Tuple[float, float]) -> Optional[Tuple[str, float]]:
+    """Closest of the given states (exact codes only) to a point, None when none has a centroid"""
+    best = None
+    for state in states:
+        if isinstance(state, str) and state in STATE_CENTROIDS:
+            miles = state_miles(state, point)
+            if best is None or miles < best[1]:
+                best = (state, miles)
+    return best
+
+
+# ==================== POOL INDEXES ====================
+
+def candidate_distance_points(pool, point: Tuple[float, float]) -> np.ndarray:
+    """
+    Best distance-tier points per row of a CandidatePool view
+    Candidate geography is their preferred states, so the state posting lists
+    are the spatial index: only states inside the outermost tier are touched.
+    """
+    points = np.zeros(pool.n, dtype=np.int32)
+    distances = state_distances(point)
+    for i in np.flatnonzero(distances <= DISTANCE_TIERS[-1][0]):
+        points = np.maximum(points, np.where(pool.hit('states', US_STATES[i]), int(distance_points(distances[i])), 0))
+    return points
+
+
+class JobPointIndex:
+    """Job locations of a JobPool, as an index into their distinct points"""
+
+    def __init__(self, pool):
+        self.n = pool.n
+        self.point_index = np.full(self.n, -1, dtype=np.int64)
+        seen = {}
+        for i, row in enumerate(pool.rows):
+            point = job_point(row)
+            if point is not None:
+                self.point_index[i] = seen.setdefault(point, len(seen))
+        self.points = list(seen)
+
+    def distance_points(self, states: Iterable) -> np.ndarray:
+        """Distance-tier points per job for the nearest of a candidate's preferred states"""
+        states = [state for state in states if isinstance(state, str) and state in STATE_CENTROIDS]
+        if not states or not self.points:
+            return np.zeros(self.n, dtype=np.int32)
+        nearest = np.array([min(state_miles(state, point) for state in states) for point in self.points])
+        points = distance_points(nearest).astype(np.int32)
+        return np.where(self.point_index >= 0, points[np.maximum(self.point_index, 0)], 0).astype(np.int32)
+
+
+_index_lock = threading.Lock()
+_job_points = weakref.WeakKeyDictionary()
+
+
+def get_job_points(pool) -> JobPointIndex:
+    """Job location index for a JobPool, built once per pool"""
+    index = _job_points.get(pool)
+    if index is None:
+        index = JobPointIndex(pool)
+        with _index_lock:
+            _job_points[pool] = index
+    return index
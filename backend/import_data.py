@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from models import Candidate, Credential, Job, Assignment, Expense, Document
 from utils import normalize_phone, parse_date, generate_candidate_id
+from match_scores import refresh_match_scores
 from datetime import datetime
 from models import Job
 import json
@@ -31,6 +32,7 @@ def import_candidates_from_file(file_path: str, db: Session):
     imported = 0
     skipped = 0
     errors = []
+    imported_ids = []
 
     for idx, row in df.iterrows():
         row_num = idx + 2
@@ -82,6 +84,7 @@ def import_candidates_from_file(file_path: str, db: Session):
             db.add(candidate)
             db.flush()
             imported += 1
+            imported_ids.append(cand_id)
 
         except IntegrityError as ie:
             db.rollback()
@@ -92,6 +95,7 @@ def import_candidates_from_file(file_path: str, db: Session):
             skipped += 1
 
     db.commit()
+    refresh_match_scores(db, candidate_ids=imported_ids)
     print(f"  → Imported: {imported} | Skipped: {skipped} | Errors: {len(errors)}")
     return {"imported": imported, "skipped": skipped, "errors": errors[:10]}
 
@@ -176,6 +180,7 @@ def import_jobs_from_file(file_path: str, db: Session):
     imported = 0
     skipped = 0
     errors = []
+    imported_ids = []
     
     for index, row in df.iterrows():
         try:
@@ -279,6 +284,7 @@ def import_jobs_from_file(file_path: str, db: Session):
             
             db.add(new_job)
             imported += 1
+            imported_ids.append(job_id)
             
             # Print progress
             if imported % 10 == 0:
@@ -303,6 +309,8 @@ def import_jobs_from_file(file_path: str, db: Session):
         print(f"\n❌ Commit failed: {str(e)}")
         return {"imported": 0, "skipped": skipped, "errors": [str(e)]}
     
+    refresh_match_scores(db, job_ids=imported_ids)
+    
     return {
         "imported": imported,
         "skipped": skipped,
@@ -0,0 +1,195 @@
+import os
+import queue
+import threading
+import traceback
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job
+from blocking_index import get_candidate_index
+from matching_rules import get_compiled_rules
+from batch_matching import existing_new_match_pairs, insert_new_match_alerts
+
+
+# Best candidates alerted per new open job (same cut as notify_new_job_matches always used)
+NEW_JOB_MATCH_MIN_SCORE = int(os.getenv("NEW_JOB_MATCH_MIN_SCORE", "70"))
+NEW_JOB_MATCH_TOP_K = int(os.getenv("NEW_JOB_MATCH_TOP_K", "10"))
+NEW_JOB_AUTO_SEND = os.getenv("NEW_JOB_AUTO_SEND", "false").lower() == "true"
+
+# session.info key holding the ids of open jobs inserted in the current transaction
+_PENDING_KEY = "new_open_job_ids"
+
+
+# ==================== FAN-OUT ====================
+
+def _is_open(job) -> bool:
+    # POST /api/jobs defaults to "open", imports to "Open"
+    return isinstance(job.status, str) and job.status.lower() == "open"
+
+
+def fan_out_new_jobs(engine, job_ids: Iterable[str], min_score: int = NEW_JOB_MATCH_MIN_SCORE,
+                     top_k: int = NEW_JOB_MATCH_TOP_K, auto_send: bool = False) -> Dict:
+    """
+    Alert the best-matching candidates of a batch of new open jobs
+
+    The whole batch shares one load of the candidate pool (the cached
+    blocking index), one rule set, one job query, one query for existing
+    unread alerts and one bulk alert insert - every job is then a
+    vectorized pass over the pool rows the blocking index can't rule out.
+    """
+    db: Session = engine.db
+    job_ids = list(dict.fromkeys(job_ids))
+    results = {'jobs': 0, 'alerts_created': 0, 'notifications_sent': 0}
+
+    jobs = engine._load_by_ids(Job, Job.job_id, job_ids)
+    open_jobs = [jobs[job_id] for job_id in job_ids if job_id in jobs and _is_open(jobs[job_id])]
+    if not open_jobs:
+        return results
+
+    pool, index = get_candidate_index(db)
+    rules = get_compiled_rules(db)
+    existing = existing_new_match_pairs(db, job_ids=[job.job_id for job in open_jobs])
+
+    now = datetime.utcnow()
+    mappings = []
+    for job in open_jobs:
+        rows = index.candidate_rows(job, min_score, rules.max_bonus, engine._get_state_region,
+                                    engine.use_distance, engine._profile_for(job), engine._canonical_map())
+        ids = pool.ids if rows is None else [pool.ids[i] for i in rows]
+        factors, outcome, scores = engine.score_job_against_pool(job, pool, rules, rows=rows)
+
+        # Best top_k first, then drop candidates already holding an unread alert for the job
+        for i in engine._rank_qualifying(outcome, scores, min_score, top_k):
+            if (ids[i], job.job_id) in existing:
+                continue
+            score = int(scores[i])
+            mappings.append({
+                'alert_type': "new_match",
+                'candidate_id': ids[i],
+                'job_id': job.job_id,
+                'priority': "high" if score >= 85 else "normal",
+                'title': f"New {job.specialty_required} opportunity",
+                'message': f"New {job.specialty_required} role in {job.state} - {score}% match!",
+                'action_required': True,
+                'is_read': False,
+                'created_at': now
+            })
+    results['jobs'] = len(open_jobs)
+
+    inserted = insert_new_match_alerts(db, mappings)
+    db.commit()
+    results['alerts_created'] = len(inserted)
+
+    if auto_send and inserted:
+        candidates = engine._load_by_ids(Candidate, Candidate.candidate_id, list({pair[0] for pair in inserted}))
+        for mapping in mappings:
+            pair = (mapping['candidate_id'], mapping['job_id'])
+            if pair in inserted and pair[0] in candidates:
+                db.add(engine._match_notification_log(candidates[pair[0]], jobs[pair[1]]))
+                results['notifications_sent'] += 1
+        db.commit()
+
+    return results
+
+
+# ==================== EVENTS ====================
+
+class NewJobFanout:
+    """
+    Runs fan_out_new_jobs after a commit that inserted open jobs
+
+    Session events collect the ids of open jobs flushed in a transaction and
+    hand them to one background worker on commit. The worker drains whatever
+    has queued up into a single batch, so a 500-row import is one fan-out.
+    """
+
+    def __init__(self, auto_send: bool = NEW_JOB_AUTO_SEND):
+        self.auto_send = auto_send
+        self._queue: "queue.Queue[List[str]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.jobs = 0
+        self.alerts_created = 0
+
+    # ---------- session events ----------
+
+    def _collect(self, session, flush_context):
+        new_ids = [obj.job_id for obj in session.new if isinstance(obj, Job) and _is_open(obj)]
+        if new_ids:
+            session.info.setdefault(_PENDING_KEY, []).extend(new_ids)
+
+    def _committed(self, session):
+        job_ids = session.info.pop(_PENDING_KEY, None)
+        if job_ids:
+            self.enqueue(job_ids)
+
+    def _rolled_back(self, session):
+        session.info.pop(_PENDING_KEY, None)
+
+    # ---------- worker ----------
+
+    def enqueue(self, job_ids: List[str]):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="new-job-fanout", daemon=True)
+                self._thread.start()
+        self._queue.put(list(job_ids))
+
+    def _run(self):
+        while True:
+            job_ids = self._queue.get()
+            try:
+                while True:
+                    job_ids.extend(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            self._fan_out(job_ids)
+
+    def _fan_out(self, job_ids: List[str]):
+        # Imported here - this module is also used without a configured database
+        from database import SessionLocal
+        from matching_engine import MatchingEngine
+
+        db = SessionLocal()
+        try:
+            results = fan_out_new_jobs(MatchingEngine(db, use_vectorized=True), job_ids, auto_send=self.auto_send)
+            self.batches += 1
+            self.jobs += results['jobs']
+            self.alerts_created += results['alerts_created']
+            print(f"🔔 New job fan-out: {results['jobs']} jobs, {results['alerts_created']} alerts")
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  New job fan-out failed: {str(e)}")
+            traceback.print_exc()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        return {
+            'queued_batches': self._queue.qsize(),
+            'batches': self.batches,
+            'jobs': self.jobs,
+            'alerts_created': self.alerts_created,
+        }
+
+
+new_job_fanout = NewJobFanout()
+_enabled = False
+
+
+def enable_new_job_fanout(session_class=Session):
+    """
+    Fan out every committed batch of new open jobs (POST /api/jobs, job imports)
+    Called once at app start-up; scripts that bulk-load jobs don't enable it
+    """
+    global _enabled
+    if _enabled:
+        return
+    event.listen(session_class, "after_flush", new_job_fanout._collect)
+    event.listen(session_class, "after_commit", new_job_fanout._committed)
+    event.listen(session_class, "after_rollback", new_job_fanout._rolled_back)
+    _enabled = True
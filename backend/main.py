@@ -1,5 +1,7 @@
 from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
@@ -8,8 +10,26 @@ import io
 from datetime import datetime, date, timedelta
 from scheduler import start_scheduler
 from database import get_db, init_db
-from models import Candidate, Job, Assignment, Credential, Document, Expense, Alert
+from models import (
+    Candidate, Job, Assignment, Credential, Document, Expense, Alert, ScoringProfile, MatchJob, MatchJobResult,
+    Specialty, SpecialtySynonym
+)
 from matching_engine import MatchingEngine
+from match_scores import refresh_match_scores
+from match_cache import match_cache
+from batch_matching import reopen_all_alerts, unread_new_match_twin
+from job_fanout import enable_new_job_fanout, new_job_fanout
+from match_executor import match_executor, MatchExecutorSaturated
+from match_jobs import (
+    MATCH_JOB_KINDS, MATCH_JOB_WORKERS, submit_match_job, cancel_match_job, start_match_job_workers
+)
+from availability_index import AVAILABILITY_MODES
+from scoring_profiles import AUTO_PROFILE, get_scoring_profiles, validate_weights
+from specialty_map import rebuild_specialty_map, set_specialty_synonym
+from query_options import query_options
+from pagination import keyset_page, count_rows
+from statement_budget import install_statement_budget
+from dashboard_stats import dashboard_stats, enable_dashboard_counters
 from import_data import (
     import_candidates_from_file,
     import_credentials_from_file,
@@ -75,6 +95,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# SQL statements per request (SQL_BUDGET_MODE=warn|strict)
+install_statement_budget(app)
 ENDING_SOON_DAYS = 30
 # ────────────────────────────────────────────────
 # PYDANTIC MODELS FOR REQUEST/RESPONSE
@@ -133,65 +155,36 @@ class JobCreate(BaseModel):
 def on_startup():
     init_db()
     start_scheduler()
+    # Alert matching candidates whenever open jobs are created or imported
+    if os.getenv("NEW_JOB_FANOUT", "true").lower() == "true":
+        enable_new_job_fanout()
+    # Keep the cached dashboard counts current from committed writes
+    enable_dashboard_counters()
+    # Worker processes for /api/match-jobs (0 = run them separately: python match_jobs.py)
+    start_match_job_workers(MATCH_JOB_WORKERS)
 # Dashboard Stats
 @app.get("/api/dashboard/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    """Get dashboard statistics"""
-   
-    total_candidates = db.query(Candidate).count()
-    # Use candidate_status
-    active_candidates = db.query(Candidate).filter(
-        Candidate.candidate_status.ilike("active")
-    ).count()
-   
-    total_jobs = db.query(Job).count()
-    open_jobs = db.query(Job).filter(
-        Job.status.ilike("open")
-    ).count()
-   
-    total_assignments = db.query(Assignment).count()
-    active_assignments = db.query(Assignment).filter(
-        Assignment.status.ilike("active")
-    ).count()
-    completed_assignments = db.query(Assignment).filter(
-        Assignment.status.ilike("completed")
-    ).count()
-   
-    today = date.today()
-    threshold_date = today + timedelta(days=ENDING_SOON_DAYS)
-    ending_soon = db.query(Assignment).filter(
-        Assignment.status.ilike("active"),
-        Assignment.end_date.isnot(None),
-        Assignment.end_date > today, 
-        Assignment.end_date <= threshold_date
-    ).count()
-   
-    unread_alerts = db.query(Alert).filter(Alert.is_read == False).count()
-   
-    return {
-        "candidates": {
-            "total": total_candidates,
-            "active": active_candidates,
-        },
-        "jobs": {
-            "total": total_jobs,
-            "open": open_jobs,
-        },
-        "assignments": {
-            "total": total_assignments,
-            "active": active_assignments,
-            "completed": completed_assignments,
-            "ending_soon": ending_soon,
-            "ending_soon_days": ENDING_SOON_DAYS,
-        },
-        "alerts": {
-            "unread": unread_alerts,
-        }
-    }
+def get_dashboard_stats(refresh: bool = False, db: Session = Depends(get_db)):
+    """Get dashboard statistics (cached counts kept current by session events - dashboard_stats.py)"""
+    return dashboard_stats.get(db, ENDING_SOON_DAYS, refresh=refresh)
+@app.get("/api/dashboard/stats-cache")
+def get_dashboard_stats_cache():
+    """Hit / recount / increment counters of the dashboard statistics cache"""
+    return dashboard_stats.stats()
+def list_page(query, sort_column, id_column, limit, cursor, skip, exact_total, descending=True):
+    """Keyset page and total of a list endpoint - 400 on a cursor from another listing"""
+    try:
+        page = keyset_page(query, sort_column, id_column, limit, cursor=cursor, descending=descending, skip=skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total, estimated = count_rows(query, exact=exact_total)
+    return page, total, estimated
 @app.get("/api/candidates")
 def get_candidates(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     search: Optional[str] = None,
     status: Optional[str] = None,
     specialty: Optional[str] = None,
@@ -199,7 +192,7 @@ def get_candidates(
     db: Session = Depends(get_db)
 ):
     """Get candidates with optional filters"""
-    query = db.query(Candidate)
+    query = db.query(Candidate).options(*query_options('candidate_list'))
    
     if search:
         search_term = f"%{search}%"
@@ -218,8 +211,10 @@ def get_candidates(
     if state and state != "":
         query = query.filter(Candidate.preferred_states.contains(state))
    
-    total = query.count()
-    candidates = query.offset(skip).limit(limit).all()
+    page, total, estimated = list_page(
+        query, Candidate.created_at, Candidate.candidate_id, limit, cursor, skip, exact_total
+    )
+    candidates = page.rows
    
     formatted_candidates = []
     for c in candidates:
@@ -243,7 +238,10 @@ def get_candidates(
    
     return {
         "candidates": formatted_candidates,
-        "total": total
+        "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
     }
 @app.get("/api/candidates/{candidate_id}")
 def get_candidate(candidate_id: str, db: Session = Depends(get_db)):
@@ -339,6 +337,9 @@ def create_candidate(candidate_data: CandidateCreate, db: Session = Depends(get_
             status_code=500,
             detail=f"Failed to create candidate: {str(e)}"
         )
+    
+    # Recompute this candidate's row of the match score table
+    refresh_match_scores(db, candidate_ids=[new_candidate.candidate_id])
    
     # Return success response
     return {
@@ -368,6 +369,8 @@ def create_candidate(candidate_data: CandidateCreate, db: Session = Depends(get_
 def get_jobs(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     search: Optional[str] = None,      
     status: Optional[str] = None,
     specialty: Optional[str] = None,
@@ -375,7 +378,7 @@ def get_jobs(
     db: Session = Depends(get_db)
 ):
     """Get jobs with optional filters"""
-    query = db.query(Job)
+    query = db.query(Job).options(*query_options('job_list'))
     if search:
         search_term = f"%{search}%"
         query = query.filter(
@@ -395,8 +398,8 @@ def get_jobs(
     if state:
         query = query.filter(Job.state == state)
    
-    total = query.count()
-    jobs = query.offset(skip).limit(limit).all()
+    page, total, estimated = list_page(query, Job.created_at, Job.job_id, limit, cursor, skip, exact_total)
+    jobs = page.rows
    
     formatted_jobs = []
     for j in jobs:
@@ -418,7 +421,10 @@ def get_jobs(
    
     return {
         "jobs": formatted_jobs,
-        "total": total
+        "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
     }
 
 @app.post("/api/jobs")
@@ -497,6 +503,9 @@ def create_job(job_data: JobCreate, db: Session = Depends(get_db)):
             status_code=500,
             detail=f"Failed to create job: {str(e)}"
         )
+    
+    # Recompute this job's column of the match score table
+    refresh_match_scores(db, job_ids=[new_job.job_id])
    
     # Return success response
     return {
@@ -526,7 +535,9 @@ def get_job(job_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Job not found")
    
     # Get all assignments for this job
-    assignments = db.query(Assignment).filter(Assignment.job_id == job_id).all()
+    assignments = db.query(Assignment).options(*query_options('job_detail_assignments')).filter(
+        Assignment.job_id == job_id
+    ).all()
     job_detail = {
         # Basic Info
         "job_id": job.job_id,
@@ -607,17 +618,21 @@ def get_job(job_id: str, db: Session = Depends(get_db)):
 def get_assignments(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     status: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Get assignments with optional filters"""
-    query = db.query(Assignment)
+    query = db.query(Assignment).options(*query_options('assignment_list'))
    
     if status:
         query = query.filter(Assignment.status.ilike(status))
    
-    total = query.count()
-    assignments = query.offset(skip).limit(limit).all()
+    page, total, estimated = list_page(
+        query, Assignment.created_at, Assignment.assignment_id, limit, cursor, skip, exact_total
+    )
+    assignments = page.rows
    
     today = date.today()
    
@@ -650,13 +665,18 @@ def get_assignments(
    
     return {
         "assignments": formatted_assignments,
-        "total": total
+        "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
     }
 @app.get("/api/assignments/ending-soon")
 def get_assignments_ending_soon(
     skip: int = 0,
     limit: int = 100,
     days: Optional[int] = None,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     db: Session = Depends(get_db)
 ):
     """
@@ -668,15 +688,17 @@ def get_assignments_ending_soon(
    
     today = date.today()
     threshold_date = today + timedelta(days=days_threshold)
-    query = db.query(Assignment).filter(
+    query = db.query(Assignment).options(*query_options('assignments_ending_soon')).filter(
         Assignment.status.ilike("active"),
         Assignment.end_date.isnot(None),
         Assignment.end_date > today, 
         Assignment.end_date <= threshold_date
-    ).order_by(Assignment.end_date.asc())
+    )
    
-    total = query.count()
-    assignments = query.offset(skip).limit(limit).all()
+    page, total, estimated = list_page(
+        query, Assignment.end_date, Assignment.assignment_id, limit, cursor, skip, exact_total, descending=False
+    )
+    assignments = page.rows
    
     formatted_assignments = []
     for a in assignments:
@@ -710,6 +732,9 @@ def get_assignments_ending_soon(
     return {
         "assignments": formatted_assignments,
         "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
         "days_threshold": days_threshold,
         "threshold_date": str(threshold_date),
     }
@@ -718,18 +743,19 @@ def get_assignments_ending_soon(
 def get_alerts(
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     is_read: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """Get alerts with optional filters"""
-    query = db.query(Alert)
+    query = db.query(Alert).options(*query_options('alert_list'))
    
     if is_read is not None:
         query = query.filter(Alert.is_read == is_read)
    
-    query = query.order_by(Alert.created_at.desc())
-    total = query.count()
-    alerts = query.offset(skip).limit(limit).all()
+    page, total, estimated = list_page(query, Alert.created_at, Alert.alert_id, limit, cursor, skip, exact_total)
+    alerts = page.rows
    
     formatted_alerts = []
     for a in alerts:
@@ -747,7 +773,10 @@ def get_alerts(
    
     return {
         "alerts": formatted_alerts,
-        "total": total
+        "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
     }
 @app.put("/api/alerts/{alert_id}/read")
 def mark_alert_read(alert_id: str, db: Session = Depends(get_db)):
@@ -767,6 +796,14 @@ def mark_alert_unread(alert_id: str, db: Session = Depends(get_db)):
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
+    # Only one unread new_match alert per candidate/job (uq_alerts_unread_new_match)
+    twin_id = unread_new_match_twin(db, alert)
+    if twin_id:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Candidate already has an unread match alert for this job ({twin_id})"
+        )
+    
     alert.is_read = False
     db.commit()
     
@@ -775,50 +812,48 @@ def mark_alert_unread(alert_id: str, db: Session = Depends(get_db)):
 
 @app.put("/api/alerts/unread-all")
 def mark_all_alerts_unread(db: Session = Depends(get_db)):
-    """Mark ALL alerts as unread (restore to unread state)"""
+    """
+    Mark ALL alerts as unread (restore to unread state)
+    Read new_match alerts whose candidate/job already has an unread one are left read
+    """
     
-    # Update all alerts to unread
-    updated_count = db.query(Alert).update({"is_read": False})
+    updated_count, skipped = reopen_all_alerts(db)
     db.commit()
     
     return {
         "message": f"Successfully marked {updated_count} alerts as unread",
-        "count": updated_count
+        "count": updated_count,
+        "skipped_duplicates": skipped
     }
 
 # Matching Endpoints
 @app.get("/api/matching/ending-assignments")
-def get_ending_assignments_with_matches(days: int = None, db: Session = Depends(get_db)):
+def get_ending_assignments_with_matches(days: int = None, min_score: int = 50, db: Session = Depends(get_db)):
     """
     Get assignments ending within specified days with potential matches
     
     🔧 FIXED: Now filters out assignments with end_date in the past
+    potential_matches is the number of open jobs scoring min_score or more (count-only matching)
     """
     days_threshold = days if days is not None else ENDING_SOON_DAYS
    
     today = date.today()
     threshold_date = today + timedelta(days=days_threshold)
-    assignments = db.query(Assignment).filter(
+    assignments = db.query(Assignment).options(*query_options('ending_assignment_matches')).filter(
         Assignment.status.ilike("active"),
         Assignment.end_date.isnot(None),
         Assignment.end_date > today, 
         Assignment.end_date <= threshold_date
     ).order_by(Assignment.end_date.asc()).all()
+    assignments = [assignment for assignment in assignments if assignment.candidate]
    
-    formatted_ending = []
-    engine = MatchingEngine(db)
+    candidates = {assignment.candidate_id: assignment.candidate for assignment in assignments}
+    match_counts = MatchingEngine(db).count_matches_for_candidates(list(candidates.values()), min_score=min_score)
    
+    formatted_ending = []
     for assignment in assignments:
         days_remaining = (assignment.end_date - today).days
-       
         candidate = assignment.candidate
-        if not candidate:
-            continue
-       
-        try:
-            matches = engine.find_matches_for_candidate(candidate.candidate_id, min_score=50)
-        except Exception as e:
-            matches = []
        
         formatted_item = {
             "assignment": {
@@ -833,7 +868,7 @@ def get_ending_assignments_with_matches(days: int = None, db: Session = Depends(
                 "email": candidate.email,
             },
             "days_remaining": days_remaining,
-            "potential_matches": len(matches),
+            "potential_matches": match_counts[candidate.candidate_id],
         }
         formatted_ending.append(formatted_item)
    
@@ -842,29 +877,70 @@ def get_ending_assignments_with_matches(days: int = None, db: Session = Depends(
         "total": len(formatted_ending),
         "days_threshold": days_threshold,
     }
+def format_candidate_match(match: dict, include_details: bool = False) -> dict:
+    """Shape one find_matches_for_job entry for the API"""
+    candidate = match['candidate']
+    formatted_match = {
+        "candidate_id": candidate.candidate_id,
+        "candidate_name": f"{candidate.first_name} {candidate.last_name}",
+        "full_name": f"{candidate.first_name} {candidate.last_name}",
+        "email": candidate.email,
+        "phone": candidate.phone,
+        "primary_specialty": candidate.primary_specialty,
+        "years_experience": candidate.years_experience,
+        "score": match['score'],
+        "factors": match.get('factors', {}),
+        "rule_notes": match.get('rule_notes', [])
+    }
+    if include_details:
+        formatted_match["match_details"] = match.get('match_details', {})
+    return formatted_match
+def check_availability_mode(availability: Optional[str]):
+    if availability is not None and availability not in AVAILABILITY_MODES:
+        raise HTTPException(status_code=400, detail=f"availability must be one of: {', '.join(AVAILABILITY_MODES)}")
+def check_scoring_profile(profile: Optional[str], db: Session):
+    if profile and profile not in get_scoring_profiles(db):
+        raise HTTPException(status_code=404, detail="Scoring profile not found or inactive")
+def with_session(fn, *args):
+    """Call fn(db, *args) with its own session - matching workers don't share the request's"""
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+async def run_matching(fn, *args):
+    """Run fn(db, *args) on the bounded matching executor, 503 when it is saturated"""
+    try:
+        return await match_executor.run(with_session, fn, *args)
+    except MatchExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Matching is at capacity, please retry shortly",
+                            headers={"Retry-After": "1"})
 @app.get("/api/matching/job/{job_id}")
-def get_matches_for_job(job_id: str, min_score: int = 50, db: Session = Depends(get_db)):
-    """Get candidate matches for a job"""
+async def get_matches_for_job(job_id: str, min_score: int = 50, top_k: Optional[int] = None,
+                              include_details: bool = False, availability: Optional[str] = None,
+                              distance: bool = False, profile: Optional[str] = None, canonical: bool = False):
+    """
+    Get candidate matches for a job (best top_k only if given)
+    match_details are only built with include_details=true - see /api/matching/details
+    availability=exclude|penalize applies candidate availability windows / blackout dates
+    distance=true adds partial location credit by miles to the nearest preferred state
+    profile=<name or id> scores with a stored weight profile (auto = the job's facility / specialty profile)
+    canonical=true matches specialty synonyms (ICU / Intensive Care / CCU RN) - see /api/specialties/canonical
+    Scored on the matching executor (503 when it is saturated)
+    """
+    check_availability_mode(availability)
+    return await run_matching(match_job, job_id, min_score, top_k, include_details, availability, distance,
+                              profile, canonical)
+def match_job(db: Session, job_id: str, min_score: int, top_k: Optional[int], include_details: bool,
+              availability: Optional[str], distance: bool, profile: Optional[str], canonical: bool = False):
+    check_scoring_profile(profile, db)
     try:
-        engine = MatchingEngine(db)
-        matches = engine.find_matches_for_job(job_id, min_score)
+        engine = MatchingEngine(db, use_vectorized=True, use_score_store=True, use_cache=True,
+                                availability_mode=availability, use_distance=distance, scoring_profile=profile,
+                                canonical_specialties=canonical)
+        matches = engine.find_matches_for_job(job_id, min_score, top_k=top_k, include_details=include_details)
        
-        formatted_matches = []
-        for match in matches:
-            candidate = match['candidate']
-            formatted_match = {
-                "candidate_id": candidate.candidate_id,
-                "candidate_name": f"{candidate.first_name} {candidate.last_name}",
-                "full_name": f"{candidate.first_name} {candidate.last_name}",
-                "email": candidate.email,
-                "phone": candidate.phone,
-                "primary_specialty": candidate.primary_specialty,
-                "years_experience": candidate.years_experience,
-                "score": match['score'],
-                "match_details": match.get('match_details', {}),
-                "rule_notes": match.get('rule_notes', [])
-            }
-            formatted_matches.append(formatted_match)
+        formatted_matches = [format_candidate_match(match, include_details) for match in matches]
        
         return {
             "matches": formatted_matches,
@@ -872,12 +948,53 @@ def get_matches_for_job(job_id: str, min_score: int = 50, db: Session = Depends(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/matching/job/{job_id}/stream")
+def stream_matches_for_job(job_id: str, min_score: int = 50, include_details: bool = False,
+                           batch_size: int = 500, db: Session = Depends(get_db)):
+    """
+    Stream candidate matches for a job as NDJSON (one ranked match per line)
+    Same entries as /api/matching/job/{job_id}, plus their rank
+    """
+    if not db.query(Job.job_id).filter(Job.job_id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    def generate():
+        # Own session - the response outlives the request dependency
+        stream_db = SessionLocal()
+        try:
+            engine = MatchingEngine(stream_db)
+            matches = engine.iter_matches_for_job(job_id, min_score, include_details, max(batch_size, 1))
+            for rank, match in enumerate(matches, start=1):
+                line = dict(format_candidate_match(match, include_details), rank=rank)
+                yield json.dumps(line, default=str) + "\n"
+        finally:
+            stream_db.close()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 @app.get("/api/matching/candidate/{candidate_id}")
-def get_matches_for_candidate(candidate_id: str, min_score: int = 50, db: Session = Depends(get_db)):
-    """Get job matches for a candidate"""
+async def get_matches_for_candidate(candidate_id: str, min_score: int = 50, top_k: Optional[int] = None,
+                                    include_details: bool = False, availability: Optional[str] = None,
+                                    distance: bool = False, profile: Optional[str] = None, canonical: bool = False):
+    """
+    Get job matches for a candidate (best top_k only if given)
+    match_details are only built with include_details=true - see /api/matching/details
+    availability=exclude|penalize applies the candidate's availability windows / blackout dates
+    distance=true adds partial location credit by miles to the nearest preferred state
+    profile=<name or id> scores with a stored weight profile (auto = the job's facility / specialty profile)
+    canonical=true matches specialty synonyms (ICU / Intensive Care / CCU RN) - see /api/specialties/canonical
+    Scored on the matching executor (503 when it is saturated)
+    """
+    check_availability_mode(availability)
+    return await run_matching(match_candidate, candidate_id, min_score, top_k, include_details,
+                              availability, distance, profile, canonical)
+def match_candidate(db: Session, candidate_id: str, min_score: int, top_k: Optional[int], include_details: bool,
+                    availability: Optional[str], distance: bool, profile: Optional[str], canonical: bool = False):
+    check_scoring_profile(profile, db)
     try:
-        engine = MatchingEngine(db)
-        matches = engine.find_matches_for_candidate(candidate_id, min_score)
+        engine = MatchingEngine(db, use_vectorized=True, use_score_store=True, use_cache=True,
+                                availability_mode=availability, use_distance=distance, scoring_profile=profile,
+                                canonical_specialties=canonical)
+        matches = engine.find_matches_for_candidate(candidate_id, min_score, top_k=top_k, include_details=include_details)
        
         formatted_matches = []
         for match in matches:
@@ -892,9 +1009,11 @@ def get_matches_for_candidate(candidate_id: str, min_score: int = 50, db: Sessio
                 "start_date": str(job.start_date) if job.start_date else None,
                 "contract_weeks": job.contract_weeks,
                 "score": match['score'],
-                "match_details": match.get('match_details', {}),
+                "factors": match.get('factors', {}),
                 "rule_notes": match.get('rule_notes', [])
             }
+            if include_details:
+                formatted_match["match_details"] = match.get('match_details', {})
             formatted_matches.append(formatted_match)
        
         return {
@@ -903,25 +1022,225 @@ def get_matches_for_candidate(candidate_id: str, min_score: int = 50, db: Sessio
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/matching/details/{candidate_id}/{job_id}")
+def get_match_details(candidate_id: str, job_id: str, profile: Optional[str] = None, canonical: bool = False,
+                      db: Session = Depends(get_db)):
+    """Get the full match breakdown (reasons, concerns, rule notes) for one candidate/job pair"""
+    check_scoring_profile(profile, db)
+    engine = MatchingEngine(db, scoring_profile=profile, canonical_specialties=canonical)
+    result = engine.explain_match(candidate_id, job_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Candidate or job not found")
+    
+    return {
+        "candidate_id": candidate_id,
+        "job_id": job_id,
+        "score": result['score'],
+        "disqualified": result['disqualified'],
+        "factors": result['factors'],
+        "match_details": result['match_details'],
+        "rule_notes": result['rule_notes']
+    }
+@app.get("/api/matching/cache-stats")
+def get_match_cache_stats():
+    """Hit/miss counters and size of the in-process match result cache"""
+    return match_cache.stats()
+@app.get("/api/matching/executor-stats")
+def get_match_executor_stats():
+    """Running / queued / rejected counts and queue wait of the matching executor"""
+    return match_executor.stats()
+@app.get("/api/matching/fanout-stats")
+def get_new_job_fanout_stats():
+    """Batches, jobs and alerts handled by the new-job match fan-out"""
+    return new_job_fanout.stats()
+# Match Jobs Endpoints
+class MatchJobCreate(BaseModel):
+    kind: str
+    job_id: Optional[str] = None
+    candidate_id: Optional[str] = None
+    min_score: Optional[int] = None
+    availability: Optional[str] = None
+    distance: bool = False
+    profile: Optional[str] = None
+    canonical: bool = False
+def format_match_job(run: MatchJob) -> dict:
+    return {
+        "match_job_id": run.match_job_id,
+        "kind": run.kind,
+        "params": run.params,
+        "status": run.status,
+        "cancel_requested": run.cancel_requested,
+        "progress_done": run.progress_done,
+        "progress_total": run.progress_total,
+        "progress": round(run.progress_done / run.progress_total, 4) if run.progress_total else None,
+        "result_count": run.result_count,
+        "summary": run.summary,
+        "error": run.error,
+        "created_at": run.created_at,
+        "started_at": run.started_at,
+        "completed_at": run.completed_at
+    }
+def get_match_job_or_404(match_job_id: str, db: Session) -> MatchJob:
+    run = db.query(MatchJob).filter(MatchJob.match_job_id == match_job_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Match job not found")
+    return run
+@app.post("/api/match-jobs")
+def create_match_job(job_data: MatchJobCreate, db: Session = Depends(get_db)):
+    """
+    Queue a background matching run - poll GET /api/match-jobs/{id}, then page its results
+    kind: job_matches (job_id), candidate_matches (candidate_id) or batch_match (all active candidates)
+    """
+    if job_data.kind not in MATCH_JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(MATCH_JOB_KINDS)}")
+    params = {}
+    if job_data.min_score is not None:
+        params["min_score"] = job_data.min_score
+    if job_data.kind == "job_matches":
+        if not job_data.job_id or not db.query(Job.job_id).filter(Job.job_id == job_data.job_id).first():
+            raise HTTPException(status_code=404, detail="Job not found")
+        params["job_id"] = job_data.job_id
+    elif job_data.kind == "candidate_matches":
+        if not job_data.candidate_id or not db.query(Candidate.candidate_id).filter(
+            Candidate.candidate_id == job_data.candidate_id
+        ).first():
+            raise HTTPException(status_code=404, detail="Candidate not found")
+        params["candidate_id"] = job_data.candidate_id
+    if job_data.kind != "batch_match":
+        check_availability_mode(job_data.availability)
+        check_scoring_profile(job_data.profile, db)
+        params.update(availability_mode=job_data.availability, use_distance=job_data.distance,
+                      scoring_profile=job_data.profile, canonical_specialties=job_data.canonical)
+    
+    return format_match_job(submit_match_job(db, job_data.kind, params))
+@app.get("/api/match-jobs")
+def get_match_jobs(status: Optional[str] = None, skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
+    """List match jobs, newest first"""
+    query = db.query(MatchJob)
+    if status:
+        query = query.filter(MatchJob.status == status)
+    runs = query.order_by(MatchJob.created_at.desc()).offset(skip).limit(limit).all()
+    return {"match_jobs": [format_match_job(run) for run in runs]}
+@app.get("/api/match-jobs/{match_job_id}")
+def get_match_job(match_job_id: str, db: Session = Depends(get_db)):
+    """Status and progress of a match job"""
+    return format_match_job(get_match_job_or_404(match_job_id, db))
+@app.get("/api/match-jobs/{match_job_id}/results")
+def get_match_job_results(match_job_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """Matches found so far, best score first (available while the job is still running)"""
+    run = get_match_job_or_404(match_job_id, db)
+    rows = db.query(MatchJobResult).filter(
+        MatchJobResult.match_job_id == match_job_id
+    ).order_by(
+        MatchJobResult.score.desc(), MatchJobResult.result_id
+    ).offset(skip).limit(min(limit, 1000)).all()
+    return {
+        "match_job_id": match_job_id,
+        "status": run.status,
+        "total": run.result_count,
+        "skip": skip,
+        "results": [
+            {
+                "candidate_id": row.candidate_id,
+                "job_id": row.job_id,
+                "score": row.score,
+                "factors": row.factors,
+                "rule_notes": row.rule_notes
+            }
+            for row in rows
+        ]
+    }
+@app.post("/api/match-jobs/{match_job_id}/cancel")
+def cancel_match_job_endpoint(match_job_id: str, db: Session = Depends(get_db)):
+    """Cancel a queued match job, or stop a running one after its current chunk"""
+    return format_match_job(cancel_match_job(db, get_match_job_or_404(match_job_id, db)))
+# Scoring Profiles Endpoints
+class ScoringProfileCreate(BaseModel):
+    name: str
+    weights: dict
+    description: Optional[str] = None
+    specialty: Optional[str] = None
+    facility: Optional[str] = None
+    is_active: bool = True
+def format_scoring_profile(profile: ScoringProfile) -> dict:
+    return {
+        "profile_id": profile.profile_id,
+        "name": profile.name,
+        "description": profile.description,
+        "specialty": profile.specialty,
+        "facility": profile.facility,
+        "weights": profile.weights,
+        "is_active": profile.is_active,
+        "updated_at": profile.updated_at
+    }
+def apply_scoring_profile_data(profile: ScoringProfile, profile_data: ScoringProfileCreate):
+    """Validate the request and copy it onto a profile row"""
+    if profile_data.name.strip() == AUTO_PROFILE:
+        raise HTTPException(status_code=400, detail=f"'{AUTO_PROFILE}' is a reserved profile name")
+    try:
+        profile.weights = validate_weights(profile_data.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    profile.name = profile_data.name.strip()
+    profile.description = profile_data.description
+    profile.specialty = profile_data.specialty
+    profile.facility = profile_data.facility
+    profile.is_active = profile_data.is_active
+@app.get("/api/scoring-profiles")
+def get_scoring_profiles_list(db: Session = Depends(get_db)):
+    """List scoring weight profiles (usable as ?profile= on the matching endpoints)"""
+    profiles = db.query(ScoringProfile).order_by(ScoringProfile.name).all()
+    return {"profiles": [format_scoring_profile(profile) for profile in profiles], "total": len(profiles)}
+@app.post("/api/scoring-profiles")
+def create_scoring_profile(profile_data: ScoringProfileCreate, db: Session = Depends(get_db)):
+    """Create a scoring weight profile - weights are max points per factor, missing factors keep their default"""
+    if db.query(ScoringProfile).filter(ScoringProfile.name == profile_data.name.strip()).first():
+        raise HTTPException(status_code=400, detail="Scoring profile name already exists")
+    profile = ScoringProfile()
+    apply_scoring_profile_data(profile, profile_data)
+    db.add(profile)
+    db.commit()
+    db.refresh(profile)
+    return format_scoring_profile(profile)
+@app.put("/api/scoring-profiles/{profile_id}")
+def update_scoring_profile(profile_id: str, profile_data: ScoringProfileCreate, db: Session = Depends(get_db)):
+    """Replace a scoring profile's weights / scope - used from the next match request on"""
+    profile = db.query(ScoringProfile).filter(ScoringProfile.profile_id == profile_id).first()
+    if not profile:
+        raise HTTPException(status_code=404, detail="Scoring profile not found")
+    duplicate = db.query(ScoringProfile).filter(
+        ScoringProfile.name == profile_data.name.strip(), ScoringProfile.profile_id != profile_id
+    ).first()
+    if duplicate:
+        raise HTTPException(status_code=400, detail="Scoring profile name already exists")
+    apply_scoring_profile_data(profile, profile_data)
+    profile.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(profile)
+    return format_scoring_profile(profile)
 # Documents Endpoints 
 @app.get("/api/documents")
 def get_documents(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     candidate_id: Optional[str] = None,
     status: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Get documents with optional filters"""
-    query = db.query(Document)
+    query = db.query(Document).options(*query_options('document_list'))
    
     if candidate_id:
         query = query.filter(Document.candidate_id == candidate_id)
     if status:
         query = query.filter(Document.status == status)
    
-    total = query.count()
-    documents = query.offset(skip).limit(limit).all()
+    page, total, estimated = list_page(
+        query, Document.uploaded_at, Document.document_id, limit, cursor, skip, exact_total
+    )
+    documents = page.rows
    
     formatted_docs = []
     for d in documents:
@@ -939,19 +1258,24 @@ def get_documents(
    
     return {
         "documents": formatted_docs,
-        "total": total
+        "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
     }
 # Expenses Endpoints
 @app.get("/api/expenses")
 def get_expenses(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     candidate_id: Optional[str] = None,
     status: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Get expenses with optional filters"""
-    query = db.query(Expense)
+    query = db.query(Expense).options(*query_options('expense_list'))
    
     if candidate_id:
         query = query.filter(Expense.candidate_id == candidate_id)
@@ -959,8 +1283,10 @@ def get_expenses(
     if status:
         query = query.filter(Expense.status.ilike(status))
    
-    total = query.count()
-    expenses = query.offset(skip).limit(limit).all()
+    page, total, estimated = list_page(
+        query, Expense.submitted_at, Expense.expense_id, limit, cursor, skip, exact_total
+    )
+    expenses = page.rows
    
     formatted_expenses = []
     for e in expenses:
@@ -979,7 +1305,10 @@ def get_expenses(
    
     return {
         "expenses": formatted_expenses,
-        "total": total
+        "total": total,
+        "total_is_estimate": estimated,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
     }
 # Import Endpoint
 @app.post("/api/import/candidates")
@@ -1158,6 +1487,41 @@ def get_job_specialties(db: Session = Depends(get_db)):
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+class SpecialtySynonymUpdate(BaseModel):
+    synonym: str
+    specialty: str
+@app.get("/api/specialties/canonical")
+def get_canonical_specialties(db: Session = Depends(get_db)):
+    """Canonical specialties with their synonyms and how many candidates / jobs map to each"""
+    candidate_counts = dict(db.query(Candidate.specialty_id, func.count(Candidate.candidate_id))
+                            .group_by(Candidate.specialty_id).all())
+    job_counts = dict(db.query(Job.specialty_id, func.count(Job.job_id)).group_by(Job.specialty_id).all())
+    synonyms = {}
+    for row in db.query(SpecialtySynonym).order_by(SpecialtySynonym.synonym).all():
+        synonyms.setdefault(row.specialty_id, []).append({"synonym": row.synonym, "source": row.source})
+    specialties = [
+        {
+            "specialty_id": specialty.specialty_id,
+            "name": specialty.name,
+            "synonyms": synonyms.get(specialty.specialty_id, []),
+            "candidates": candidate_counts.get(specialty.specialty_id, 0),
+            "jobs": job_counts.get(specialty.specialty_id, 0)
+        }
+        for specialty in db.query(Specialty).order_by(Specialty.name).all()
+    ]
+    return {"specialties": specialties, "total": len(specialties)}
+@app.post("/api/specialties/rebuild")
+def rebuild_canonical_specialties(db: Session = Depends(get_db)):
+    """Seed built-in synonyms, register every specialty value in use and re-stamp candidate / job specialty ids"""
+    return rebuild_specialty_map(db)
+@app.put("/api/specialties/synonyms")
+def update_specialty_synonym(synonym_data: SpecialtySynonymUpdate, db: Session = Depends(get_db)):
+    """Map a specialty spelling to a canonical specialty (created if new)"""
+    try:
+        row = set_specialty_synonym(db, synonym_data.synonym, synonym_data.specialty)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"synonym": row.synonym, "specialty_id": row.specialty_id, "source": row.source}
 class SendEmailRequest(BaseModel):
     """Request model for sending email to candidate"""
     to_email: EmailStr
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job, MatchingRule, ScoringProfile
+
+
+# Cached entries are plain (id, score, factors, rule_notes) tuples - never ORM objects
+MATCH_CACHE_MAX_ROWS = int(os.getenv("MATCH_CACHE_MAX_ROWS", "200000"))
+MATCH_CACHE_TTL = float(os.getenv("MATCH_CACHE_TTL", "300"))
+
+
+class MatchCache:
+    """
+    LRU + TTL cache for find_matches_for_job / find_matches_for_candidate results
+
+    Memory is bounded by the total number of cached match rows (an empty
+    result counts as one row). The TTL bounds staleness from writes made by
+    other processes, which the local invalidation events can't see.
+    """
+
+    def __init__(self, max_rows: int = MATCH_CACHE_MAX_ROWS, ttl: float = MATCH_CACHE_TTL):
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[List[tuple]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, rows: List[tuple]):
+        weight = len(rows) + 1
+        if weight > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, rows)
+            self._rows += weight
+            while self._rows > self.max_rows:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'rows': self._rows,
+                'max_rows': self.max_rows,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'data_version': _data_version,
+            }
+
+    def _remove(self, key: Hashable):
+        expires_at, rows = self._entries.pop(key)
+        self._rows -= len(rows) + 1
+
+
+match_cache = MatchCache()
+
+
+# ==================== INVALIDATION ====================
+
+_data_version = 0
+_version_lock = threading.Lock()
+
+_TRACKED_MODELS = (Candidate, Job, MatchingRule, ScoringProfile)
+
+# session.info key: the current transaction wrote a candidate / job / rule / scoring profile
+_TOUCHED_KEY = "match_cache_touched"
+
+
+def data_version() -> int:
+    """Bumped on every committed candidate / job / rule / scoring profile write seen by this process"""
+    return _data_version
+
+
+def _bump_data_version():
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+
+
+# Bumped on commit, not flush: a reader between another session's flush and
+# commit would otherwise cache the old rows under the new version
+
+def _collect_writes(session, flush_context):
+    if any(isinstance(obj, _TRACKED_MODELS) for objs in (session.new, session.dirty, session.deleted) for obj in objs):
+        session.info[_TOUCHED_KEY] = True
+
+
+def _collect_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _TRACKED_MODELS):
+        orm_execute_state.session.info[_TOUCHED_KEY] = True
+
+
+def _committed(session):
+    if session.info.pop(_TOUCHED_KEY, False):
+        _bump_data_version()
+
+
+def _rolled_back(session):
+    session.info.pop(_TOUCHED_KEY, None)
+
+
+event.listen(Session, "after_flush", _collect_writes)
+event.listen(Session, "do_orm_execute", _collect_bulk_writes)
+event.listen(Session, "after_commit", _committed)
+event.listen(Session, "after_rollback", _rolled_back)
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+# Matching requests scored at once, and how many more may wait before new ones get a 503
+MATCH_WORKERS = int(os.getenv("MATCH_WORKERS", "4"))
+MATCH_QUEUE_LIMIT = int(os.getenv("MATCH_QUEUE_LIMIT", "16"))
+
+
+class MatchExecutorSaturated(Exception):
+    """Every worker is busy and the wait queue is full"""
+
+
+class MatchExecutor:
+    """
+    Bounded thread pool for CPU-heavy matching requests
+
+    Keeps matching off FastAPI's shared threadpool, so a burst of match
+    lookups can't stall other endpoints. At most workers + queue_limit
+    calls are admitted; anything beyond that is rejected immediately
+    instead of piling up behind the running ones.
+    """
+
+    def __init__(self, workers: int = MATCH_WORKERS, queue_limit: int = MATCH_QUEUE_LIMIT):
+        self.workers = max(workers, 1)
+        self.queue_limit = max(queue_limit, 0)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="matching")
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue fn(*args), raising MatchExecutorSaturated when no slot is free"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise MatchExecutorSaturated()
+        with self._lock:
+            self.admitted += 1
+        try:
+            future = self._executor.submit(self._call, fn, args, time.monotonic())
+        except Exception:
+            self._slots.release()
+            raise
+        # Also runs for a future cancelled while queued (the awaiting request went away), which _call never sees
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args):
+        """submit() for async handlers - the event loop isn't blocked while fn runs"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _call(self, fn: Callable, args, queued_at: float):
+        started = time.monotonic()
+        with self._lock:
+            self.running += 1
+            self._wait_total += started - queued_at
+            self._wait_max = max(self._wait_max, started - queued_at)
+        ok = False
+        try:
+            result = fn(*args)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.running -= 1
+                self._run_total += time.monotonic() - started
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def _release(self, future: Future):
+        if future.cancelled():
+            with self._lock:
+                self.cancelled += 1
+        self._slots.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            started = finished + self.running
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'running': self.running,
+                'queued': self.admitted - started - self.cancelled,
+                'admitted': self.admitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'rejected': self.rejected,
+                'avg_queue_wait_ms': round(self._wait_total / started * 1000, 2) if started else 0.0,
+                'max_queue_wait_ms': round(self._wait_max * 1000, 2),
+                'avg_run_ms': round(self._run_total / finished * 1000, 2) if finished else 0.0,
+            }
+
+
+match_executor = MatchExecutor()
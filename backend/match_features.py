@@ -0,0 +1,155 @@
+import json
+from datetime import datetime, date
+from typing import Dict, Iterable, Optional
+
+
+# ==================== REFERENCE DATA ====================
+
+# Bit order of Candidate.state_mask / Job.state_mask - never reorder, append only
+US_STATES = (
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+    'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+    'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+    'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+)
+STATE_BITS = {state: bit for bit, state in enumerate(US_STATES)}
+
+STATE_REGIONS = {
+    'West Coast': ['CA', 'OR', 'WA'],
+    'Mountain': ['CO', 'UT', 'AZ', 'NM', 'NV', 'ID', 'MT', 'WY'],
+    'Midwest': ['IL', 'IN', 'MI', 'OH', 'WI', 'MN', 'IA', 'MO', 'ND', 'SD', 'NE', 'KS'],
+    'Northeast': ['NY', 'PA', 'NJ', 'CT', 'MA', 'VT', 'NH', 'ME', 'RI'],
+    'Southeast': ['FL', 'GA', 'NC', 'SC', 'VA', 'TN', 'AL', 'MS', 'LA', 'AR', 'KY', 'WV'],
+    'Southwest': ['TX', 'OK'],
+}
+
+# Constant-time state -> region lookup ('Other' when unlisted)
+STATE_TO_REGION = {state: region for region, states in STATE_REGIONS.items() for state in states}
+
+# Bit order of Candidate.region_mask - never reorder, append only
+REGION_NAMES = tuple(STATE_REGIONS) + ('Other',)
+REGION_BITS = {region: bit for bit, region in enumerate(REGION_NAMES)}
+
+# Job.shift_code values (shift types offered by the job form)
+SHIFT_TYPES = ('day', 'night', 'evening', 'rotating')
+
+
+class IrregularValue(Exception):
+    """Raised when a column value can't be indexed with the same `in` semantics as the per-pair scorer"""
+
+
+# ==================== PARSING ====================
+
+def parse_members(value) -> set:
+    """
+    Parse a list / JSON-string column exactly like the per-pair scorer does
+    and return its members as a set
+    """
+    parsed = value if isinstance(value, list) else json.loads(value)
+    if isinstance(parsed, dict):
+        parsed = list(parsed.keys())
+    if not isinstance(parsed, list):
+        # `in` on a string means substring, on a number it raises - leave to the per-pair scorer
+        raise IrregularValue(type(parsed).__name__)
+    members = set()
+    for item in parsed:
+        try:
+            members.add(item)
+        except TypeError:
+            # Unhashable entries can never equal the string being looked up
+            continue
+    return members
+
+
+def day_ordinal(value) -> int:
+    """Convert a date column (or YYYY-MM-DD string) to a day ordinal"""
+    if isinstance(value, date):
+        return value.toordinal()
+    return datetime.strptime(str(value), '%Y-%m-%d').date().toordinal()
+
+
+def encode_mask(members: Iterable, bits: Dict[str, int]) -> Optional[int]:
+    """Bitmask of members, None when a member has no bit (the raw column stays authoritative)"""
+    mask = 0
+    for member in members:
+        bit = bits.get(member)
+        if bit is None:
+            return None
+        mask |= 1 << bit
+    return mask
+
+
+def decode_mask(mask: int, names) -> list:
+    return [name for bit, name in enumerate(names) if mask >> bit & 1]
+
+
+def _mask_of(value, bits: Dict[str, int]) -> Optional[int]:
+    if not value:
+        return 0
+    try:
+        return encode_mask(parse_members(value), bits)
+    except Exception:
+        return None
+
+
+def _ordinal_of(value) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return day_ordinal(value)
+    except Exception:
+        return None
+
+
+def _lower(value) -> Optional[str]:
+    return value.lower() if isinstance(value, str) and value else None
+
+
+# ==================== FEATURES ====================
+
+def candidate_features(candidate) -> Dict:
+    """Normalized matching features derived from a candidate's raw columns"""
+    return {
+        'specialty_key': _lower(candidate.primary_specialty),
+        'state_mask': _mask_of(candidate.preferred_states, STATE_BITS),
+        'region_mask': _mask_of(candidate.preferred_regions, REGION_BITS),
+        'availability_day': _ordinal_of(candidate.availability_date),
+    }
+
+
+def job_features(job) -> Dict:
+    """Normalized matching features derived from a job's raw columns"""
+    shift = _lower(job.shift_type)
+    return {
+        'specialty_key': _lower(job.specialty_required),
+        'state_mask': (1 << STATE_BITS[job.state]) if isinstance(job.state, str) and job.state in STATE_BITS else None,
+        'start_day': _ordinal_of(job.start_date),
+        'shift_code': SHIFT_TYPES.index(shift) if shift in SHIFT_TYPES else None,
+    }
+
+
+def apply_features(target, features: Dict):
+    for key, value in features.items():
+        if getattr(target, key) != value:
+            setattr(target, key, value)
+
+
+def backfill_match_features(db, chunk_size: int = 1000) -> Dict:
+    """Recompute feature columns for every candidate and job (after adding the columns)"""
+    from models import Candidate, Job
+
+    counts = {}
+    for model, id_column, derive in ((Candidate, Candidate.candidate_id, candidate_features),
+                                     (Job, Job.job_id, job_features)):
+        ids = [row[0] for row in db.query(id_column).order_by(id_column).all()]
+        updated = 0
+        for start in range(0, len(ids), chunk_size):
+            for row in db.query(model).filter(id_column.in_(ids[start:start + chunk_size])).all():
+                features = derive(row)
+                if any(getattr(row, key) != value for key, value in features.items()):
+                    apply_features(row, features)
+                    updated += 1
+            db.commit()
+        counts[model.__tablename__] = updated
+    return counts
@@ -0,0 +1,314 @@
+import argparse
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job, MatchJob, MatchJobResult
+from vectorized_scoring import CANDIDATE_POOL_COLUMNS, FACTORS, CandidatePool, load_job_pool
+from matching_rules import get_compiled_rules
+from batch_matching import write_new_match_alerts
+
+
+MATCH_JOB_WORKERS = int(os.getenv("MATCH_JOB_WORKERS", "1"))
+MATCH_JOB_POLL_SECONDS = float(os.getenv("MATCH_JOB_POLL_SECONDS", "2"))
+# A running job without a heartbeat for this long is considered orphaned and resumed
+MATCH_JOB_STALE_SECONDS = int(os.getenv("MATCH_JOB_STALE_SECONDS", "300"))
+
+# Candidates per checkpoint
+JOB_MATCHES_CHUNK = 5000
+BATCH_MATCH_CHUNK = 500
+
+MATCH_JOB_KINDS = ('job_matches', 'candidate_matches', 'batch_match')
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+# MatchingEngine options a job_matches / candidate_matches run may set
+ENGINE_OPTIONS = ('availability_mode', 'use_distance', 'scoring_profile', 'canonical_specialties')
+
+
+class MatchJobLost(Exception):
+    """Another worker took the run over (ours missed its heartbeat)"""
+
+
+# ==================== QUEUE ====================
+
+def submit_match_job(db: Session, kind: str, params: Dict) -> MatchJob:
+    """Queue a match job - raises ValueError for an unknown kind"""
+    if kind not in MATCH_JOB_KINDS:
+        raise ValueError(f"kind must be one of: {', '.join(MATCH_JOB_KINDS)}")
+    run = MatchJob(kind=kind, params=params, status="queued", created_at=datetime.utcnow())
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def cancel_match_job(db: Session, run: MatchJob) -> MatchJob:
+    """Cancel a queued job now, or ask the worker of a running one to stop at its next chunk"""
+    if run.status == "queued":
+        run.status = "cancelled"
+        run.completed_at = datetime.utcnow()
+    elif run.status == "running":
+        run.cancel_requested = True
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def claim_next(db: Session, worker_id: str) -> Optional[MatchJob]:
+    """
+    Take the oldest queued (or orphaned running) job
+    The claim is a conditional UPDATE, so two workers never get the same run
+    """
+    stale = datetime.utcnow() - timedelta(seconds=MATCH_JOB_STALE_SECONDS)
+    candidates = db.query(MatchJob.match_job_id, MatchJob.status, MatchJob.heartbeat_at).filter(
+        or_(
+            MatchJob.status == "queued",
+            and_(MatchJob.status == "running", MatchJob.heartbeat_at < stale)
+        )
+    ).order_by(MatchJob.created_at).limit(10).all()
+
+    for match_job_id, status, heartbeat_at in candidates:
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(MatchJob)
+            .where(MatchJob.match_job_id == match_job_id, MatchJob.status == status,
+                   MatchJob.heartbeat_at.is_(None) if heartbeat_at is None else MatchJob.heartbeat_at == heartbeat_at)
+            .values(status="running", worker_id=worker_id, heartbeat_at=now,
+                    started_at=func.coalesce(MatchJob.started_at, now))
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.query(MatchJob).filter(MatchJob.match_job_id == match_job_id).first()
+    return None
+
+
+# ==================== RUNNER ====================
+
+class MatchJobRunner:
+    """
+    Works one claimed MatchJob to completion (or cancellation)
+
+    Every chunk's results are committed together with the run's cursor (the
+    last candidate_id done), so a run whose worker died is resumed where it
+    stopped, and a cancel request takes effect at the next chunk boundary.
+    """
+
+    def __init__(self, db: Session, run: MatchJob, worker_id: str):
+        from matching_engine import MatchingEngine
+
+        self.db = db
+        self.run_id = run.match_job_id
+        self.kind = run.kind
+        self.params = dict(run.params or {})
+        self.worker_id = worker_id
+        self.cursor = run.cursor
+        options = {key: self.params[key] for key in ENGINE_OPTIONS if self.params.get(key)}
+        self.engine = MatchingEngine(db, use_vectorized=True, **options)
+        self.min_score = int(self.params.get('min_score', 70 if self.kind == 'batch_match' else 50))
+
+    def run(self):
+        resumed = " (resumed)" if self.cursor else ""
+        print(f"⚙️  Match job {self.run_id}: {self.kind}{resumed}")
+        try:
+            finished = getattr(self, f"_run_{self.kind}")()
+            self._finish("completed" if finished else "cancelled")
+        except MatchJobLost:
+            self.db.rollback()
+            print(f"⚠️  Match job {self.run_id} was taken over by another worker")
+        except Exception as e:
+            self.db.rollback()
+            traceback.print_exc()
+            self._finish("failed", error=str(e))
+
+    # ---------- kinds ----------
+
+    def _run_job_matches(self) -> bool:
+        """One job against every active candidate, in candidate_id chunks"""
+        job = self.db.query(Job).filter(Job.job_id == self.params.get('job_id')).first()
+        if not job:
+            raise ValueError("Job not found")
+        self._set_total(self._active_candidates().count())
+        rules = get_compiled_rules(self.db)
+
+        while True:
+            rows = self._next_candidates(JOB_MATCHES_CHUNK)
+            if not rows:
+                return True
+            pool = CandidatePool(rows)
+            factors, outcome, scores = self.engine.score_job_against_pool(job, pool, rules)
+            results = [
+                self._result(pool.ids[i], job.job_id, scores[i], factors[:, i], outcome.notes(i))
+                for i in np.flatnonzero(~outcome.disqualified & (scores >= self.min_score))
+            ]
+            if not self._checkpoint(rows[-1].candidate_id, len(rows), results):
+                return False
+
+    def _run_candidate_matches(self) -> bool:
+        """One candidate against every open job - a single chunk"""
+        candidate = self.db.query(Candidate).filter(Candidate.candidate_id == self.params.get('candidate_id')).first()
+        if not candidate:
+            raise ValueError("Candidate not found")
+        self._set_total(1)
+        if self.cursor:
+            return True
+
+        pool = load_job_pool(self.db, self.engine._get_state_region)
+        factors, outcome, scores = self.engine.score_candidate_against_pool(candidate, pool)
+        results = [
+            self._result(candidate.candidate_id, pool.ids[i], scores[i], factors[:, i], outcome.notes(i))
+            for i in np.flatnonzero(~outcome.disqualified & (scores >= self.min_score))
+        ]
+        return self._checkpoint(candidate.candidate_id, 1, results)
+
+    def _run_batch_match(self) -> bool:
+        """batch_match_all_candidates in candidate_id chunks - results are each candidate's top 3"""
+        self._set_total(self._active_candidates().count())
+        rules = get_compiled_rules(self.db)
+        pool = load_job_pool(self.db, self.engine._get_state_region)
+
+        while True:
+            rows = self._next_candidates(BATCH_MATCH_CHUNK)
+            if not rows:
+                return True
+            results, pending, total = [], [], 0
+            for candidate in rows:
+                factors, outcome, scores = self.engine.score_candidate_against_pool(candidate, pool, rules)
+                total += int(np.count_nonzero(~outcome.disqualified & (scores >= self.min_score)))
+                for i in self.engine._rank_qualifying(outcome, scores, self.min_score, 3):
+                    results.append(self._result(candidate.candidate_id, pool.ids[i], scores[i], factors[:, i],
+                                                outcome.notes(i)))
+                    pending.append((candidate.candidate_id, pool.ids[i], int(scores[i])))
+            # Alerts commit together with the chunk (existing unread pairs are skipped on a re-run)
+            if not self._checkpoint(rows[-1].candidate_id, len(rows), results,
+                                    total_matches=total, alerts=lambda: write_new_match_alerts(self.engine, pending)):
+                return False
+
+    # ---------- helpers ----------
+
+    def _active_candidates(self):
+        return self.db.query(Candidate.candidate_id).filter(Candidate.candidate_status.ilike("active"))
+
+    def _next_candidates(self, limit: int) -> List:
+        query = self.db.query(*CANDIDATE_POOL_COLUMNS).filter(Candidate.candidate_status.ilike("active"))
+        if self.cursor:
+            query = query.filter(Candidate.candidate_id > self.cursor)
+        return query.order_by(Candidate.candidate_id).limit(limit).all()
+
+    def _result(self, candidate_id: str, job_id: str, score, factors, notes: List[str]) -> Dict:
+        return {
+            'match_job_id': self.run_id,
+            'candidate_id': candidate_id,
+            'job_id': job_id,
+            'score': int(score),
+            'factors': dict(zip(FACTORS, factors.tolist())),
+            'rule_notes': notes,
+        }
+
+    def _set_total(self, total: int):
+        self.db.execute(update(MatchJob).where(MatchJob.match_job_id == self.run_id).values(progress_total=total))
+        self.db.commit()
+
+    def _checkpoint(self, cursor: str, done: int, results: List[Dict], total_matches: Optional[int] = None,
+                    alerts=None) -> bool:
+        """
+        Commit a chunk's results with the new cursor - only while this worker still owns the run
+        Returns False when a cancel was requested
+        """
+        for start in range(0, len(results), 1000):
+            self.db.execute(insert(MatchJobResult), results[start:start + 1000])
+        owned = self.db.execute(
+            update(MatchJob)
+            .where(MatchJob.match_job_id == self.run_id, MatchJob.worker_id == self.worker_id,
+                   MatchJob.status == "running")
+            .values(cursor=cursor, progress_done=MatchJob.progress_done + done,
+                    result_count=MatchJob.result_count + len(results), heartbeat_at=datetime.utcnow())
+        ).rowcount
+        if not owned:
+            raise MatchJobLost()
+
+        run = self.db.query(MatchJob).filter(MatchJob.match_job_id == self.run_id).first()
+        summary = dict(run.summary or {})
+        summary['total_matches'] = summary.get('total_matches', 0) + (len(results) if total_matches is None else total_matches)
+        if alerts is not None:
+            # write_new_match_alerts commits the whole chunk
+            summary['alerts_created'] = summary.get('alerts_created', 0) + alerts()
+        run.summary = summary
+        self.db.commit()
+
+        self.cursor = cursor
+        self.db.refresh(run)
+        return not run.cancel_requested
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        self.db.execute(
+            update(MatchJob)
+            .where(MatchJob.match_job_id == self.run_id, MatchJob.worker_id == self.worker_id)
+            .values(status=status, error=error, completed_at=datetime.utcnow(), heartbeat_at=datetime.utcnow())
+        )
+        self.db.commit()
+        print(f"{'✅' if status == 'completed' else '⚠️ '} Match job {self.run_id}: {status}")
+
+
+# ==================== WORKERS ====================
+
+def run_worker(poll_interval: float = MATCH_JOB_POLL_SECONDS, once: bool = False):
+    """
+    Claim and run match jobs until stopped (once=True: until the queue is empty)
+    Started by the API (MATCH_JOB_WORKERS) or on its own: python match_jobs.py --workers 2
+    """
+    from database import SessionLocal
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"👷 Match job worker {worker_id} started")
+    while True:
+        db = SessionLocal()
+        run = None
+        try:
+            run = claim_next(db, worker_id)
+            if run is not None:
+                MatchJobRunner(db, run, worker_id).run()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Match job worker error: {str(e)}")
+            traceback.print_exc()
+        finally:
+            db.close()
+        if run is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+
+
+def start_match_job_workers(count: int = MATCH_JOB_WORKERS) -> List:
+    """Start worker processes (spawned, so each opens its own database connections)"""
+    import multiprocessing
+
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for _ in range(max(count, 0)):
+        process = context.Process(target=run_worker, name="match-job-worker", daemon=True)
+        process.start()
+        processes.append(process)
+    if processes:
+        print(f"✅ Started {len(processes)} match job worker(s)")
+    return processes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background match job workers")
+    parser.add_argument("--workers", type=int, default=MATCH_JOB_WORKERS)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty (single worker)")
+    args = parser.parse_args()
+
+    if args.once or args.workers <= 1:
+        run_worker(once=args.once)
+    else:
+        for process in start_match_job_workers(args.workers):
+            process.join()
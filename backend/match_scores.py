@@ -0,0 +1,274 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Iterable
+
+import numpy as np
+from sqlalchemy import insert, update, delete
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job, MatchScore, MatchScoreBuild
+from vectorized_scoring import load_candidate_pool, load_job_pool
+from matching_rules import get_compiled_rules, rule_set_version
+
+
+# Pairs scoring below the floor are not materialized; lower min_score requests are computed live
+MATCH_SCORE_FLOOR = int(os.getenv("MATCH_SCORE_FLOOR", "50"))
+
+WRITE_CHUNK_SIZE = 1000
+
+
+def _version_key(version) -> str:
+    count, last_updated = version
+    return f"{count}:{last_updated.isoformat() if last_updated else ''}"
+
+
+def _details_hash(factors: List[int], notes: List[str]) -> str:
+    payload = json.dumps([factors, notes], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _chunks(items: List, size: int = WRITE_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class MatchScoreStore:
+    """
+    Materialized match_scores table (active candidates x open jobs)
+
+    - rebuild(): full recompute, recorded in match_score_builds
+    - refresh_candidates() / refresh_jobs(): recompute one matrix row / column
+    - find_matches_for_job() / find_matches_for_candidate(): indexed range reads,
+      None when the table can't answer the request (falls back to live matching)
+    """
+
+    def __init__(self, engine, score_floor: int = MATCH_SCORE_FLOOR):
+        self.engine = engine
+        self.db: Session = engine.db
+        self.score_floor = score_floor
+
+    # ==================== STATE ====================
+
+    def latest_build(self) -> Optional[MatchScoreBuild]:
+        return self.db.query(MatchScoreBuild).filter(
+            MatchScoreBuild.completed_at.isnot(None)
+        ).order_by(MatchScoreBuild.completed_at.desc()).first()
+
+    def is_ready(self, min_score: Optional[int] = None) -> bool:
+        """Table is complete for the current rule set (and covers min_score)"""
+        build = self.latest_build()
+        if not build or build.rule_version != _version_key(rule_set_version(self.db)):
+            return False
+        if min_score is not None and min_score < build.score_floor:
+            return False
+        return True
+
+    # ==================== READS ====================
+
+    def find_matches_for_job(self, job, min_score: int, top_k: Optional[int] = None,
+                             include_details: bool = True) -> Optional[List[Dict]]:
+        """Candidate matches for an open job from match_scores"""
+        if job.status != "Open" or not self.is_ready(min_score):
+            return None
+
+        query = self.db.query(MatchScore.candidate_id, MatchScore.score).filter(
+            MatchScore.job_id == job.job_id,
+            MatchScore.score >= min_score
+        ).order_by(MatchScore.score.desc(), MatchScore.candidate_id)
+        rows = (query if top_k is None else query.limit(max(top_k, 0))).all()
+
+        candidates = self.engine._load_by_ids(Candidate, Candidate.candidate_id, [r.candidate_id for r in rows])
+        rules = get_compiled_rules(self.db)
+
+        matches = []
+        for row in rows:
+            candidate = candidates.get(row.candidate_id)
+            if candidate is None:
+                continue
+            matches.append(self.engine._build_match(
+                'candidate', candidate, job, row.score, self.engine._score_breakdown(candidate, job),
+                rules.apply(candidate, job)['notes'], include_details
+            ))
+        return matches
+
+    def find_matches_for_candidate(self, candidate, min_score: int, top_k: Optional[int] = None,
+                                   include_details: bool = True) -> Optional[List[Dict]]:
+        """Open job matches for an active candidate from match_scores"""
+        if (candidate.candidate_status or "").lower() != "active" or not self.is_ready(min_score):
+            return None
+
+        query = self.db.query(MatchScore.job_id, MatchScore.score).filter(
+            MatchScore.candidate_id == candidate.candidate_id,
+            MatchScore.score >= min_score
+        ).order_by(MatchScore.score.desc(), MatchScore.job_id)
+        rows = (query if top_k is None else query.limit(max(top_k, 0))).all()
+
+        jobs = self.engine._load_by_ids(Job, Job.job_id, [r.job_id for r in rows])
+        rules = get_compiled_rules(self.db)
+
+        matches = []
+        for row in rows:
+            job = jobs.get(row.job_id)
+            if job is None:
+                continue
+            matches.append(self.engine._build_match(
+                'job', candidate, job, row.score, self.engine._score_breakdown(candidate, job),
+                rules.apply(candidate, job)['notes'], include_details
+            ))
+        return matches
+
+    # ==================== WRITES ====================
+
+    def rebuild(self) -> Dict:
+        """
+        Recompute the whole matrix in one transaction
+        Readers keep using the previous build until commit
+        """
+        version = rule_set_version(self.db)
+        rules = get_compiled_rules(self.db)
+        build = MatchScoreBuild(
+            rule_version=_version_key(version),
+            score_floor=self.score_floor,
+            started_at=datetime.utcnow()
+        )
+
+        candidate_pool = load_candidate_pool(self.db)
+        job_pool = load_job_pool(self.db, self.engine._get_state_region)
+
+        self.db.execute(delete(MatchScore))
+        rows_written = 0
+        for job in job_pool.rows:
+            new_rows = self._score_job(job, candidate_pool, rules)
+            rows_written += self._insert(new_rows)
+
+        build.candidates_scored = len(candidate_pool)
+        build.jobs_scored = len(job_pool)
+        build.rows_written = rows_written
+        build.completed_at = datetime.utcnow()
+        self.db.add(build)
+        self.db.commit()
+
+        return {
+            'candidates_scored': build.candidates_scored,
+            'jobs_scored': build.jobs_scored,
+            'rows_written': rows_written
+        }
+
+    def refresh_jobs(self, job_ids: Iterable[str]) -> int:
+        """Recompute the match_scores column of each job (open jobs only)"""
+        job_ids = list(job_ids)
+        if not job_ids or not self.is_ready():
+            return 0
+
+        rules = get_compiled_rules(self.db)
+        candidate_pool = load_candidate_pool(self.db)
+        jobs = self.engine._load_by_ids(Job, Job.job_id, job_ids)
+
+        changed = 0
+        for job_id in job_ids:
+            job = jobs.get(job_id)
+            new_rows = self._score_job(job, candidate_pool, rules) if job is not None and job.status == "Open" else []
+            changed += self._sync(MatchScore.job_id, job_id, MatchScore.candidate_id, new_rows)
+
+        self.db.commit()
+        return changed
+
+    def refresh_candidates(self, candidate_ids: Iterable[str]) -> int:
+        """Recompute the match_scores row of each candidate (active candidates only)"""
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids or not self.is_ready():
+            return 0
+
+        rules = get_compiled_rules(self.db)
+        job_pool = load_job_pool(self.db, self.engine._get_state_region)
+        candidates = self.engine._load_by_ids(Candidate, Candidate.candidate_id, candidate_ids)
+
+        changed = 0
+        for candidate_id in candidate_ids:
+            candidate = candidates.get(candidate_id)
+            if candidate is not None and (candidate.candidate_status or "").lower() == "active":
+                new_rows = self._score_candidate(candidate, job_pool, rules)
+            else:
+                new_rows = []
+            changed += self._sync(MatchScore.candidate_id, candidate_id, MatchScore.job_id, new_rows)
+
+        self.db.commit()
+        return changed
+
+    # ---------- helpers ----------
+
+    def _score_job(self, job, candidate_pool, rules) -> List[Dict]:
+        factors, outcome, scores = self.engine.score_job_against_pool(job, candidate_pool, rules)
+        keep = np.flatnonzero(~outcome.disqualified & (scores >= self.score_floor))
+        return [
+            {
+                'candidate_id': candidate_pool.ids[i],
+                'job_id': job.job_id,
+                'score': int(scores[i]),
+                'details_hash': _details_hash(factors[:, i].tolist(), outcome.notes(i)),
+            }
+            for i in keep
+        ]
+
+    def _score_candidate(self, candidate, job_pool, rules) -> List[Dict]:
+        factors, outcome, scores = self.engine.score_candidate_against_pool(candidate, job_pool, rules)
+        keep = np.flatnonzero(~outcome.disqualified & (scores >= self.score_floor))
+        return [
+            {
+                'candidate_id': candidate.candidate_id,
+                'job_id': job_pool.ids[i],
+                'score': int(scores[i]),
+                'details_hash': _details_hash(factors[:, i].tolist(), outcome.notes(i)),
+            }
+            for i in keep
+        ]
+
+    def _insert(self, rows: List[Dict]) -> int:
+        now = datetime.utcnow()
+        for chunk in _chunks(rows):
+            self.db.execute(insert(MatchScore), [dict(row, computed_at=now) for row in chunk])
+        return len(rows)
+
+    def _sync(self, key_column, key_value: str, other_column, new_rows: List[Dict]) -> int:
+        """
+        Bring one matrix row/column in line with new_rows
+        Only pairs whose details_hash changed are rewritten
+        """
+        existing = dict(self.db.query(other_column, MatchScore.details_hash).filter(key_column == key_value).all())
+        new_by_other = {row[other_column.key]: row for row in new_rows}
+
+        stale = [other for other in existing if other not in new_by_other]
+        for chunk in _chunks(stale):
+            self.db.execute(delete(MatchScore).where(key_column == key_value, other_column.in_(chunk)))
+
+        now = datetime.utcnow()
+        inserts = [row for other, row in new_by_other.items() if other not in existing]
+        updates = [
+            dict(row, computed_at=now) for other, row in new_by_other.items()
+            if other in existing and existing[other] != row['details_hash']
+        ]
+        self._insert(inserts)
+        for chunk in _chunks(updates):
+            self.db.execute(update(MatchScore), chunk)
+
+        return len(stale) + len(inserts) + len(updates)
+
+
+def refresh_match_scores(db: Session, candidate_ids: Iterable[str] = (), job_ids: Iterable[str] = ()) -> int:
+    """
+    Incrementally refresh match_scores after candidates / jobs were written
+    Never raises - a failed refresh only means stale rows until the next rebuild
+    """
+    from matching_engine import MatchingEngine
+
+    try:
+        store = MatchScoreStore(MatchingEngine(db, use_vectorized=True))
+        changed = store.refresh_candidates(candidate_ids)
+        changed += store.refresh_jobs(job_ids)
+        return changed
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Match score refresh failed: {str(e)}")
+        return 0
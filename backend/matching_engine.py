@@ -1,14 +1,33 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import select, and_, or_
 from datetime import datetime, date, timedelta
 import json
 from typing import List, Dict, Optional
+import heapq
+import numpy as np
 
 # Import models
 from models import (
-    Candidate, Job, Assignment, Alert, CandidateResponse,
-    MatchingRule, CommunicationLog, NotificationTemplate
+    Candidate, Job, Assignment, CandidateResponse,
+    CommunicationLog, NotificationTemplate
 )
+from vectorized_scoring import (
+    FACTORS, VectorizedScorer, load_job_pool
+)
+from matching_rules import get_compiled_rules
+from blocking_index import get_candidate_index, MAX_OTHER_POINTS
+from match_features import STATE_TO_REGION
+from geo_distance import DISTANCE_TIERS, job_point, nearest_state_miles, distance_points
+from match_scores import MatchScoreStore
+from match_cache import match_cache, data_version
+from scoring_profiles import DEFAULT_WEIGHTS, CompiledProfile, get_scoring_profiles, scale_matrix
+from specialty_map import SpecialtyMap, get_specialty_map
+from availability_index import (
+    AVAILABILITY_MODES, AVAILABILITY_CONFLICT_PENALTY, EXCLUDE_NOTE, PENALIZE_NOTE,
+    CandidateCalendar, job_period, apply_conflicts, get_candidate_availability, get_job_periods
+)
+from batch_matching import run_parallel_batch, write_new_match_alerts, unread_alert_candidates, insert_alerts
+from job_fanout import fan_out_new_jobs
 
 
 class MatchingEngine:
@@ -18,41 +37,87 @@ class MatchingEngine:
     - Custom rule processing
     - Automated notification triggers
     - Response tracking
+    
+    Pass use_vectorized=True to score a whole candidate/job pool per call
+    with NumPy instead of one pair at a time (identical scores).
+    Pass use_score_store=True to answer from the materialized match_scores
+    table when it is current (see match_scores.MatchScoreStore).
+    Pass use_cache=True to serve repeated lookups from the in-process
+    match_cache.MatchCache.
+    Pass availability_mode='exclude' / 'penalize' to drop / penalize pairs
+    where the job conflicts with the candidate's availability windows or
+    blackout dates (see availability_index).
+    Pass use_distance=True to give partial location credit by distance from
+    the job to the candidate's nearest preferred state (see geo_distance).
+    Pass scoring_profile=<name or id> to score with a stored weight profile,
+    or 'auto' to pick each job's facility / specialty profile (see scoring_profiles).
+    Pass canonical_specialties=True to compare specialties by canonical id, so
+    synonyms like ICU / Intensive Care / CCU RN match (see specialty_map).
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, use_vectorized: bool = False, use_score_store: bool = False,
+                 use_cache: bool = False, availability_mode: Optional[str] = None, use_distance: bool = False,
+                 scoring_profile: Optional[str] = None, canonical_specialties: bool = False):
+        if availability_mode is not None and availability_mode not in AVAILABILITY_MODES:
+            raise ValueError(f"availability_mode must be one of {AVAILABILITY_MODES}")
         self.db = db
-        self.scoring_weights = {
-            'specialty': 30,
-            'location': 25,
-            'experience': 20,
-            'availability': 15,
-            'contract_duration': 5,
-            'shift_preference': 3,
-            'housing': 2
-        }
+        self.use_vectorized = use_vectorized
+        self.use_score_store = use_score_store
+        self.use_cache = use_cache
+        self.availability_mode = availability_mode
+        self.use_distance = use_distance
+        self.scoring_profile = scoring_profile
+        self.canonical_specialties = canonical_specialties
+        self._calendars: Dict[str, CandidateCalendar] = {}
+        self._profiles = None
+        self._job_profiles: Dict[str, Optional[CompiledProfile]] = {}
+        self._specialties = None
+        self.scoring_weights = dict(DEFAULT_WEIGHTS)
     
     # ==================== MATCHING FUNCTIONS ====================
     
-    def find_matches_for_job(self, job_id: str, min_score: int = 50) -> List[Dict]:
+    def find_matches_for_job(self, job_id: str, min_score: int = 50, top_k: Optional[int] = None,
+                             include_details: bool = True) -> List[Dict]:
         """
         Find top candidate matches for a job
-        Returns ranked list with scores and reasons
+        Returns ranked list with scores, per-factor points and reasons (only the best top_k if given)
+        include_details=False skips the human-readable match_details
         """
         job = self.db.query(Job).filter(Job.job_id == job_id).first()
         if not job:
             return []
+        if self.use_cache:
+            return self._cached_matches('candidate', job, min_score, top_k, include_details)
+        return self._match_job(job, min_score, top_k, include_details)
+    
+    def _match_job(self, job, min_score: int, top_k: Optional[int], include_details: bool) -> List[Dict]:
+        """Uncached find_matches_for_job"""
+        if (self.use_score_store and not self.availability_mode and not self.use_distance and not self.scoring_profile
+                and not self.canonical_specialties):
+            matches = MatchScoreStore(self).find_matches_for_job(job, min_score, top_k, include_details)
+            if matches is not None:
+                return matches
+        if self.use_vectorized:
+            return self._find_matches_for_job_vectorized(job, min_score, top_k, include_details)
+        
         candidates = self.db.query(Candidate).filter(
             Candidate.candidate_status.ilike("active")
         ).all()
+        rules = get_compiled_rules(self.db)
+        
+        if top_k is not None:
+            return self._find_top_matches(
+                ((candidate, job) for candidate in candidates), 'candidate', min_score, top_k, rules, include_details
+            )
         
         matches = []
         for candidate in candidates:
             # Calculate base score
-            score = self._calculate_match_score(candidate, job)
+            factors = self._score_breakdown(candidate, job)
+            score = min(sum(factors.values()), 100)
             
             # Apply custom rules
-            rule_result = self._apply_matching_rules(candidate, job)
+            rule_result = self._apply_rules(rules, candidate, job)
             if rule_result['disqualified']:
                 continue 
             
@@ -60,39 +125,58 @@ class MatchingEngine:
             score = min(score, 100) 
             
             if score >= min_score:
-                matches.append({
-                    'candidate': candidate,
-                    'score': score,
-                    'match_details': self._get_match_details(candidate, job),
-                    'rule_notes': rule_result['notes']
-                })
+                matches.append(self._build_match(
+                    'candidate', candidate, job, score, factors, rule_result['notes'], include_details
+                ))
         
         # Sort by score
         matches.sort(key=lambda x: x['score'], reverse=True)
         
         return matches
     
-    def find_matches_for_candidate(self, candidate_id: str, min_score: int = 50) -> List[Dict]:
+    def find_matches_for_candidate(self, candidate_id: str, min_score: int = 50, top_k: Optional[int] = None,
+                                   include_details: bool = True) -> List[Dict]:
         """
         Find top job matches for a candidate
-        Returns ranked list with scores and reasons
+        Returns ranked list with scores, per-factor points and reasons (only the best top_k if given)
+        include_details=False skips the human-readable match_details
         """
         candidate = self.db.query(Candidate).filter(
             Candidate.candidate_id == candidate_id
         ).first()
         if not candidate:
             return []
+        if self.use_cache:
+            return self._cached_matches('job', candidate, min_score, top_k, include_details)
+        return self._match_candidate(candidate, min_score, top_k, include_details)
+    
+    def _match_candidate(self, candidate, min_score: int, top_k: Optional[int], include_details: bool) -> List[Dict]:
+        """Uncached find_matches_for_candidate"""
+        if (self.use_score_store and not self.availability_mode and not self.use_distance and not self.scoring_profile
+                and not self.canonical_specialties):
+            matches = MatchScoreStore(self).find_matches_for_candidate(candidate, min_score, top_k, include_details)
+            if matches is not None:
+                return matches
+        if self.use_vectorized:
+            return self._find_matches_for_candidate_vectorized(candidate, min_score, top_k, include_details)
         
         # Get open jobs
         jobs = self.db.query(Job).filter(Job.status == "Open").all()
+        rules = get_compiled_rules(self.db)
+        
+        if top_k is not None:
+            return self._find_top_matches(
+                ((candidate, job) for job in jobs), 'job', min_score, top_k, rules, include_details
+            )
         
         matches = []
         for job in jobs:
             # Calculate base score
-            score = self._calculate_match_score(candidate, job)
+            factors = self._score_breakdown(candidate, job)
+            score = min(sum(factors.values()), 100)
             
             # Apply custom rules
-            rule_result = self._apply_matching_rules(candidate, job)
+            rule_result = self._apply_rules(rules, candidate, job)
             if rule_result['disqualified']:
                 continue
             
@@ -100,23 +184,287 @@ class MatchingEngine:
             score = min(score, 100)
             
             if score >= min_score:
-                matches.append({
-                    'job': job,
-                    'score': score,
-                    'match_details': self._get_match_details(candidate, job),
-                    'rule_notes': rule_result['notes']
-                })
+                matches.append(self._build_match(
+                    'job', candidate, job, score, factors, rule_result['notes'], include_details
+                ))
         
         matches.sort(key=lambda x: x['score'], reverse=True)
         
         return matches
     
+    def _cached_matches(self, key: str, entity, min_score: int, top_k: Optional[int],
+                        include_details: bool) -> List[Dict]:
+        """
+        find_matches_* through match_cache
+        Only ids, scores, factors and rule notes are cached; rows are reloaded on a hit
+        """
+        if key == 'candidate':
+            entity_id, compute = entity.job_id, self._match_job
+        else:
+            entity_id, compute = entity.candidate_id, self._match_candidate
+        
+        # Read the versions before computing: data_version() only moves once a write has committed,
+        # so a commit during the scan leaves the entry unreachable instead of caching old rows under it
+        cache_key = (key, entity_id, min_score, top_k, self.availability_mode, self.use_distance,
+                     self.scoring_profile, self._profile_version(), self._specialty_version(),
+                     get_compiled_rules(self.db).version, data_version())
+        cached = match_cache.get(cache_key)
+        
+        if cached is None:
+            matches = compute(entity, min_score, top_k, include_details)
+            id_attr = 'candidate_id' if key == 'candidate' else 'job_id'
+            match_cache.put(cache_key, [
+                (getattr(match[key], id_attr), match['score'], dict(match['factors']), list(match['rule_notes']))
+                for match in matches
+            ])
+            return matches
+        
+        if key == 'candidate':
+            others = self._load_by_ids(Candidate, Candidate.candidate_id, [row[0] for row in cached])
+        else:
+            others = self._load_by_ids(Job, Job.job_id, [row[0] for row in cached])
+        
+        matches = []
+        for other_id, score, factors, notes in cached:
+            other = others.get(other_id)
+            if other is None:
+                continue
+            candidate, job = (other, entity) if key == 'candidate' else (entity, other)
+            matches.append(self._build_match(key, candidate, job, score, dict(factors), list(notes), include_details))
+        return matches
+    
+    def _find_top_matches(self, pairs, key: str, min_score: int, top_k: int, rules,
+                          include_details: bool = True) -> List[Dict]:
+        """
+        Heap-based top-K over (candidate, job) pairs
+        Same result as sorting every match and taking [:top_k]
+        
+        Specialty (30) and location (25) are scored first; the remaining
+        factors, rules and match details are skipped whenever the best
+        achievable score can't reach min_score or enter the current top-K.
+        With a scoring profile the bound uses the profile's weights instead.
+        """
+        if top_k <= 0:
+            return []
+        
+        # (score, -position, candidate, job, notes) - heap[0] is the weakest kept match,
+        # later pairs lose ties like they do in the stable sort
+        heap = []
+        for position, (candidate, job) in enumerate(pairs):
+            profile = self._profile_for(job)
+            specialty, location = self._score_specialty(candidate, job), self._score_location(candidate, job)
+            if profile is None:
+                partial, max_other = specialty + location, MAX_OTHER_POINTS
+            else:
+                partial = profile.scale_points(0, specialty) + profile.scale_points(1, location)
+                max_other = profile.max_other
+            best = min(partial + max_other + max(rules.max_bonus, 0), 100)
+            if best < min_score or (len(heap) == top_k and best <= heap[0][0]):
+                continue
+            
+            if profile is None:
+                score = min(partial + self._score_remaining(candidate, job), 100)
+            else:
+                score = min(sum(self._score_breakdown(candidate, job).values()), 100)
+            rule_result = self._apply_rules(rules, candidate, job)
+            if rule_result['disqualified']:
+                continue
+            score = min(score + rule_result['bonus_points'], 100)
+            if score < min_score:
+                continue
+            
+            entry = (score, -position, candidate, job, rule_result['notes'])
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        
+        return [
+            self._build_match(key, candidate, job, score, self._score_breakdown(candidate, job), notes, include_details)
+            for score, _, candidate, job, notes in sorted(heap, key=lambda e: (-e[0], -e[1]))
+        ]
+    
+    def _find_matches_for_job_vectorized(self, job, min_score: int, top_k: Optional[int] = None,
+                                         include_details: bool = True) -> List[Dict]:
+        """
+        Vectorized find_matches_for_job: scores the active candidates the
+        blocking index can't rule out in one pass, then loads full Candidate
+        rows for matches only
+        """
+        return list(self._iter_job_matches_vectorized(job, min_score, top_k, include_details))
+    
+    def iter_matches_for_job(self, job_id: str, min_score: int = 50, include_details: bool = False,
+                             batch_size: int = 500):
+        """
+        Generator version of find_matches_for_job for streaming responses
+        Yields ranked matches one at a time; Candidate rows are loaded batch_size
+        at a time and detached once yielded, so memory doesn't grow with the pool
+        """
+        job = self.db.query(Job).filter(Job.job_id == job_id).first()
+        if not job:
+            return
+        yield from self._iter_job_matches_vectorized(job, min_score, None, include_details, batch_size, detach=True)
+    
+    def _iter_job_matches_vectorized(self, job, min_score: int, top_k: Optional[int] = None,
+                                     include_details: bool = True, batch_size: int = 1000, detach: bool = False):
+        """
+        Rank (score, pool position) over the whole pool first - plain arrays only -
+        then load Candidate rows in rank order, one batch per query
+        """
+        pool, index = get_candidate_index(self.db)
+        rules = get_compiled_rules(self.db)
+        rows = index.candidate_rows(job, min_score, rules.max_bonus, self._get_state_region, self.use_distance,
+                                    self._profile_for(job), self._canonical_map())
+        ids = pool.ids if rows is None else [pool.ids[i] for i in rows]
+        
+        factors, outcome, scores = self.score_job_against_pool(job, pool, rules, rows=rows)
+        ranked = self._rank_qualifying(outcome, scores, min_score, top_k)
+        
+        for start in range(0, len(ranked), batch_size):
+            batch = ranked[start:start + batch_size]
+            batch_ids = [ids[i] for i in batch]
+            candidates = {
+                candidate.candidate_id: candidate
+                for candidate in self.db.execute(
+                    select(Candidate).where(Candidate.candidate_id.in_(batch_ids)).execution_options(yield_per=batch_size)
+                ).scalars()
+            }
+            
+            for i, candidate_id in zip(batch, batch_ids):
+                yield self._build_match(
+                    'candidate', candidates[candidate_id], job, int(scores[i]),
+                    dict(zip(FACTORS, factors[:, i].tolist())), outcome.notes(i), include_details
+                )
+            
+            if detach:
+                for candidate in candidates.values():
+                    self.db.expunge(candidate)
+    
+    def count_matches_for_candidates(self, candidates, min_score: int = 50) -> Dict[str, int]:
+        """
+        Number of open jobs each candidate matches at min_score or above
+        
+        Count-only find_matches_for_candidate for a batch: one open job pool and
+        rule set, one vectorized pass per candidate, no Job rows or match dicts.
+        A candidate whose scoring raises counts 0.
+        """
+        pool = load_job_pool(self.db, self._get_state_region)
+        rules = get_compiled_rules(self.db)
+        counts = {}
+        for candidate in candidates:
+            try:
+                factors, outcome, scores = self.score_candidate_against_pool(candidate, pool, rules)
+                counts[candidate.candidate_id] = int(np.count_nonzero(~outcome.disqualified & (scores >= min_score)))
+            except Exception:
+                counts[candidate.candidate_id] = 0
+        return counts
+    
+    def _find_matches_for_candidate_vectorized(self, candidate, min_score: int, top_k: Optional[int] = None,
+                                               include_details: bool = True) -> List[Dict]:
+        """
+        Vectorized find_matches_for_candidate: scores all open jobs in one
+        pass, then loads full Job rows for matches only
+        """
+        pool = load_job_pool(self.db, self._get_state_region)
+        factors, outcome, scores = self.score_candidate_against_pool(candidate, pool)
+        qualifying = [
+            (pool.ids[i], int(scores[i]), dict(zip(FACTORS, factors[:, i].tolist())), outcome.notes(i))
+            for i in self._rank_qualifying(outcome, scores, min_score, top_k)
+        ]
+        
+        jobs = self._load_by_ids(Job, Job.job_id, [q[0] for q in qualifying])
+        
+        return [
+            self._build_match('job', candidate, jobs[job_id], score, breakdown, notes, include_details)
+            for job_id, score, breakdown, notes in qualifying
+        ]
+    
+    def _build_match(self, key: str, candidate, job, score: int, factors: Dict, notes: List[str],
+                     include_details: bool = True) -> Dict:
+        """One match entry; match_details (reasons / concerns) only when asked for"""
+        match = {
+            key: candidate if key == 'candidate' else job,
+            'score': score,
+            'factors': factors,
+            'rule_notes': notes
+        }
+        if include_details:
+            match['match_details'] = self._get_match_details(candidate, job)
+        return match
+    
+    def explain_match(self, candidate_id: str, job_id: str) -> Optional[Dict]:
+        """
+        Full breakdown of a single candidate/job pair
+        Used to load match details on demand
+        """
+        candidate = self.db.query(Candidate).filter(Candidate.candidate_id == candidate_id).first()
+        job = self.db.query(Job).filter(Job.job_id == job_id).first()
+        if not candidate or not job:
+            return None
+        
+        factors = self._score_breakdown(candidate, job)
+        rule_result = self._apply_rules(get_compiled_rules(self.db), candidate, job)
+        score = min(min(sum(factors.values()), 100) + rule_result['bonus_points'], 100)
+        
+        return {
+            'candidate': candidate,
+            'job': job,
+            'score': score,
+            'disqualified': rule_result['disqualified'],
+            'factors': factors,
+            'match_details': self._get_match_details(candidate, job),
+            'rule_notes': rule_result['notes']
+        }
+    
+    def _rank_qualifying(self, outcome, scores, min_score: int, top_k: Optional[int] = None) -> np.ndarray:
+        """Pool indexes of qualifying rows, best score first (pool order on ties), cut to top_k"""
+        qualifying = np.flatnonzero(~outcome.disqualified & (scores >= min_score))
+        ranked = qualifying[np.argsort(-scores[qualifying], kind='stable')]
+        return ranked if top_k is None else ranked[:max(top_k, 0)]
+    
+    def score_job_against_pool(self, job, pool, rules=None, rows=None):
+        """
+        Score one job against a CandidatePool (or the given pool rows) with rules applied
+        Returns (factor matrix, RuleOutcome, final scores)
+        """
+        scorer = VectorizedScorer(self)
+        factors = scorer.score_job(job, pool, rows)
+        profile = self._profile_for(job)
+        if profile is not None:
+            factors = profile.scale_matrix(factors)
+        outcome = (rules if rules is not None else get_compiled_rules(self.db)).apply_to_candidate_pool(job, pool, rows)
+        if self.availability_mode:
+            conflicts = get_candidate_availability(self.db, pool).conflicts(job_period(job))
+            apply_conflicts(outcome, conflicts if rows is None else conflicts[rows], self.availability_mode)
+        scores = np.minimum(scorer.totals(factors) + outcome.bonus, 100)
+        return factors, outcome, scores
+    
+    def score_candidate_against_pool(self, candidate, pool, rules=None):
+        """
+        Score one candidate against a JobPool with rules applied
+        Returns (factor matrix, RuleOutcome, final scores)
+        """
+        scorer = VectorizedScorer(self)
+        factors = scorer.score_candidate(candidate, pool)
+        if self.scoring_profile:
+            factors = scale_matrix(factors, self._scoring_profiles().job_weights(self.scoring_profile, pool))
+        outcome = (rules if rules is not None else get_compiled_rules(self.db)).apply_to_job_pool(candidate, pool)
+        if self.availability_mode:
+            calendar = CandidateCalendar.from_row(candidate)
+            if calendar:
+                apply_conflicts(outcome, get_job_periods(pool).conflicts(calendar), self.availability_mode)
+        scores = np.minimum(scorer.totals(factors) + outcome.bonus, 100)
+        return factors, outcome, scores
+    
     # ==================== SCORING ALGORITHM ====================
     
     def _calculate_match_score(self, candidate, job) -> int:
         """
         Calculate match score using weighted algorithm
         """
+        if self._profile_for(job) is not None:
+            return min(sum(self._score_breakdown(candidate, job).values()), 100)
+        
         score = 0
         
         # 1. SPECIALTY MATCH 
@@ -125,6 +473,61 @@ class MatchingEngine:
         # 2. LOCATION MATCH
         score += self._score_location(candidate, job)
         
+        # 3-7. EXPERIENCE, AVAILABILITY, CONTRACT, SHIFT, HOUSING
+        score += self._score_remaining(candidate, job)
+        
+        return min(score, 100)
+    
+    def _score_breakdown(self, candidate, job) -> Dict[str, int]:
+        """Points per factor, keyed like vectorized_scoring.FACTORS (weighted by the scoring profile)"""
+        factors = {
+            'specialty': self._score_specialty(candidate, job),
+            'location': self._score_location(candidate, job),
+            'experience': self._score_experience(candidate, job),
+            'availability': self._score_availability(candidate, job),
+            'contract_duration': self._score_contract_duration(candidate, job),
+            'shift_preference': self._score_shift_preference(candidate, job),
+            'housing': self._score_housing(candidate, job),
+        }
+        profile = self._profile_for(job)
+        return factors if profile is None else profile.scale(factors)
+    
+    def _scoring_profiles(self):
+        """Compiled profiles, looked up once per engine"""
+        if self._profiles is None:
+            self._profiles = get_scoring_profiles(self.db)
+        return self._profiles
+    
+    def _profile_version(self):
+        return self._scoring_profiles().version if self.scoring_profile else None
+    
+    def _specialty_map(self) -> SpecialtyMap:
+        """Canonical specialty lookup, loaded once per engine"""
+        if self._specialties is None:
+            self._specialties = get_specialty_map(self.db)
+        return self._specialties
+    
+    def _canonical_map(self) -> Optional[SpecialtyMap]:
+        return self._specialty_map() if self.canonical_specialties else None
+    
+    def _specialty_version(self):
+        return self._specialty_map().version if self.canonical_specialties else None
+    
+    def _profile_for(self, job) -> Optional[CompiledProfile]:
+        """Scoring profile for a job (None = default weights), resolved once per job"""
+        if not self.scoring_profile:
+            return None
+        if job.job_id not in self._job_profiles:
+            self._job_profiles[job.job_id] = self._scoring_profiles().resolve(self.scoring_profile, job)
+        return self._job_profiles[job.job_id]
+    
+    def _score_remaining(self, candidate, job) -> int:
+        """
+        Factors 3-7 (at most MAX_OTHER_POINTS together)
+        Scored after specialty + location so top-K matching can skip them
+        """
+        score = 0
+        
         # 3. EXPERIENCE MATCH
         score += self._score_experience(candidate, job)
         
@@ -140,12 +543,14 @@ class MatchingEngine:
         # 7. HOUSING PREFERENCE
         score += self._score_housing(candidate, job)
         
-        return min(score, 100)
+        return score
     
     def _score_specialty(self, candidate, job) -> int:
         """Score specialty match"""
         if not candidate.primary_specialty or not job.specialty_required:
             return 0
+        if self.canonical_specialties:
+            return self._score_canonical_specialty(candidate, job)
         
         # Perfect match
         if candidate.primary_specialty.lower() == job.specialty_required.lower():
@@ -165,6 +570,20 @@ class MatchingEngine:
         
         return 0
     
+    def _score_canonical_specialty(self, candidate, job) -> int:
+        """_score_specialty on canonical specialty ids - same tiers, synonyms and case folded"""
+        specialties = self._specialty_map()
+        primary = specialties.row_id(getattr(candidate, 'specialty_id', None), candidate.primary_specialty)
+        required = specialties.row_id(getattr(job, 'specialty_id', None), job.specialty_required)
+        
+        if primary == required:
+            return 30
+        if required in specialties.ids_for(candidate.sub_specialties):
+            return 25
+        if primary in specialties.ids_for(job.sub_specialties_accepted):
+            return 20
+        return 0
+    
     def _score_location(self, candidate, job) -> int:
         """Score location preference match"""
         if not job.state:
@@ -179,14 +598,26 @@ class MatchingEngine:
         if job.state in preferred:
             return 25
         
+        score = 0
+        
         # Check regions
         if candidate.preferred_regions:
             regions = candidate.preferred_regions if isinstance(candidate.preferred_regions, list) else json.loads(candidate.preferred_regions)
             job_region = self._get_state_region(job.state)
             if job_region in regions:
-                return 15
+                score = 15
         
-        return 0
+        # Distance to the nearest preferred state
+        if self.use_distance:
+            score = max(score, self._score_distance(preferred, job))
+        
+        return score
+    
+    def _score_distance(self, preferred, job) -> int:
+        """DISTANCE_TIERS points for the preferred state closest to the job"""
+        point = job_point(job)
+        nearest = nearest_state_miles(preferred, point) if point is not None else None
+        return int(distance_points(nearest[1])) if nearest is not None else 0
     
     def _score_experience(self, candidate, job) -> int:
         """Score experience level match"""
@@ -265,65 +696,32 @@ class MatchingEngine:
     
     def _apply_matching_rules(self, candidate, job) -> Dict:
         """
-        Apply custom matching rules
+        Apply custom matching rules to a single pair
         Returns: {disqualified: bool, bonus_points: int, notes: [str]}
-        """
-        result = {
-            'disqualified': False,
-            'bonus_points': 0,
-            'notes': []
-        }
-        
-        # Get active rules
-        rules = self.db.query(MatchingRule).filter(
-            MatchingRule.is_active == True
-        ).all()
-        
-        for rule in rules:
-            # Evaluate rule conditions
-            rule_applies = self._evaluate_rule_conditions(rule, candidate, job)
-            
-            if rule_applies:
-                if rule.action == "disqualify":
-                    result['disqualified'] = True
-                    result['notes'].append(f"❌ {rule.rule_name}: {rule.description}")
-                    return result  
-                
-                elif rule.action == "bonus":
-                    result['bonus_points'] += rule.bonus_points or 0
-                    result['notes'].append(f"✓ {rule.rule_name}: +{rule.bonus_points} points")
-                
-                elif rule.action == "penalty":
-                    result['bonus_points'] -= abs(rule.bonus_points or 0)
-                    result['notes'].append(f"⚠ {rule.rule_name}: {rule.bonus_points} points")
         
+        Rules are compiled once per rule-set version (see matching_rules),
+        loops should call get_compiled_rules() once and reuse the result.
+        """
+        return self._apply_rules(get_compiled_rules(self.db), candidate, job)
+    
+    def _apply_rules(self, rules, candidate, job) -> Dict:
+        """Compiled rules for one pair, plus the availability check when availability_mode is set"""
+        result = rules.apply(candidate, job)
+        if self.availability_mode and not result['disqualified'] and self._availability_conflict(candidate, job):
+            if self.availability_mode == 'exclude':
+                result['disqualified'] = True
+                result['notes'].append(EXCLUDE_NOTE.note)
+            else:
+                result['bonus_points'] -= AVAILABILITY_CONFLICT_PENALTY
+                result['notes'].append(PENALIZE_NOTE.note)
         return result
     
-    def _evaluate_rule_conditions(self, rule, candidate, job) -> bool:
-        """
-        Evaluate if a rule's conditions are met
-        """
-        if not rule.conditions:
-            return False
-        
-        conditions = rule.conditions if isinstance(rule.conditions, dict) else json.loads(rule.conditions)
-        
-        # condition evaluation
-        for key, value in conditions.items():
-            if key == "specialty_match_required" and value:
-                if candidate.primary_specialty != job.specialty_required:
-                    return True
-            
-            if key == "min_experience" and value:
-                if candidate.years_experience < value:
-                    return True
-            
-            if key == "state_required" and value:
-                preferred = candidate.preferred_states if isinstance(candidate.preferred_states, list) else json.loads(candidate.preferred_states or '[]')
-                if job.state not in preferred:
-                    return True
-        
-        return False
+    def _availability_conflict(self, candidate, job) -> Optional[str]:
+        """Why the job conflicts with the candidate's windows / blackouts (None if it doesn't)"""
+        calendar = self._calendars.get(candidate.candidate_id)
+        if calendar is None:
+            calendar = self._calendars[candidate.candidate_id] = CandidateCalendar.from_row(candidate)
+        return calendar.conflict(job_period(job)) if calendar else None
     
     # ==================== MATCH DETAILS ====================
     
@@ -345,6 +743,9 @@ class MatchingEngine:
             if candidate.primary_specialty.lower() == job.specialty_required.lower():
                 details['specialty_match'] = True
                 details['reasons'].append(f"✓ Perfect specialty match: {candidate.primary_specialty}")
+            elif self.canonical_specialties and self._score_canonical_specialty(candidate, job) == 30:
+                details['specialty_match'] = True
+                details['reasons'].append(f"✓ Same specialty: {candidate.primary_specialty} / {job.specialty_required}")
             else:
                 details['concerns'].append(f"⚠ Specialty mismatch: {candidate.primary_specialty} vs {job.specialty_required}")
         
@@ -356,6 +757,10 @@ class MatchingEngine:
                 details['reasons'].append(f"✓ Preferred state: {job.state}")
             else:
                 details['concerns'].append(f"⚠ Not in preferred states: {job.state}")
+                point = job_point(job) if self.use_distance else None
+                nearest = nearest_state_miles(preferred, point) if point is not None else None
+                if nearest is not None and nearest[1] <= DISTANCE_TIERS[-1][0]:
+                    details['reasons'].append(f"✓ About {nearest[1]:.0f} miles from preferred state {nearest[0]}")
         
         # Experience
         if candidate.years_experience and job.min_years_experience:
@@ -377,112 +782,112 @@ class MatchingEngine:
             else:
                 details['concerns'].append(f"⚠ Availability mismatch: {days_diff} days difference")
         
+        if self.availability_mode:
+            conflict = self._availability_conflict(candidate, job)
+            if conflict:
+                details['availability_match'] = False
+                details['concerns'].append(f"⚠ {conflict}")
+        
         return details
     
     # ==================== AUTOMATED WORKFLOWS ====================
     
-    def scan_ending_assignments(self, days_threshold: int = 28) -> List[Dict]:
+    def scan_ending_assignments(self, days_threshold: int = 28, min_score: int = 60, top_k: int = 5) -> List[Dict]:
         """
         Scan assignments ending soon and create alerts with matched jobs
+        
+        Set-based: one query for the ending assignments (candidates and jobs
+        eager-loaded), one for existing unread contract_ending alerts, one open
+        job pool and rule set scored against every ending candidate, and one
+        bulk alert insert - the query count doesn't grow with the number of
+        contracts ending.
         """
-        cutoff_date = date.today() + timedelta(days=days_threshold)
+        today = date.today()
+        cutoff_date = today + timedelta(days=days_threshold)
         
         ending_assignments = self.db.execute(
             select(Assignment).where(
                 and_(
                     Assignment.status == "active",
                     Assignment.end_date <= cutoff_date,
-                    Assignment.end_date >= date.today()
+                    Assignment.end_date >= today
                 )
-            )
+            ).options(selectinload(Assignment.candidate), selectinload(Assignment.job))
         ).scalars().all()
         
-        results = []
+        ending_assignments = [assignment for assignment in ending_assignments if assignment.candidate is not None]
+        if not ending_assignments:
+            return []
         
+        candidates = {assignment.candidate_id: assignment.candidate for assignment in ending_assignments}
+        alerted = unread_alert_candidates(self.db, "contract_ending", list(candidates))
+        
+        # Best open jobs per ending candidate, every candidate scored against the same job pool
+        pool = load_job_pool(self.db, self._get_state_region)
+        rules = get_compiled_rules(self.db)
+        qualifying = {}
+        for candidate_id, candidate in candidates.items():
+            factors, outcome, scores = self.score_candidate_against_pool(candidate, pool, rules)
+            qualifying[candidate_id] = [
+                (pool.ids[i], int(scores[i]), dict(zip(FACTORS, factors[:, i].tolist())), outcome.notes(i))
+                for i in self._rank_qualifying(outcome, scores, min_score, top_k)
+            ]
+        jobs = self._load_by_ids(Job, Job.job_id, list({row[0] for rows in qualifying.values() for row in rows}))
+        
+        now = datetime.utcnow()
+        alerts = []
+        results = []
         for assignment in ending_assignments:
-            days_remaining = (assignment.end_date - date.today()).days
+            days_remaining = (assignment.end_date - today).days
+            candidate = assignment.candidate
             
-            # Create alert
-            existing_alert = self.db.query(Alert).filter(
-                and_(
-                    Alert.alert_type == "contract_ending",
-                    Alert.candidate_id == assignment.candidate_id,
-                    Alert.is_read == False
-                )
-            ).first()
-            
-            if not existing_alert:
-                alert = Alert(
-                    alert_type="contract_ending",
-                    candidate_id=assignment.candidate_id,
-                    assignment_id=assignment.assignment_id,
-                    priority="high" if days_remaining <= 14 else "normal",
-                    title=f"Assignment ending in {days_remaining} days",
-                    message=f"Time to find next placement for {assignment.candidate.full_name}!",
-                    action_required=True,
-                    is_read=False,
-                    created_at=datetime.utcnow()
-                )
-                self.db.add(alert)
-            
-            # Find matching jobs
-            matches = self.find_matches_for_candidate(assignment.candidate_id, min_score=60)
+            # One unread contract_ending alert per candidate
+            if assignment.candidate_id not in alerted:
+                alerted.add(assignment.candidate_id)
+                alerts.append({
+                    'alert_type': "contract_ending",
+                    'candidate_id': assignment.candidate_id,
+                    'assignment_id': assignment.assignment_id,
+                    'priority': "high" if days_remaining <= 14 else "normal",
+                    'title': f"Assignment ending in {days_remaining} days",
+                    'message': f"Time to find next placement for {candidate.full_name}!",
+                    'action_required': True,
+                    'is_read': False,
+                    'created_at': now
+                })
             
             results.append({
                 'assignment': assignment,
-                'candidate': assignment.candidate,
+                'candidate': candidate,
                 'days_remaining': days_remaining,
-                'potential_matches': matches[:5]
+                'potential_matches': [
+                    self._build_match('job', candidate, jobs[job_id], score, breakdown, notes, include_details=False)
+                    for job_id, score, breakdown, notes in qualifying[assignment.candidate_id]
+                ]
             })
         
+        insert_alerts(self.db, alerts)
         self.db.commit()
         return results
     
     def notify_new_job_matches(self, job_id: str, auto_send: bool = False) -> int:
         """
         Find matches for new job and create alerts/notifications
+        One-job batch of job_fanout.fan_out_new_jobs
         """
-        matches = self.find_matches_for_job(job_id, min_score=70)
-        
-        job = self.db.query(Job).filter(Job.job_id == job_id).first()
-        if not job:
-            return 0
-        
-        notifications_created = 0
-        
-        for match in matches[:10]:  
-            candidate = match['candidate']
-            
-            # Create alert
-            alert = Alert(
-                alert_type="new_match",
-                candidate_id=candidate.candidate_id,
-                job_id=job_id,
-                priority="high" if match['score'] >= 85 else "normal",
-                title=f"New {job.specialty_required} opportunity",
-                message=f"New {job.specialty_required} role in {job.state} - {match['score']}% match!",
-                action_required=True,
-                is_read=False,
-                created_at=datetime.utcnow()
-            )
-            self.db.add(alert)
-            
-            # If auto_send, trigger email/SMS
-            if auto_send:
-                self._send_match_notification(candidate, job, match['score'])
-            
-            notifications_created += 1
-        
-        self.db.commit()
-        return notifications_created
+        return fan_out_new_jobs(self, [job_id], auto_send=auto_send)['alerts_created']
     
     def _send_match_notification(self, candidate, job, score):
         """
         Send email/SMS notification to candidate about match
         (Placeholder - integrate with email/SMS service)
         """
-        # Create communication log
-        comm_log = CommunicationLog(
+        self.db.add(self._match_notification_log(candidate, job))
+        self.db.commit()
+    
+    def _match_notification_log(self, candidate, job) -> CommunicationLog:
+        """Communication log row for a new match notification (not added to the session)"""
+        return CommunicationLog(
             candidate_id=candidate.candidate_id,
             job_id=job.job_id,
             communication_type="email",
@@ -493,26 +898,21 @@ class MatchingEngine:
             status="sent",
             created_at=datetime.utcnow()
         )
-        self.db.add(comm_log)
-        self.db.commit()
     
     # ==================== HELPER METHODS ====================
     
     def _get_state_region(self, state: str) -> str:
         """Map state to region"""
-        regions = {
-            'West Coast': ['CA', 'OR', 'WA'],
-            'Mountain': ['CO', 'UT', 'AZ', 'NM', 'NV', 'ID', 'MT', 'WY'],
-            'Midwest': ['IL', 'IN', 'MI', 'OH', 'WI', 'MN', 'IA', 'MO', 'ND', 'SD', 'NE', 'KS'],
-            'Northeast': ['NY', 'PA', 'NJ', 'CT', 'MA', 'VT', 'NH', 'ME', 'RI'],
-            'Southeast': ['FL', 'GA', 'NC', 'SC', 'VA', 'TN', 'AL', 'MS', 'LA', 'AR', 'KY', 'WV'],
-            'Southwest': ['TX', 'OK'],
-        }
-        
-        for region, states in regions.items():
-            if state in states:
-                return region
-        return "Other"
+        return STATE_TO_REGION.get(state, "Other")
+    
+    def _load_by_ids(self, model, id_column, ids: List[str], chunk_size: int = 1000) -> Dict:
+        """Load full rows for a list of ids (chunked IN queries), keyed by id"""
+        rows = {}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            for row in self.db.query(model).filter(id_column.in_(chunk)).all():
+                rows[getattr(row, id_column.key)] = row
+        return rows
     
     def _is_in_blackout(self, check_date, blackout_dates) -> bool:
         """Check if date falls in blackout period"""
@@ -527,10 +927,14 @@ class MatchingEngine:
     
     # ==================== BATCH PROCESSING ====================
     
-    def batch_match_all_candidates(self, min_score: int = 70) -> Dict:
+    def batch_match_all_candidates(self, min_score: int = 70, workers: int = 1) -> Dict:
         """
         Run matching for all active candidates against all open jobs
+        workers > 1 shards candidates across worker processes (see batch_matching)
         """
+        if workers > 1:
+            return run_parallel_batch(self, min_score, workers)
+        
         results = {
             'total_matches': 0,
             'candidates_processed': 0,
@@ -542,35 +946,15 @@ class MatchingEngine:
             Candidate.candidate_status.ilike("active")
         ).all()
         
+        pending = []
         for candidate in candidates:
-            matches = self.find_matches_for_candidate(candidate.candidate_id, min_score=min_score)
+            matches = self.find_matches_for_candidate(candidate.candidate_id, min_score=min_score, include_details=False)
             results['candidates_processed'] += 1
             results['total_matches'] += len(matches)
             
-            # Create alerts for top 3 matches
+            # Alerts for top 3 matches - deduplicated and inserted in bulk below
             for match in matches[:3]:
-                existing_alert = self.db.query(Alert).filter(
-                    and_(
-                        Alert.alert_type == "new_match",
-                        Alert.candidate_id == candidate.candidate_id,
-                        Alert.job_id == match['job'].job_id,
-                        Alert.is_read == False
-                    )
-                ).first()
-                
-                if not existing_alert:
-                    alert = Alert(
-                        alert_type="new_match",
-                        candidate_id=candidate.candidate_id,
-                        job_id=match['job'].job_id,
-                        title=f"Great match: {match['job'].specialty_required}",
-                        message=f"{match['score']}% compatibility - {match['job'].facility}, {match['job'].state}",
-                        priority="normal",
-                        is_read=False,
-                        created_at=datetime.utcnow()
-                    )
-                    self.db.add(alert)
-                    results['alerts_created'] += 1
+                pending.append((candidate.candidate_id, match['job'].job_id, match['score']))
         
-        self.db.commit()
+        results['alerts_created'] = write_new_match_alerts(self, pending)
         return results
\ No newline at end of file
@@ -0,0 +1,244 @@
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import MatchingRule
+from vectorized_scoring import CandidatePool, JobPool, PoolView, _members
+
+
+# ==================== COMPILED RULES ====================
+
+class CompiledRule:
+    """
+    A MatchingRule with its conditions decoded once
+
+    applies() is the per-pair predicate, mask_for_job() / mask_for_candidate()
+    evaluate the same predicate over a whole pool at once.
+    """
+
+    def __init__(self, rule):
+        self.rule_id = rule.rule_id
+        self.rule_name = rule.rule_name
+        self.description = rule.description
+        self.action = rule.action
+        self.bonus_points = rule.bonus_points
+
+        # Only keys the engine understands, in their original order
+        self.checks: List[Tuple[str, object]] = []
+        if rule.conditions:
+            conditions = rule.conditions if isinstance(rule.conditions, dict) else json.loads(rule.conditions)
+            for key, value in conditions.items():
+                if key in ("specialty_match_required", "min_experience", "state_required") and value:
+                    self.checks.append((key, value))
+
+        if self.action == "disqualify":
+            self.points = 0
+            self.note = f"❌ {self.rule_name}: {self.description}"
+        elif self.action == "bonus":
+            self.points = self.bonus_points or 0
+            self.note = f"✓ {self.rule_name}: +{self.bonus_points} points"
+        elif self.action == "penalty":
+            self.points = -abs(self.bonus_points or 0)
+            self.note = f"⚠ {self.rule_name}: {self.bonus_points} points"
+        else:
+            self.points = 0
+            self.note = None
+
+    def applies(self, candidate, job) -> bool:
+        """Evaluate if the rule's conditions are met for one pair"""
+        for key, value in self.checks:
+            if key == "specialty_match_required":
+                if candidate.primary_specialty != job.specialty_required:
+                    return True
+            elif key == "min_experience":
+                if candidate.years_experience < value:
+                    return True
+            elif key == "state_required":
+                preferred = candidate.preferred_states if isinstance(candidate.preferred_states, list) else json.loads(candidate.preferred_states or '[]')
+                if job.state not in preferred:
+                    return True
+        return False
+
+    def mask_for_job(self, job, pool: PoolView) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rule outcome for one job against every candidate
+        Returns (applies mask, rows that must be evaluated per pair)
+        """
+        n = pool.n
+        result = np.zeros(n, dtype=bool)
+        undecided = np.ones(n, dtype=bool)
+        per_pair = pool.irregular.copy()
+
+        for key, value in self.checks:
+            if key == "specialty_match_required":
+                hit = pool.primary != pool.primary_codes.lookup(job.specialty_required)
+            elif key == "min_experience":
+                # `None < value` raises in the per-pair predicate - keep that behaviour
+                per_pair |= undecided & ~pool.years_known
+                hit = pool.years_known & (pool.years < value)
+            else:
+                hit = ~pool.hit('states', job.state)
+            result |= undecided & hit
+            undecided &= ~hit
+
+        return result, per_pair
+
+    def mask_for_candidate(self, candidate, pool: PoolView) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rule outcome for one candidate against every open job
+        Returns (applies mask, rows that must be evaluated per pair)
+        """
+        n = pool.n
+        result = np.zeros(n, dtype=bool)
+        undecided = np.ones(n, dtype=bool)
+        per_pair = pool.irregular.copy()
+
+        for key, value in self.checks:
+            if key == "specialty_match_required":
+                hit = pool.specialty_raw != pool.specialty_raw_codes.lookup(candidate.primary_specialty)
+            elif key == "min_experience":
+                if candidate.years_experience is None:
+                    per_pair |= undecided
+                    hit = np.zeros(n, dtype=bool)
+                else:
+                    hit = np.full(n, candidate.years_experience < value, dtype=bool)
+            else:
+                try:
+                    preferred = _members(candidate.preferred_states or '[]')
+                except Exception:
+                    per_pair |= undecided
+                    hit = np.zeros(n, dtype=bool)
+                else:
+                    hit = ~np.isin(pool.state, pool.state_codes.lookup_many(preferred))
+            result |= undecided & hit
+            undecided &= ~hit
+
+        return result, per_pair
+
+
+class RuleOutcome:
+    """Vectorized result of a rule set over a pool"""
+
+    def __init__(self, rules: List[CompiledRule], masks: List[np.ndarray], disqualified: np.ndarray, bonus: np.ndarray):
+        self.rules = rules
+        self.masks = masks
+        self.disqualified = disqualified
+        self.bonus = bonus
+
+    def notes(self, i: int) -> List[str]:
+        """Rule notes for row i (only meaningful for rows that were not disqualified)"""
+        return [rule.note for rule, mask in zip(self.rules, self.masks) if mask[i] and rule.note]
+
+
+class CompiledRuleSet:
+    """All active matching rules, compiled once per rule-set version"""
+
+    def __init__(self, rules: List[CompiledRule], version=None):
+        # Rules without recognised conditions can never apply
+        self.rules = [rule for rule in rules if rule.checks]
+        self.version = version
+        self.max_bonus = sum(rule.points for rule in self.rules if rule.points > 0)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def apply(self, candidate, job) -> Dict:
+        """
+        Apply rules to one pair
+        Returns: {disqualified: bool, bonus_points: int, notes: [str]}
+        """
+        result = {
+            'disqualified': False,
+            'bonus_points': 0,
+            'notes': []
+        }
+
+        for rule in self.rules:
+            if rule.applies(candidate, job):
+                if rule.action == "disqualify":
+                    result['disqualified'] = True
+                    result['notes'].append(rule.note)
+                    return result
+                if rule.note:
+                    result['notes'].append(rule.note)
+                    result['bonus_points'] += rule.points
+
+        return result
+
+    def apply_to_candidate_pool(self, job, pool: CandidatePool, rows: Optional[np.ndarray] = None) -> RuleOutcome:
+        """Apply rules to one job against every candidate in the pool (or the given rows)"""
+        view = PoolView(pool, rows)
+        return self._apply_to_pool(
+            view, lambda rule: rule.mask_for_job(job, view), lambda rule, i: rule.applies(view.row(i), job)
+        )
+
+    def apply_to_job_pool(self, candidate, pool: JobPool) -> RuleOutcome:
+        """Apply rules to one candidate against every open job in the pool"""
+        view = PoolView(pool)
+        return self._apply_to_pool(
+            view, lambda rule: rule.mask_for_candidate(candidate, view), lambda rule, i: rule.applies(candidate, view.row(i))
+        )
+
+    def _apply_to_pool(self, view: PoolView, vector_mask, pair_applies) -> RuleOutcome:
+        n = view.n
+        alive = np.ones(n, dtype=bool)
+        bonus = np.zeros(n, dtype=np.int32)
+        masks = []
+
+        for rule in self.rules:
+            mask, per_pair = vector_mask(rule)
+            # Same order as the per-pair loop: disqualified rows stop evaluating later rules
+            for i in np.flatnonzero(per_pair & alive):
+                mask[i] = pair_applies(rule, i)
+            mask &= alive
+            masks.append(mask)
+            if rule.action == "disqualify":
+                alive &= ~mask
+            else:
+                bonus += np.where(mask, rule.points, 0).astype(np.int32)
+
+        return RuleOutcome(self.rules, masks, ~alive, bonus)
+
+
+# ==================== LOADING / CACHE ====================
+
+_cache_lock = threading.Lock()
+_cached_rules: Optional[CompiledRuleSet] = None
+
+
+def rule_set_version(db: Session) -> Tuple:
+    """Cheap version stamp of the rules table (row count + last update)"""
+    count, last_updated = db.query(
+        func.count(MatchingRule.rule_id), func.max(MatchingRule.updated_at)
+    ).one()
+    return (count, last_updated)
+
+
+def compile_rules(db: Session, version=None) -> CompiledRuleSet:
+    """Load active rules and compile them"""
+    rules = db.query(MatchingRule).filter(
+        MatchingRule.is_active == True
+    ).all()
+    return CompiledRuleSet([CompiledRule(rule) for rule in rules], version=version)
+
+
+def get_compiled_rules(db: Session) -> CompiledRuleSet:
+    """
+    Return the compiled active rule set
+    Recompiled only when the rules table version changes
+    """
+    global _cached_rules
+
+    version = rule_set_version(db)
+    cached = _cached_rules
+    if cached is not None and cached.version == version:
+        return cached
+
+    compiled = compile_rules(db, version=version)
+    with _cache_lock:
+        _cached_rules = compiled
+    return compiled
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Integer, Date, Text, ForeignKey, DateTime, Boolean, Float, JSON
+from sqlalchemy import Column, String, Integer, BigInteger, Date, Text, ForeignKey, DateTime, Boolean, Float, JSON, Index, and_, event
 from sqlalchemy.orm import declarative_base, relationship
+from match_features import candidate_features, job_features, apply_features
 from datetime import datetime
 import uuid
 from uuid import uuid4
@@ -67,6 +68,14 @@ class Candidate(Base):
     tb_test_date = Column(Date)
     candidate_status = Column(String(50), default="active", nullable=False, index=True)
     
+    # Normalized matching features - derived from the columns above on every write (match_features)
+    specialty_key = Column(String(120), index=True)
+    state_mask = Column(BigInteger)
+    region_mask = Column(Integer)
+    availability_day = Column(Integer)
+    # Canonical specialty of primary_specialty (specialties table) - set on every write (specialty_map)
+    specialty_id = Column(Integer, index=True)
+    
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -83,6 +92,11 @@ class Candidate(Base):
     communications = relationship("CommunicationLog", back_populates="candidate")
     responses = relationship("CandidateResponse", back_populates="candidate")
     
+    # Keyset pagination order of GET /api/candidates (pagination.py)
+    __table_args__ = (
+        Index("ix_candidates_created_id", "created_at", "candidate_id"),
+    )
+    
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -147,6 +161,14 @@ class Job(Base):
     status = Column(String(50), default="open", index=True)
     urgency_level = Column(String(20), default="normal")
     
+    # Normalized matching features - derived from the columns above on every write (match_features)
+    specialty_key = Column(String(120), index=True)
+    state_mask = Column(BigInteger)
+    start_day = Column(Integer)
+    shift_code = Column(Integer)
+    # Canonical specialty of specialty_required (specialties table) - set on every write (specialty_map)
+    specialty_id = Column(Integer, index=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = Column(String(20), ForeignKey("users.user_id"))
@@ -154,6 +176,11 @@ class Job(Base):
     
     assignments = relationship("Assignment", back_populates="job")
     responses = relationship("CandidateResponse", back_populates="job")
+    
+    # Keyset pagination order of GET /api/jobs (pagination.py)
+    __table_args__ = (
+        Index("ix_jobs_created_id", "created_at", "job_id"),
+    )
 
 
 class Assignment(Base):
@@ -181,6 +208,12 @@ class Assignment(Base):
     
     candidate = relationship("Candidate", back_populates="assignments")
     job = relationship("Job", back_populates="assignments")
+    
+    # Keyset pagination orders of GET /api/assignments and /api/assignments/ending-soon (pagination.py)
+    __table_args__ = (
+        Index("ix_assignments_created_id", "created_at", "assignment_id"),
+        Index("ix_assignments_end_date_id", "end_date", "assignment_id"),
+    )
     expenses = relationship("Expense", back_populates="assignment")
 
 
@@ -232,6 +265,11 @@ class Document(Base):
     notes = Column(Text)
     
     candidate = relationship("Candidate", back_populates="documents")
+    
+    # Keyset pagination order of GET /api/documents (pagination.py)
+    __table_args__ = (
+        Index("ix_documents_uploaded_id", "uploaded_at", "document_id"),
+    )
 
 
 class Expense(Base):
@@ -256,6 +294,11 @@ class Expense(Base):
     
     candidate = relationship("Candidate", back_populates="expenses")
     assignment = relationship("Assignment", back_populates="expenses")
+    
+    # Keyset pagination order of GET /api/expenses (pagination.py)
+    __table_args__ = (
+        Index("ix_expenses_submitted_id", "submitted_at", "expense_id"),
+    )
 
 
 class Reference(Base):
@@ -309,6 +352,17 @@ class Alert(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     expires_at = Column(DateTime)
+    
+    __table_args__ = (
+        # At most one unread new_match alert per candidate/job - keeps matching reruns idempotent
+        Index(
+            "uq_alerts_unread_new_match", "candidate_id", "job_id", unique=True,
+            postgresql_where=and_(alert_type == "new_match", is_read == False),
+            sqlite_where=and_(alert_type == "new_match", is_read == False),
+        ),
+        # Keyset pagination order of GET /api/alerts (pagination.py)
+        Index("ix_alerts_created_id", "created_at", "alert_id"),
+    )
 
 
 class CommunicationLog(Base):
@@ -384,6 +438,12 @@ class MatchingRule(Base):
     rule_name = Column(String(200))
     rule_type = Column(String(50))
     rule_config = Column(JSON)
+    description = Column(Text)
+    
+    # Evaluated by MatchingEngine: conditions -> action (disqualify / bonus / penalty)
+    conditions = Column(JSON)
+    action = Column(String(50))
+    bonus_points = Column(Integer, default=0)
     
     priority = Column(Integer, default=1)
     is_active = Column(Boolean, default=True)
@@ -392,6 +452,141 @@ class MatchingRule(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class ScoringProfile(Base):
+    """Per-factor weights (maximum points) used instead of the default scoring weights"""
+    __tablename__ = "scoring_profiles"
+    
+    profile_id = Column(String(20), primary_key=True, default=lambda: generate_id("PRF"))
+    
+    name = Column(String(100), unique=True, nullable=False)
+    description = Column(Text)
+    
+    # Scope used by profile=auto - a facility profile wins over a specialty profile
+    specialty = Column(String(120), index=True)
+    facility = Column(String(200), index=True)
+    
+    # {"specialty": 30, "location": 25, "experience": 20, ...} - missing factors keep their default
+    weights = Column(JSON, nullable=False)
+    
+    is_active = Column(Boolean, default=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Specialty(Base):
+    """Canonical specialty - every spelling of it maps here through specialty_synonyms"""
+    __tablename__ = "specialties"
+    
+    specialty_id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(120), unique=True, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    synonyms = relationship("SpecialtySynonym", back_populates="specialty")
+
+
+class SpecialtySynonym(Base):
+    """Normalized specialty spelling ("icu", "intensive care", "ccu") -> canonical specialty"""
+    __tablename__ = "specialty_synonyms"
+    
+    synonym = Column(String(255), primary_key=True)
+    specialty_id = Column(Integer, ForeignKey("specialties.specialty_id"), nullable=False, index=True)
+    
+    # seed (built-in list), observed (seen on a candidate / job) or manual (edited through the API)
+    source = Column(String(20), default="observed")
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    specialty = relationship("Specialty", back_populates="synonyms")
+
+
+class MatchScore(Base):
+    """Materialized candidate-job match score (active candidates x open jobs)"""
+    __tablename__ = "match_scores"
+    
+    candidate_id = Column(String(20), ForeignKey("candidates.candidate_id"), primary_key=True)
+    job_id = Column(String(20), ForeignKey("jobs.job_id"), primary_key=True)
+    
+    score = Column(Integer, nullable=False)
+    details_hash = Column(String(40))
+    
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_match_scores_job_score", "job_id", "score"),
+        Index("ix_match_scores_candidate_score", "candidate_id", "score"),
+    )
+
+
+class MatchScoreBuild(Base):
+    """Record of a full match_scores rebuild"""
+    __tablename__ = "match_score_builds"
+    
+    build_id = Column(String(20), primary_key=True, default=lambda: generate_id("MSB"))
+    
+    rule_version = Column(String(100))
+    score_floor = Column(Integer)
+    
+    candidates_scored = Column(Integer, default=0)
+    jobs_scored = Column(Integer, default=0)
+    rows_written = Column(Integer, default=0)
+    
+    started_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, index=True)
+
+
+class MatchJob(Base):
+    """Background matching run (see match_jobs) - worked in chunks, resumable and cancellable"""
+    __tablename__ = "match_jobs"
+    
+    match_job_id = Column(String(20), primary_key=True, default=lambda: generate_id("MJB"))
+    
+    kind = Column(String(30), nullable=False)  # job_matches, candidate_matches, batch_match
+    params = Column(JSON)
+    
+    status = Column(String(20), default="queued", index=True)  # queued, running, completed, failed, cancelled
+    cancel_requested = Column(Boolean, default=False)
+    
+    # Progress - cursor is the last candidate_id processed, so a restarted run picks up after it
+    progress_done = Column(Integer, default=0)
+    progress_total = Column(Integer)
+    cursor = Column(String(20))
+    result_count = Column(Integer, default=0)
+    summary = Column(JSON)
+    error = Column(Text)
+    
+    worker_id = Column(String(100))
+    heartbeat_at = Column(DateTime)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    
+    results = relationship("MatchJobResult", back_populates="match_job", cascade="all, delete-orphan")
+
+
+class MatchJobResult(Base):
+    """One match found by a MatchJob"""
+    __tablename__ = "match_job_results"
+    
+    result_id = Column(Integer, primary_key=True, autoincrement=True)
+    match_job_id = Column(String(20), ForeignKey("match_jobs.match_job_id"), nullable=False)
+    
+    candidate_id = Column(String(20))
+    job_id = Column(String(20))
+    score = Column(Integer, nullable=False)
+    factors = Column(JSON)
+    rule_notes = Column(JSON)
+    
+    match_job = relationship("MatchJob", back_populates="results")
+    
+    __table_args__ = (
+        Index("ix_match_job_results_run_score", "match_job_id", "score"),
+    )
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -420,4 +615,29 @@ class User(Base):
 def create_all_tables(engine):
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
-    print("✅ All enhanced tables created successfully!")
\ No newline at end of file
+    print("✅ All enhanced tables created successfully!")
+
+
+# ==================== MATCHING FEATURES ====================
+
+@event.listens_for(Candidate, "before_insert")
+@event.listens_for(Candidate, "before_update")
+def _refresh_candidate_features(mapper, connection, target):
+    apply_features(target, candidate_features(target))
+    _refresh_specialty_id(connection, target, target.primary_specialty)
+
+
+@event.listens_for(Job, "before_insert")
+@event.listens_for(Job, "before_update")
+def _refresh_job_features(mapper, connection, target):
+    apply_features(target, job_features(target))
+    _refresh_specialty_id(connection, target, target.specialty_required)
+
+
+def _refresh_specialty_id(connection, target, raw_specialty):
+    # Imported here - specialty_map imports this module
+    from specialty_map import specialty_id_for
+    
+    specialty_id = specialty_id_for(connection, raw_specialty)
+    if target.specialty_id != specialty_id:
+        target.specialty_id = specialty_id
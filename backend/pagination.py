@@ -0,0 +1,158 @@
+import base64
+import json
+import os
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, and_, or_, tuple_
+
+
+# Estimated totals below this are recounted exactly (cheap for small result sets)
+EXACT_COUNT_BELOW = int(os.getenv("EXACT_COUNT_BELOW", "10000"))
+
+
+# ==================== CURSORS ====================
+# A cursor is the (sort value, primary key) of the row a page starts after,
+# plus the direction to read in - base64 JSON, opaque to clients
+
+def _key_name(sort_column, id_column) -> str:
+    return f"{sort_column.class_.__tablename__}.{sort_column.key}.{id_column.key}"
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(sort_column, value):
+    if value is None:
+        return None
+    if isinstance(sort_column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(sort_column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(sort_column, id_column, row, direction: str) -> str:
+    """Cursor pointing just past row, reading 'next' or 'prev'"""
+    payload = {
+        "k": _key_name(sort_column, id_column),
+        "v": _dump_value(getattr(row, sort_column.key)),
+        "id": getattr(row, id_column.key),
+        "d": direction,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(sort_column, id_column, cursor: str) -> Tuple[Any, Any, str]:
+    """(sort value, primary key, direction) of a cursor - ValueError if it isn't one of this listing's"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != _key_name(sort_column, id_column) or payload["d"] not in ("next", "prev"):
+            raise ValueError
+        return _load_value(sort_column, payload["v"]), payload["id"], payload["d"]
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+# ==================== KEYSET PAGES ====================
+# Rows are ordered by (sort column, primary key). NULL sort values order as the
+# largest, matching PostgreSQL's default, so the (sort, pk) index serves both directions
+
+def _after(sort_column, id_column, value, row_id, descending: bool):
+    """Rows strictly after (value, row_id) in the reading order"""
+    if descending:
+        if value is None:
+            return or_(sort_column.isnot(None), and_(sort_column.is_(None), id_column < row_id))
+        return tuple_(sort_column, id_column) < tuple_(value, row_id)
+    if value is None:
+        return and_(sort_column.is_(None), id_column > row_id)
+    return or_(tuple_(sort_column, id_column) > tuple_(value, row_id), sort_column.is_(None))
+
+
+def _ordered(query, sort_column, id_column, descending: bool):
+    if descending:
+        return query.order_by(sort_column.desc().nulls_first(), id_column.desc())
+    return query.order_by(sort_column.asc().nulls_last(), id_column.asc())
+
+
+class KeysetPage:
+    """One page of rows with the cursors of its neighbours (None at either end)"""
+
+    def __init__(self, rows: List, next_cursor: Optional[str], prev_cursor: Optional[str]):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def keyset_page(
+    query,
+    sort_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    skip: int = 0,
+) -> KeysetPage:
+    """
+    Page of query ordered by (sort_column, id_column), starting at cursor
+    Seeks through the index, so every page costs the same as the first
+    skip is the legacy offset, only honoured without a cursor
+    limit isn't capped - the frontend still loads whole lists in one request
+    """
+    limit = max(1, limit)
+    direction = "next"
+    if cursor:
+        value, row_id, direction = decode_cursor(sort_column, id_column, cursor)
+        # Reading backwards flips the order, then the page is reversed back
+        reading_descending = descending if direction == "next" else not descending
+        query = query.filter(_after(sort_column, id_column, value, row_id, reading_descending))
+        rows = _ordered(query, sort_column, id_column, reading_descending).limit(limit + 1).all()
+    else:
+        ordered = _ordered(query, sort_column, id_column, descending)
+        rows = (ordered.offset(skip) if skip else ordered).limit(limit + 1).all()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows, None, None)
+
+    has_next = more if direction == "next" else True
+    has_prev = (bool(cursor) or skip > 0) if direction == "next" else more
+    next_cursor = encode_cursor(sort_column, id_column, rows[-1], "next") if has_next else None
+    prev_cursor = encode_cursor(sort_column, id_column, rows[0], "prev") if has_prev else None
+    return KeysetPage(rows, next_cursor, prev_cursor)
+
+
+# ==================== TOTALS ====================
+
+def _planner_estimate(query) -> Optional[int]:
+    """PostgreSQL's row estimate for query (from EXPLAIN), None on other databases"""
+    bind = query.session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    compiled = query.statement.compile(dialect=bind.dialect)
+    connection = query.session.connection()
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(query, exact: bool = False) -> Tuple[int, bool]:
+    """
+    (total, is_estimate) of an unordered query
+    The planner estimate is used unless exact is asked for or the estimate is small
+    """
+    if not exact:
+        estimate = _planner_estimate(query)
+        if estimate is not None and estimate >= EXACT_COUNT_BELOW:
+            return estimate, True
+    return query.order_by(None).count(), False
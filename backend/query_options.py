@@ -0,0 +1,83 @@
+from typing import Dict, Tuple
+
+from sqlalchemy.orm import load_only, selectinload
+
+from models import Alert, Assignment, Candidate, Document, Expense, Job
+
+
+# ==================== LOADER OPTIONS ====================
+# One entry per endpoint: load_only the columns its response serializes, and
+# selectinload every relationship it touches (one extra SELECT per relationship
+# for the whole page instead of one lazy load per row). Keyset sort columns
+# (pagination.py) are loaded too - the page cursors are built from them
+
+_ASSIGNMENT_COLUMNS = (
+    Assignment.assignment_id, Assignment.candidate_id, Assignment.job_id,
+    Assignment.start_date, Assignment.end_date, Assignment.status, Assignment.created_at,
+)
+
+QUERY_OPTIONS: Dict[str, Tuple] = {
+    'candidate_list': (
+        load_only(
+            Candidate.candidate_id, Candidate.first_name, Candidate.last_name, Candidate.email, Candidate.phone,
+            Candidate.primary_specialty, Candidate.years_experience, Candidate.preferred_states,
+            Candidate.availability_date, Candidate.desired_contract_weeks, Candidate.candidate_status,
+            Candidate.created_at,
+        ),
+    ),
+    'job_list': (
+        load_only(
+            Job.job_id, Job.title, Job.specialty_required, Job.state, Job.facility, Job.city,
+            Job.min_years_experience, Job.contract_weeks, Job.start_date, Job.pay_rate_weekly, Job.status,
+            Job.created_at,
+        ),
+    ),
+    'job_detail_assignments': (
+        load_only(*_ASSIGNMENT_COLUMNS),
+        selectinload(Assignment.candidate).load_only(Candidate.candidate_id, Candidate.first_name, Candidate.last_name),
+    ),
+    'assignment_list': (
+        load_only(*_ASSIGNMENT_COLUMNS),
+        selectinload(Assignment.candidate).load_only(
+            Candidate.candidate_id, Candidate.first_name, Candidate.last_name, Candidate.email,
+        ),
+        selectinload(Assignment.job).load_only(Job.job_id, Job.facility, Job.state),
+    ),
+    'assignments_ending_soon': (
+        load_only(*_ASSIGNMENT_COLUMNS),
+        selectinload(Assignment.candidate).load_only(
+            Candidate.candidate_id, Candidate.first_name, Candidate.last_name, Candidate.email,
+            Candidate.phone, Candidate.primary_specialty,
+        ),
+        selectinload(Assignment.job).load_only(Job.job_id, Job.facility, Job.state, Job.specialty_required),
+    ),
+    # Candidates are scored, so every matching column is needed
+    'ending_assignment_matches': (
+        load_only(*_ASSIGNMENT_COLUMNS),
+        selectinload(Assignment.candidate),
+        selectinload(Assignment.job).load_only(Job.job_id, Job.facility, Job.state),
+    ),
+    'alert_list': (
+        load_only(
+            Alert.alert_id, Alert.alert_type, Alert.candidate_id, Alert.job_id, Alert.message, Alert.is_read,
+            Alert.created_at,
+        ),
+    ),
+    'document_list': (
+        load_only(
+            Document.document_id, Document.candidate_id, Document.document_type, Document.file_name,
+            Document.expiration_date, Document.status, Document.uploaded_at,
+        ),
+    ),
+    'expense_list': (
+        load_only(
+            Expense.expense_id, Expense.candidate_id, Expense.assignment_id, Expense.expense_type, Expense.amount,
+            Expense.description, Expense.status, Expense.submitted_at,
+        ),
+    ),
+}
+
+
+def query_options(name: str) -> Tuple:
+    """Loader options of one endpoint - query.options(*query_options('assignment_list'))"""
+    return QUERY_OPTIONS[name]
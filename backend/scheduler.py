@@ -4,6 +4,8 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from database import SessionLocal
 from matching_engine import MatchingEngine
+from match_scores import MatchScoreStore
+from batch_matching import BATCH_MATCH_WORKERS
 from notification_service import get_notification_service
 from datetime import datetime, date, timedelta
 from models import Alert, Assignment, Document
@@ -179,7 +181,8 @@ def batch_matching_job():
         engine = MatchingEngine(db)
         
         # Run batch matching with 70% minimum score
-        results = engine.batch_match_all_candidates(min_score=70)
+        print(f"   Workers: {BATCH_MATCH_WORKERS}\n")
+        results = engine.batch_match_all_candidates(min_score=70, workers=BATCH_MATCH_WORKERS)
         
         print(f"📊 Batch Matching Results:")
         print(f"   • Candidates processed: {results['candidates_processed']}")
@@ -197,6 +200,39 @@ def batch_matching_job():
         print(f"{'='*60}\n")
 
 
+def rebuild_match_scores_job():
+    """
+    Nightly job to rebuild the materialized match_scores table
+    Picks up rule changes and anything the incremental refresh missed
+    """
+    print(f"\n{'='*60}")
+    print(f"🧮 AUTOMATED REBUILD: Match Scores")
+    print(f"   Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*60}\n")
+    
+    db = SessionLocal()
+    
+    try:
+        store = MatchScoreStore(MatchingEngine(db, use_vectorized=True))
+        results = store.rebuild()
+        
+        print(f"📊 Match Score Rebuild Results:")
+        print(f"   • Candidates scored: {results['candidates_scored']}")
+        print(f"   • Jobs scored: {results['jobs_scored']}")
+        print(f"   • Rows written: {results['rows_written']}")
+        print(f"\n✅ Match score rebuild completed successfully")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ ERROR during match score rebuild:")
+        print(f"   {str(e)}")
+        traceback.print_exc()
+    
+    finally:
+        db.close()
+        print(f"{'='*60}\n")
+
+
 def cleanup_old_alerts_job():
     """
     Weekly job to clean up old read alerts
@@ -284,6 +320,16 @@ def start_scheduler():
     )
     print("✅ Scheduled: Cleanup Old Alerts (Weekly on Sunday at 2:00 AM)")
     
+    # Job 5: Rebuild match scores
+    scheduler.add_job(
+        rebuild_match_scores_job,
+        CronTrigger(hour=3, minute=0),
+        id='rebuild_match_scores',
+        name='Rebuild Match Scores',
+        replace_existing=True
+    )
+    print("✅ Scheduled: Rebuild Match Scores (Daily at 3:00 AM)")
+    
     # Start the scheduler
     scheduler.start()
     
@@ -309,13 +355,14 @@ def run_job_manually(job_name: str):
     
     Args:
         job_name: Name of the job to run
-                 Options: 'assignments', 'documents', 'matching', 'cleanup'
+                 Options: 'assignments', 'documents', 'matching', 'cleanup', 'scores'
     """
     jobs = {
         'assignments': scan_ending_assignments_job,
         'documents': scan_expiring_documents_job,
         'matching': batch_matching_job,
-        'cleanup': cleanup_old_alerts_job
+        'cleanup': cleanup_old_alerts_job,
+        'scores': rebuild_match_scores_job
     }
     
     if job_name not in jobs:
@@ -342,6 +389,7 @@ if __name__ == "__main__":
         print("  • documents    - Scan expiring documents")
         print("  • matching     - Run batch matching")
         print("  • cleanup      - Clean up old alerts")
+        print("  • scores       - Rebuild match score table")
         print("\nExample:")
         print("  python scheduler.py assignments")
         print("\n" + "="*60 + "\n")
\ No newline at end of file
@@ -0,0 +1,165 @@
+import json
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import ScoringProfile
+from vectorized_scoring import FACTORS
+
+
+# Maximum points per factor of the built-in scorer (MatchingEngine.scoring_weights)
+DEFAULT_WEIGHTS = {
+    'specialty': 30,
+    'location': 25,
+    'experience': 20,
+    'availability': 15,
+    'contract_duration': 5,
+    'shift_preference': 3,
+    'housing': 2,
+}
+_DEFAULT_VECTOR = np.array([DEFAULT_WEIGHTS[factor] for factor in FACTORS], dtype=np.int64)
+
+# profile=auto picks the job's facility profile, then its specialty profile
+AUTO_PROFILE = "auto"
+
+
+def validate_weights(weights: Dict) -> Dict[str, int]:
+    """Check a weights dict (known factors, whole points 0-100); raises ValueError"""
+    if not isinstance(weights, dict) or not weights:
+        raise ValueError("weights must be a non-empty object")
+    clean = {}
+    for factor, value in weights.items():
+        if factor not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Unknown factor '{factor}' (expected one of: {', '.join(FACTORS)})")
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 100:
+            raise ValueError(f"Weight for '{factor}' must be a whole number between 0 and 100")
+        clean[factor] = value
+    return clean
+
+
+def _scale(points, weights, defaults):
+    """points * weight / default, rounded half up - integer math so every path agrees"""
+    return (points * weights * 2 + defaults) // (defaults * 2)
+
+
+class CompiledProfile:
+    """A ScoringProfile decoded once into a weight vector"""
+
+    def __init__(self, profile):
+        self.profile_id = profile.profile_id
+        self.name = profile.name
+        self.specialty = profile.specialty
+        self.facility = profile.facility
+        weights = profile.weights if isinstance(profile.weights, dict) else json.loads(profile.weights)
+        weights = validate_weights(weights)
+        self.weights: Tuple[int, ...] = tuple(weights.get(factor, DEFAULT_WEIGHTS[factor]) for factor in FACTORS)
+        self.vector = np.array(self.weights, dtype=np.int64)
+        self.max_other = sum(self.weights[2:])
+
+    def scale_points(self, factor_index: int, points: int) -> int:
+        return int(_scale(points, self.weights[factor_index], int(_DEFAULT_VECTOR[factor_index])))
+
+    def scale(self, factors: Dict[str, int]) -> Dict[str, int]:
+        """Per-pair factor points -> weighted points"""
+        return {factor: self.scale_points(i, factors[factor]) for i, factor in enumerate(FACTORS)}
+
+    def scale_matrix(self, factors: np.ndarray) -> np.ndarray:
+        """Factor matrix (len(FACTORS), n) -> weighted factor matrix"""
+        return scale_matrix(factors, self.vector[:, None])
+
+
+def scale_matrix(factors: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted factor matrix for a (len(FACTORS), 1) or (len(FACTORS), n) weight array"""
+    return _scale(factors.astype(np.int64), weights, _DEFAULT_VECTOR[:, None]).astype(np.int32)
+
+
+class ProfileSet:
+    """All active scoring profiles, compiled once per profile-table version"""
+
+    def __init__(self, profiles: List[CompiledProfile], version=None):
+        self.version = version
+        self.profiles = profiles
+        self.by_key = {}
+        self.by_facility = {}
+        self.by_specialty = {}
+        for profile in profiles:
+            self.by_key[profile.profile_id] = profile
+            self.by_key[profile.name] = profile
+            if profile.facility:
+                self.by_facility.setdefault(profile.facility, profile)
+            if profile.specialty:
+                self.by_specialty.setdefault(profile.specialty.lower(), profile)
+        self._job_weights = weakref.WeakKeyDictionary()
+
+    def __contains__(self, selector) -> bool:
+        return selector == AUTO_PROFILE or selector in self.by_key
+
+    def resolve(self, selector: str, job) -> Optional[CompiledProfile]:
+        """Profile for one job (None = default weights)"""
+        if selector != AUTO_PROFILE:
+            return self.by_key.get(selector)
+        profile = self.by_facility.get(job.facility) if isinstance(getattr(job, 'facility', None), str) else None
+        if profile is None and isinstance(job.specialty_required, str):
+            profile = self.by_specialty.get(job.specialty_required.lower())
+        return profile
+
+    def job_weights(self, selector: str, pool) -> np.ndarray:
+        """(len(FACTORS), n) weights of every job in a JobPool, cached per pool"""
+        cached = self._job_weights.setdefault(pool, {})
+        weights = cached.get(selector)
+        if weights is None:
+            weights = np.repeat(_DEFAULT_VECTOR[:, None], pool.n, axis=1)
+            for i, row in enumerate(pool.rows):
+                profile = self.resolve(selector, row)
+                if profile is not None:
+                    weights[:, i] = profile.vector
+            cached[selector] = weights
+        return weights
+
+
+# ==================== LOADING / CACHE ====================
+
+_cache_lock = threading.Lock()
+_cached_profiles: Optional[ProfileSet] = None
+
+
+def profile_set_version(db: Session) -> Tuple:
+    """Cheap version stamp of the profiles table (row count + last update)"""
+    count, last_updated = db.query(
+        func.count(ScoringProfile.profile_id), func.max(ScoringProfile.updated_at)
+    ).one()
+    return (count, last_updated)
+
+
+def compile_profiles(db: Session, version=None) -> ProfileSet:
+    """Load active profiles and compile them (invalid ones are skipped)"""
+    compiled = []
+    rows = db.query(ScoringProfile).filter(ScoringProfile.is_active == True).order_by(ScoringProfile.created_at).all()
+    for profile in rows:
+        try:
+            compiled.append(CompiledProfile(profile))
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ Skipping scoring profile {profile.name}: {e}")
+    return ProfileSet(compiled, version=version)
+
+
+def get_scoring_profiles(db: Session) -> ProfileSet:
+    """
+    Return the compiled active profiles
+    Recompiled only when the profiles table version changes
+    """
+    global _cached_profiles
+
+    version = profile_set_version(db)
+    cached = _cached_profiles
+    if cached is not None and cached.version == version:
+        return cached
+
+    compiled = compile_profiles(db, version=version)
+    with _cache_lock:
+        _cached_profiles = compiled
+    return compiled
@@ -0,0 +1,388 @@
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job, Specialty, SpecialtySynonym
+from match_features import parse_members
+
+
+# Seconds a write-time lookup table is trusted before it is reloaded (picks up other processes' edits)
+SPECIALTY_MAP_TTL = int(os.getenv("SPECIALTY_MAP_TTL", "300"))
+
+SYNONYM_MAX_LENGTH = 255
+NAME_MAX_LENGTH = 120
+
+# Credential / role words that don't change which unit a specialty is ("CCU RN", "ICU Travel Nurse")
+NOISE_WORDS = {'rn', 'bsn', 'lpn', 'lvn', 'nurse', 'registered', 'travel', 'traveler', 'unit'}
+
+# Built-in synonyms, seeded by rebuild_specialty_map - edits made through the API are never overwritten
+SEED_SYNONYMS = {
+    'ICU': ['Intensive Care', 'Critical Care', 'CCU', 'MICU', 'SICU', 'CVICU', 'Coronary Care'],
+    'ER': ['ED', 'Emergency', 'Emergency Room', 'Emergency Department'],
+    'Med-Surg': ['Med Surg', 'MedSurg', 'Medical Surgical', 'M/S'],
+    'Telemetry': ['Tele'],
+    'Step-Down': ['Stepdown', 'PCU', 'Progressive Care'],
+    'OR': ['Operating Room', 'Perioperative', 'Periop'],
+    'L&D': ['Labor and Delivery', 'LD'],
+    'PACU': ['Post Anesthesia Care', 'Recovery Room'],
+    'NICU': ['Neonatal ICU', 'Neonatal Intensive Care'],
+    'PICU': ['Pediatric ICU', 'Pediatric Intensive Care'],
+    'Oncology': ['Onc', 'Oncology Nursing'],
+    'Cath Lab': ['Cardiac Cath Lab', 'Cardiac Catheterization'],
+    'Respiratory Therapist': ['RT', 'Respiratory Therapy', 'RRT'],
+    'Physical Therapist': ['PT', 'Physical Therapy'],
+    'Rad Tech': ['Radiology Tech', 'Radiologic Technologist', 'X-Ray Tech'],
+    'CT Tech': ['CT Technologist'],
+    'Surgical Tech': ['Surgical Technologist', 'Scrub Tech'],
+}
+
+
+# ==================== NORMALIZATION ====================
+
+def normalize_specialty(value) -> Optional[str]:
+    """
+    Lookup key of a specialty spelling: lowercased, punctuation folded to
+    spaces and credential words dropped ("CCU RN" -> "ccu", "Med-Surg" -> "med surg")
+    Equal strings (ignoring case) always get the same key
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    words = re.sub(r'[^a-z0-9+]+', ' ', value.lower().replace('&', ' and ')).split()
+    kept = [word for word in words if word not in NOISE_WORDS]
+    return ' '.join(kept or words) or value.lower()
+
+
+def _raw_members(value) -> Iterable:
+    """Members of a sub_specialties / sub_specialties_accepted column"""
+    if not value:
+        return []
+    parsed = value if isinstance(value, (list, dict)) else json.loads(value)
+    if isinstance(parsed, dict):
+        return list(parsed.keys())
+    return parsed if isinstance(parsed, list) else []
+
+
+# ==================== SPECIALTY MAP ====================
+
+class SpecialtyMap:
+    """
+    Normalized spelling -> specialty_id lookup used by canonical specialty matching
+
+    Spellings missing from the table get a negative id local to this map, so
+    two rows with the same unknown spelling still match each other.
+    """
+
+    def __init__(self, ids: Dict[str, int], names: Dict[int, str], version=None):
+        self.ids = ids
+        self.names = names
+        self.version = version
+        self._unknown: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def id_for(self, value) -> Optional[int]:
+        """Specialty id of a raw spelling (None for empty values)"""
+        key = normalize_specialty(value)
+        if key is None:
+            return None
+        specialty_id = self.ids.get(key)
+        if specialty_id is None:
+            with self._lock:
+                specialty_id = self._unknown.setdefault(key, -1 - len(self._unknown))
+        return specialty_id
+
+    def row_id(self, stored: Optional[int], value) -> Optional[int]:
+        """Specialty id of a candidate / job: the specialty_id stamped at write time, else a lookup"""
+        return stored if stored is not None else self.id_for(value)
+
+    def ids_for(self, value) -> Set[int]:
+        """Specialty ids of a sub-specialty list column"""
+        ids = set()
+        for member in _raw_members(value):
+            specialty_id = self.id_for(member) if isinstance(member, str) else None
+            if specialty_id is not None:
+                ids.add(specialty_id)
+        return ids
+
+
+def specialty_map_version(db) -> Tuple:
+    """Cheap version stamp of the synonym table (row count + last update)"""
+    count, last_updated = db.execute(
+        select(func.count(SpecialtySynonym.synonym), func.max(SpecialtySynonym.updated_at))
+    ).one()
+    return (count, last_updated)
+
+
+def load_specialty_map(db, version=None) -> SpecialtyMap:
+    """Load the synonym and specialty tables (db may be a Session or a Connection)"""
+    ids = dict(db.execute(select(SpecialtySynonym.synonym, SpecialtySynonym.specialty_id)).all())
+    names = dict(db.execute(select(Specialty.specialty_id, Specialty.name)).all())
+    return SpecialtyMap(ids, names, version=version)
+
+
+_cache_lock = threading.Lock()
+_cached_map: Optional[SpecialtyMap] = None
+
+
+def get_specialty_map(db: Session) -> SpecialtyMap:
+    """
+    Return the current SpecialtyMap
+    Reloaded only when the synonym table version changes
+    """
+    global _cached_map
+
+    version = specialty_map_version(db)
+    cached = _cached_map
+    if cached is not None and cached.version == version:
+        return cached
+
+    loaded = load_specialty_map(db, version=version)
+    with _cache_lock:
+        _cached_map = loaded
+    return loaded
+
+
+# ==================== WRITE TIME ====================
+
+_write_ids: Dict[str, int] = {}
+_write_loaded_at: Optional[float] = None
+
+
+def specialty_id_for(connection, value) -> Optional[int]:
+    """
+    Specialty id to stamp on a candidate / job being written
+    Spellings not in the synonym table yet are registered as a new specialty
+    """
+    global _write_ids, _write_loaded_at
+
+    key = normalize_specialty(value)
+    if key is None or len(key) > SYNONYM_MAX_LENGTH:
+        return None
+
+    if _write_loaded_at is None or time.monotonic() - _write_loaded_at > SPECIALTY_MAP_TTL:
+        ids = dict(connection.execute(select(SpecialtySynonym.synonym, SpecialtySynonym.specialty_id)).all())
+        with _cache_lock:
+            _write_ids, _write_loaded_at = ids, time.monotonic()
+
+    specialty_id = _write_ids.get(key)
+    if specialty_id is None:
+        # Not cached until the next reload - this transaction may still roll back
+        specialty_id = connection.execute(
+            select(SpecialtySynonym.specialty_id).where(SpecialtySynonym.synonym == key)
+        ).scalar()
+    if specialty_id is None:
+        specialty_id = _register(connection, key, value.strip()[:NAME_MAX_LENGTH] or key)
+    return specialty_id
+
+
+def _insert_ignoring_conflicts(connection, model):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+def _register(connection, key: str, name: str) -> int:
+    """Add a specialty named after its first spelling, plus that spelling as its synonym"""
+    now = datetime.utcnow()
+    connection.execute(_insert_ignoring_conflicts(connection, Specialty).values(name=name, created_at=now))
+    specialty_id = connection.execute(select(Specialty.specialty_id).where(Specialty.name == name)).scalar()
+    connection.execute(_insert_ignoring_conflicts(connection, SpecialtySynonym).values(
+        synonym=key, specialty_id=specialty_id, source="observed", created_at=now, updated_at=now
+    ))
+    # A concurrent writer may have registered the spelling first
+    return connection.execute(
+        select(SpecialtySynonym.specialty_id).where(SpecialtySynonym.synonym == key)
+    ).scalar()
+
+
+# ==================== MAINTENANCE ====================
+
+def _specialty_by_name(db: Session, name: str) -> int:
+    specialty = db.query(Specialty).filter(Specialty.name == name).first()
+    if specialty is None:
+        specialty = Specialty(name=name)
+        db.add(specialty)
+        db.flush()
+    return specialty.specialty_id
+
+
+def _specialty_named(db: Session, name: str, ids: Dict[str, int], key: Optional[str] = None) -> int:
+    """Id of the specialty a spelling maps to, registering it (as its own specialty) if new"""
+    key = key or normalize_specialty(name)
+    if key not in ids:
+        ids[key] = _specialty_by_name(db, name)
+        db.add(SpecialtySynonym(synonym=key, specialty_id=ids[key], source="observed"))
+    return ids[key]
+
+
+def _specialty_values(db: Session) -> Set[str]:
+    """Every specialty spelling in use (the /api/specialties values plus sub-specialty lists)"""
+    values = set()
+    for column in (Candidate.primary_specialty, Job.specialty_required):
+        values.update(value for (value,) in db.query(column).distinct() if value)
+    for column in (Candidate.sub_specialties, Job.sub_specialties_accepted):
+        for (value,) in db.query(column).filter(column.isnot(None)).yield_per(5000):
+            try:
+                values.update(member for member in _raw_members(value) if isinstance(member, str) and member)
+            except ValueError:
+                continue
+    return {value for value in values if len(normalize_specialty(value)) <= SYNONYM_MAX_LENGTH}
+
+
+def rebuild_specialty_map(db: Session) -> Dict:
+    """
+    Seed the built-in synonyms, register every specialty spelling in use
+    and re-stamp specialty_id on every candidate and job
+    """
+    ids = dict(db.query(SpecialtySynonym.synonym, SpecialtySynonym.specialty_id).all())
+    sources = dict(db.query(SpecialtySynonym.synonym, SpecialtySynonym.source).all())
+    known = len(ids)
+
+    for name, synonyms in SEED_SYNONYMS.items():
+        specialty_id = _specialty_named(db, name, ids)
+        for synonym in synonyms:
+            key = normalize_specialty(synonym)
+            if key not in ids:
+                db.add(SpecialtySynonym(synonym=key, specialty_id=specialty_id, source="seed"))
+            elif sources.get(key) == "observed" and ids[key] != specialty_id:
+                # A spelling first seen on a row became its own specialty - the built-in synonym wins
+                db.query(SpecialtySynonym).filter(SpecialtySynonym.synonym == key).update(
+                    {'specialty_id': specialty_id, 'source': "seed"}, synchronize_session=False
+                )
+            ids[key] = specialty_id
+
+    for value in sorted(_specialty_values(db)):
+        _specialty_named(db, value.strip()[:NAME_MAX_LENGTH] or value, ids, key=normalize_specialty(value))
+    db.commit()
+
+    results = {'synonyms_added': len(ids) - known}
+    results.update(assign_specialty_ids(db))
+    return results
+
+
+def set_specialty_synonym(db: Session, synonym: str, specialty_name: str) -> SpecialtySynonym:
+    """Map a spelling to a canonical specialty (created if new), then re-stamp affected rows"""
+    key = normalize_specialty(synonym)
+    if key is None or len(key) > SYNONYM_MAX_LENGTH:
+        raise ValueError("synonym must be a non-empty string")
+    if not isinstance(specialty_name, str) or not specialty_name.strip():
+        raise ValueError("specialty must be a non-empty string")
+
+    name = specialty_name.strip()[:NAME_MAX_LENGTH]
+    if normalize_specialty(name) == key:
+        # Split the spelling off as a specialty of its own
+        specialty_id = _specialty_by_name(db, name)
+    else:
+        ids = dict(db.query(SpecialtySynonym.synonym, SpecialtySynonym.specialty_id).all())
+        specialty_id = _specialty_named(db, name, ids)
+
+    row = db.query(SpecialtySynonym).filter(SpecialtySynonym.synonym == key).first()
+    if row is None:
+        row = SpecialtySynonym(synonym=key)
+        db.add(row)
+    row.specialty_id = specialty_id
+    row.source = "manual"
+    db.commit()
+
+    assign_specialty_ids(db)
+    return row
+
+
+def assign_specialty_ids(db: Session) -> Dict:
+    """Re-stamp specialty_id from the current synonym table (one UPDATE per distinct spelling)"""
+    global _write_loaded_at
+
+    specialties = load_specialty_map(db)
+    counts = {}
+    for model, column in ((Candidate, Candidate.primary_specialty), (Job, Job.specialty_required)):
+        updated = 0
+        for (value,) in db.query(column).distinct().all():
+            key = normalize_specialty(value)
+            specialty_id = specialties.ids.get(key) if key is not None else None
+            target = model.specialty_id
+            stale = target.is_(None) if specialty_id is not None else target.isnot(None)
+            if specialty_id is not None:
+                stale = or_(stale, target != specialty_id)
+            value_filter = column == value if value is not None else column.is_(None)
+            result = db.execute(
+                update(model).where(value_filter, stale).values(specialty_id=specialty_id),
+                execution_options={'synchronize_session': False}
+            )
+            updated += result.rowcount or 0
+        db.commit()
+        counts[f'{model.__tablename__}_updated'] = updated
+
+    # Writers pick up the edit immediately in this process
+    _write_loaded_at = None
+    return counts
+
+
+# ==================== POOL COLUMNS ====================
+
+class CanonicalCandidateSpecialties:
+    """Specialty ids of a CandidatePool's rows - primary (0 = none) and a sub-specialty index"""
+
+    def __init__(self, pool, specialties: SpecialtyMap):
+        self.primary = np.zeros(pool.n, dtype=np.int64)
+        by_primary, sub_specialties = {}, {}
+        for i, row in enumerate(pool.rows):
+            if pool.irregular[i]:
+                continue
+            if pool.has_specialty[i]:
+                specialty_id = specialties.row_id(getattr(row, 'specialty_id', None), row.primary_specialty)
+                self.primary[i] = specialty_id
+                by_primary.setdefault(specialty_id, []).append(i)
+            if row.sub_specialties:
+                for specialty_id in specialties.ids_for(list(parse_members(row.sub_specialties))):
+                    sub_specialties.setdefault(specialty_id, []).append(i)
+        self.by_primary = {key: np.array(rows, dtype=np.int64) for key, rows in by_primary.items()}
+        self.sub_specialties = {key: np.array(rows, dtype=np.int64) for key, rows in sub_specialties.items()}
+
+
+class CanonicalJobSpecialties:
+    """Specialty ids of a JobPool's rows - required (0 = none) and an accepted-specialty index"""
+
+    def __init__(self, pool, specialties: SpecialtyMap):
+        self.required = np.zeros(pool.n, dtype=np.int64)
+        accepted = {}
+        for i, row in enumerate(pool.rows):
+            if pool.irregular[i]:
+                continue
+            if pool.has_specialty[i]:
+                self.required[i] = specialties.row_id(getattr(row, 'specialty_id', None), row.specialty_required)
+            if row.sub_specialties_accepted:
+                for specialty_id in specialties.ids_for(list(parse_members(row.sub_specialties_accepted))):
+                    accepted.setdefault(specialty_id, []).append(i)
+        self.accepted = {key: np.array(rows, dtype=np.int64) for key, rows in accepted.items()}
+
+
+_pool_lock = threading.Lock()
+_pool_specialties = weakref.WeakKeyDictionary()
+
+
+def get_pool_specialties(pool, specialties: SpecialtyMap):
+    """Canonical specialty columns for a Candidate/JobPool, built once per pool and map"""
+    cached = _pool_specialties.get(pool)
+    if cached is not None and cached[0] is specialties:
+        return cached[1]
+    build = CanonicalJobSpecialties if hasattr(pool, 'accepted') else CanonicalCandidateSpecialties
+    columns = build(pool, specialties)
+    with _pool_lock:
+        _pool_specialties[pool] = (specialties, columns)
+    return columns
@@ -0,0 +1,90 @@
+import os
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# off: nothing is counted | warn: log requests over budget | strict: answer 500 instead (tests / CI)
+SQL_BUDGET_MODE = os.getenv("SQL_BUDGET_MODE", "off").lower()
+
+# Most SQL statements one request to the endpoint may issue, whatever the page size
+# (list endpoints: planner estimate + exact count when small + page + one per selectinload)
+STATEMENT_BUDGETS: Dict[str, int] = {
+    'get_candidates': 3,
+    'get_jobs': 3,
+    'get_job': 3,
+    'get_assignments': 5,
+    'get_assignments_ending_soon': 5,
+    'get_ending_assignments_with_matches': 6,
+    'get_alerts': 3,
+    'get_documents': 3,
+    'get_expenses': 3,
+}
+
+# Statements issued so far by the current request (None outside a counted request)
+_statements: ContextVar[Optional[List[int]]] = ContextVar("sql_statements", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class StatementCounter:
+    """Counts the SQL statements run while it is active (same thread / task context)"""
+
+    def __init__(self):
+        self._counter = [0]
+        self._token = None
+
+    @property
+    def count(self) -> int:
+        return self._counter[0]
+
+    def __enter__(self):
+        self._token = _statements.set(self._counter)
+        return self
+
+    def __exit__(self, *exc):
+        _statements.reset(self._token)
+        return False
+
+
+def over_budget(endpoint_name: str, count: int) -> Optional[int]:
+    """The endpoint's budget if count exceeds it, else None"""
+    budget = STATEMENT_BUDGETS.get(endpoint_name)
+    return budget if budget is not None and count > budget else None
+
+
+def install_statement_budget(app, mode: str = SQL_BUDGET_MODE):
+    """
+    Count SQL statements per request and check them against STATEMENT_BUDGETS
+    Every counted response carries an X-SQL-Statements header
+    """
+    if mode not in ("warn", "strict"):
+        return
+
+    from fastapi.responses import JSONResponse
+
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+
+    @app.middleware("http")
+    async def statement_budget_middleware(request, call_next):
+        with StatementCounter() as counter:
+            response = await call_next(request)
+
+        endpoint = request.scope.get("endpoint")
+        name = getattr(endpoint, "__name__", None)
+        budget = over_budget(name, counter.count) if name else None
+        if budget is not None:
+            message = f"{name} issued {counter.count} SQL statements (budget {budget})"
+            if mode == "strict":
+                response = JSONResponse(status_code=500, content={"detail": f"Statement budget exceeded: {message}"})
+            else:
+                print(f"⚠️  Statement budget exceeded: {message}")
+        response.headers["X-SQL-Statements"] = str(counter.count)
+        return response
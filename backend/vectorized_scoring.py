@@ -0,0 +1,564 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import Candidate, Job
+from match_features import (
+    US_STATES, REGION_NAMES, SHIFT_TYPES, parse_members, day_ordinal
+)
+from geo_distance import job_point, candidate_distance_points, get_job_points
+from specialty_map import get_pool_specialties
+
+
+# Factor order of the score matrix rows (same order as MatchingEngine.scoring_weights)
+FACTORS = (
+    'specialty',
+    'location',
+    'experience',
+    'availability',
+    'contract_duration',
+    'shift_preference',
+    'housing',
+)
+
+# Columns needed to score / apply rules - full ORM rows are only loaded for matches
+CANDIDATE_POOL_COLUMNS = (
+    Candidate.candidate_id,
+    Candidate.primary_specialty,
+    Candidate.sub_specialties,
+    Candidate.years_experience,
+    Candidate.preferred_states,
+    Candidate.preferred_regions,
+    Candidate.availability_date,
+    Candidate.desired_contract_weeks,
+    Candidate.specialty_key,
+    Candidate.state_mask,
+    Candidate.region_mask,
+    Candidate.availability_day,
+    Candidate.specialty_id,
+)
+
+JOB_POOL_COLUMNS = (
+    Job.job_id,
+    Job.specialty_required,
+    Job.sub_specialties_accepted,
+    Job.state,
+    Job.min_years_experience,
+    Job.start_date,
+    Job.contract_weeks,
+    Job.shift_type,
+    Job.housing_stipend,
+    Job.zip_code,
+    Job.specialty_key,
+    Job.start_day,
+    Job.shift_code,
+    Job.specialty_id,
+)
+
+
+# ==================== VALUE NORMALIZATION ====================
+
+_members = parse_members
+_ordinal = day_ordinal
+
+
+class _Codes:
+    """String -> int code table for one pool column"""
+
+    def __init__(self):
+        self.codes = {}
+
+    def encode(self, value) -> int:
+        return self.codes.setdefault(value, len(self.codes))
+
+    def lookup(self, value) -> int:
+        return self.codes.get(value, -2)
+
+    def lookup_many(self, values) -> np.ndarray:
+        return np.array([self.codes[v] for v in values if v in self.codes], dtype=np.int32)
+
+
+def _postings(index: Dict, n: int, key) -> np.ndarray:
+    """Boolean row mask for an inverted index entry"""
+    mask = np.zeros(n, dtype=bool)
+    rows = index.get(key)
+    if rows is not None:
+        mask[rows] = True
+    return mask
+
+
+def _add_mask_postings(index: Dict, masks: np.ndarray, has_mask: np.ndarray, names):
+    """Add rows described by a feature bitmask to an inverted index (one vector op per bit)"""
+    if not has_mask.any():
+        return
+    for bit, name in enumerate(names):
+        rows = np.flatnonzero(has_mask & ((masks >> bit) & 1).astype(bool))
+        if len(rows):
+            index.setdefault(name, []).extend(rows.tolist())
+
+
+def _freeze(index: Dict) -> Dict:
+    return {key: np.array(rows, dtype=np.int64) for key, rows in index.items()}
+
+
+# ==================== POOLS ====================
+
+class CandidatePool:
+    """
+    Columnar snapshot of the active candidate pool
+    Used to score one job against every candidate in a single pass
+    """
+
+    def __init__(self, rows: List):
+        self.rows = rows
+        self.ids = [row.candidate_id for row in rows]
+        n = self.n = len(rows)
+
+        self.specialty_codes = _Codes()
+        self.primary_codes = _Codes()
+        self.shift_codes = _Codes()
+
+        self.has_specialty = np.zeros(n, dtype=bool)
+        self.specialty = np.full(n, -1, dtype=np.int32)
+        self.primary = np.full(n, -1, dtype=np.int32)
+        self.has_states = np.zeros(n, dtype=bool)
+        self.years = np.zeros(n, dtype=np.int64)
+        self.years_known = np.zeros(n, dtype=bool)
+        self.has_availability = np.zeros(n, dtype=bool)
+        self.availability = np.zeros(n, dtype=np.int64)
+        self.desired_weeks = np.zeros(n, dtype=np.int64)
+        self.has_shift = np.zeros(n, dtype=bool)
+        self.shift = np.full(n, -1, dtype=np.int32)
+        self.needs_housing = np.zeros(n, dtype=bool)
+        self.irregular = np.zeros(n, dtype=bool)
+
+        sub_specialties, states, regions = {}, {}, {}
+        # Rows whose normalized feature columns can stand in for the raw JSON / date columns
+        state_masks = np.zeros(n, dtype=np.int64)
+        has_state_mask = np.zeros(n, dtype=bool)
+        region_masks = np.zeros(n, dtype=np.int64)
+        has_region_mask = np.zeros(n, dtype=bool)
+
+        for i, row in enumerate(rows):
+            try:
+                # Raw code is kept for every row (None / '' included) for exact rule comparisons
+                self.primary[i] = self.primary_codes.encode(row.primary_specialty)
+                if row.primary_specialty:
+                    self.has_specialty[i] = True
+                    specialty_key = row.specialty_key if row.specialty_key is not None else row.primary_specialty.lower()
+                    self.specialty[i] = self.specialty_codes.encode(specialty_key)
+                if row.sub_specialties:
+                    for member in _members(row.sub_specialties):
+                        sub_specialties.setdefault(member, []).append(i)
+                if row.preferred_states:
+                    self.has_states[i] = True
+                    if row.state_mask is not None:
+                        state_masks[i] = row.state_mask
+                        has_state_mask[i] = True
+                    else:
+                        for member in _members(row.preferred_states):
+                            states.setdefault(member, []).append(i)
+                    if row.preferred_regions:
+                        if row.region_mask is not None:
+                            region_masks[i] = row.region_mask
+                            has_region_mask[i] = True
+                        else:
+                            for member in _members(row.preferred_regions):
+                                regions.setdefault(member, []).append(i)
+                self.years[i] = row.years_experience or 0
+                self.years_known[i] = row.years_experience is not None
+                if row.availability_date:
+                    self.has_availability[i] = True
+                    self.availability[i] = row.availability_day if row.availability_day is not None else _ordinal(row.availability_date)
+                self.desired_weeks[i] = row.desired_contract_weeks or 0
+                # Optional preference columns - absent on the current model, scored as neutral
+                preferred_shift = getattr(row, 'preferred_shift', None)
+                if preferred_shift:
+                    self.has_shift[i] = True
+                    self.shift[i] = self.shift_codes.encode(preferred_shift.lower())
+                self.needs_housing[i] = bool(getattr(row, 'needs_housing', None))
+            except Exception:
+                self.irregular[i] = True
+
+        _add_mask_postings(states, state_masks, has_state_mask, US_STATES)
+        _add_mask_postings(regions, region_masks, has_region_mask, REGION_NAMES)
+
+        self.sub_specialties = _freeze(sub_specialties)
+        self.states = _freeze(states)
+        self.regions = _freeze(regions)
+
+    def __len__(self):
+        return self.n
+
+
+class JobPool:
+    """
+    Columnar snapshot of the open job pool
+    Used to score one candidate against every open job in a single pass
+    """
+
+    def __init__(self, rows: List, region_of):
+        self.rows = rows
+        self.ids = [row.job_id for row in rows]
+        n = self.n = len(rows)
+
+        self.specialty_codes = _Codes()
+        self.specialty_raw_codes = _Codes()
+        self.state_codes = _Codes()
+        self.region_codes = _Codes()
+        self.shift_codes = _Codes()
+
+        self.has_specialty = np.zeros(n, dtype=bool)
+        self.specialty = np.full(n, -1, dtype=np.int32)
+        self.specialty_raw = np.full(n, -1, dtype=np.int32)
+        self.has_state = np.zeros(n, dtype=bool)
+        self.state = np.full(n, -1, dtype=np.int32)
+        self.region = np.full(n, -1, dtype=np.int32)
+        self.min_years = np.zeros(n, dtype=np.int64)
+        self.has_start = np.zeros(n, dtype=bool)
+        self.start = np.zeros(n, dtype=np.int64)
+        self.contract_weeks = np.zeros(n, dtype=np.int64)
+        self.has_shift = np.zeros(n, dtype=bool)
+        self.shift = np.full(n, -1, dtype=np.int32)
+        self.housing = np.zeros(n, dtype=bool)
+        self.irregular = np.zeros(n, dtype=bool)
+
+        accepted = {}
+
+        for i, row in enumerate(rows):
+            try:
+                # Raw codes are kept for every row (None / '' included) for exact rule comparisons
+                self.specialty_raw[i] = self.specialty_raw_codes.encode(row.specialty_required)
+                self.state[i] = self.state_codes.encode(row.state)
+                if row.specialty_required:
+                    self.has_specialty[i] = True
+                    specialty_key = row.specialty_key if row.specialty_key is not None else row.specialty_required.lower()
+                    self.specialty[i] = self.specialty_codes.encode(specialty_key)
+                if row.sub_specialties_accepted:
+                    for member in _members(row.sub_specialties_accepted):
+                        accepted.setdefault(member, []).append(i)
+                if row.state:
+                    self.has_state[i] = True
+                    self.region[i] = self.region_codes.encode(region_of(row.state))
+                self.min_years[i] = row.min_years_experience or 0
+                if row.start_date:
+                    self.has_start[i] = True
+                    self.start[i] = row.start_day if row.start_day is not None else _ordinal(row.start_date)
+                self.contract_weeks[i] = row.contract_weeks or 0
+                if row.shift_type:
+                    self.has_shift[i] = True
+                    shift_key = SHIFT_TYPES[row.shift_code] if row.shift_code is not None else row.shift_type.lower()
+                    self.shift[i] = self.shift_codes.encode(shift_key)
+                self.housing[i] = bool(row.housing_stipend and row.housing_stipend > 0)
+            except Exception:
+                self.irregular[i] = True
+
+        self.accepted = _freeze(accepted)
+
+    def __len__(self):
+        return self.n
+
+
+class PoolView:
+    """
+    Row subset of a CandidatePool / JobPool (rows=None is the whole pool)
+    NumPy columns are sliced on first access, everything else passes through
+    """
+
+    def __init__(self, pool, rows: Optional[np.ndarray] = None):
+        self.pool = pool
+        self.row_index = rows
+        self.n = pool.n if rows is None else len(rows)
+
+    def __getattr__(self, name):
+        value = getattr(self.pool, name)
+        if self.row_index is not None and isinstance(value, np.ndarray):
+            value = value[self.row_index]
+        self.__dict__[name] = value
+        return value
+
+    def __len__(self):
+        return self.n
+
+    def hit(self, index_name: str, key) -> np.ndarray:
+        """Boolean mask of view rows listed under key in one of the pool's inverted indexes"""
+        return self.hit_in(getattr(self.pool, index_name), key)
+
+    def hit_in(self, index: Dict, key) -> np.ndarray:
+        """hit() for an inverted index kept outside the pool (pool row numbers -> view rows)"""
+        if self.row_index is None:
+            return _postings(index, self.n, key)
+        rows = index.get(key)
+        if rows is None:
+            return np.zeros(self.n, dtype=bool)
+        return np.isin(self.row_index, rows)
+
+    def take(self, column: np.ndarray) -> np.ndarray:
+        """View rows of a pool-length column kept outside the pool"""
+        return column if self.row_index is None else column[self.row_index]
+
+    def row(self, i: int):
+        return self.pool.rows[i if self.row_index is None else self.row_index[i]]
+
+    @property
+    def ids(self) -> List[str]:
+        if self.row_index is None:
+            return self.pool.ids
+        return [self.pool.ids[i] for i in self.row_index]
+
+
+def load_candidate_pool(db: Session) -> CandidatePool:
+    """Load the active candidate pool (scoring columns only)"""
+    rows = db.query(*CANDIDATE_POOL_COLUMNS).filter(
+        Candidate.candidate_status.ilike("active")
+    ).all()
+    return CandidatePool(rows)
+
+
+def load_job_pool(db: Session, region_of) -> JobPool:
+    """Load the open job pool (scoring columns only)"""
+    rows = db.query(*JOB_POOL_COLUMNS).filter(Job.status == "Open").all()
+    return JobPool(rows, region_of)
+
+
+# ==================== VECTORIZED SCORER ====================
+
+class VectorizedScorer:
+    """
+    Computes the same seven factor scores as MatchingEngine._score_* for one
+    job against a CandidatePool (or one candidate against a JobPool)
+
+    Rows whose columns can't be indexed exactly (see IrregularValue) are
+    scored with the engine's per-pair methods so results stay identical.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.region_of = engine._get_state_region
+
+    def score_job(self, job, pool: CandidatePool, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Factor matrix of shape (len(FACTORS), n) for one job
+        rows limits scoring to a subset of pool rows (n = len(rows))
+        """
+        view = PoolView(pool, rows)
+        try:
+            factors = self._score_job(job, view)
+        except Exception:
+            return self._score_rows(view, range(view.n), lambda row: (row, job))
+        self._patch_irregular(factors, view, lambda row: (row, job))
+        return factors
+
+    def score_candidate(self, candidate, pool: JobPool) -> np.ndarray:
+        """Factor matrix of shape (len(FACTORS), len(pool)) for one candidate"""
+        view = PoolView(pool)
+        try:
+            factors = self._score_candidate(candidate, view)
+        except Exception:
+            return self._score_rows(view, range(view.n), lambda row: (candidate, row))
+        self._patch_irregular(factors, view, lambda row: (candidate, row))
+        return factors
+
+    @staticmethod
+    def totals(factors: np.ndarray) -> np.ndarray:
+        """Weighted total per row, capped at 100 like _calculate_match_score"""
+        return np.minimum(factors.sum(axis=0), 100)
+
+    # ---------- per-pair fallback ----------
+
+    def _score_pair(self, candidate, job) -> List[int]:
+        e = self.engine
+        return [
+            e._score_specialty(candidate, job),
+            e._score_location(candidate, job),
+            e._score_experience(candidate, job),
+            e._score_availability(candidate, job),
+            e._score_contract_duration(candidate, job),
+            e._score_shift_preference(candidate, job),
+            e._score_housing(candidate, job),
+        ]
+
+    def _score_rows(self, view: PoolView, indices, pair) -> np.ndarray:
+        factors = np.zeros((len(FACTORS), view.n), dtype=np.int32)
+        for i in indices:
+            factors[:, i] = self._score_pair(*pair(view.row(i)))
+        return factors
+
+    def _patch_irregular(self, factors, view: PoolView, pair):
+        for i in np.flatnonzero(view.irregular):
+            factors[:, i] = self._score_pair(*pair(view.row(i)))
+
+    # ---------- canonical specialties ----------
+
+    def _canonical_job_specialty(self, job, pool: PoolView) -> np.ndarray:
+        specialties = self.engine._specialty_map()
+        canonical = get_pool_specialties(pool.pool, specialties)
+        required = specialties.row_id(getattr(job, 'specialty_id', None), job.specialty_required)
+        primary = pool.take(canonical.primary)
+        sub_hit = pool.hit_in(canonical.sub_specialties, required)
+        accepted_hit = np.isin(primary, list(specialties.ids_for(job.sub_specialties_accepted)))
+        return np.select([primary == required, sub_hit, accepted_hit], [30, 25, 20], 0)
+
+    def _canonical_candidate_specialty(self, candidate, pool: PoolView) -> np.ndarray:
+        specialties = self.engine._specialty_map()
+        canonical = get_pool_specialties(pool.pool, specialties)
+        primary = specialties.row_id(getattr(candidate, 'specialty_id', None), candidate.primary_specialty)
+        required = pool.take(canonical.required)
+        sub_hit = np.isin(required, list(specialties.ids_for(candidate.sub_specialties)))
+        accepted_hit = pool.hit_in(canonical.accepted, primary)
+        return np.select([required == primary, sub_hit, accepted_hit], [30, 25, 20], 0)
+
+    # ---------- job vs candidate pool ----------
+
+    def _score_job(self, job, pool: PoolView) -> np.ndarray:
+        n = pool.n
+        factors = np.zeros((len(FACTORS), n), dtype=np.int32)
+
+        # 1. Specialty
+        if job.specialty_required and self.engine.canonical_specialties:
+            factors[0] = np.where(pool.has_specialty, self._canonical_job_specialty(job, pool), 0)
+        elif job.specialty_required:
+            exact = pool.specialty == pool.specialty_codes.lookup(job.specialty_required.lower())
+            sub_hit = pool.hit('sub_specialties', job.specialty_required)
+            if job.sub_specialties_accepted:
+                accepted = _members(job.sub_specialties_accepted)
+                accepted_hit = np.isin(pool.primary, pool.primary_codes.lookup_many(accepted))
+            else:
+                accepted_hit = np.zeros(n, dtype=bool)
+            specialty = np.select([exact, sub_hit, accepted_hit], [30, 25, 20], 0)
+            factors[0] = np.where(pool.has_specialty, specialty, 0)
+
+        # 2. Location
+        if job.state:
+            state_hit = pool.hit('states', job.state)
+            region_hit = pool.hit('regions', self.region_of(job.state))
+            factors[1] = np.select([~pool.has_states, state_hit, region_hit], [10, 25, 15], 0)
+            point = job_point(job) if self.engine.use_distance else None
+            if point is not None:
+                factors[1] = np.where(pool.has_states, np.maximum(factors[1], candidate_distance_points(pool, point)), factors[1])
+
+        # 3. Experience
+        if job.min_years_experience:
+            diff = pool.years - job.min_years_experience
+            experience = np.select([diff >= 5, diff >= 2, diff >= 0, diff >= -1], [20, 18, 15, 8], 0)
+            factors[2] = np.where(pool.years != 0, experience, 10)
+        else:
+            factors[2] = 10
+
+        # 4. Availability
+        if job.start_date:
+            days_diff = _ordinal(job.start_date) - pool.availability
+            factors[3] = np.where(pool.has_availability, _availability_points(days_diff), 5)
+        else:
+            factors[3] = 5
+
+        # 5. Contract duration
+        if job.contract_weeks:
+            diff = np.abs(pool.desired_weeks - job.contract_weeks)
+            duration = np.select([diff == 0, diff <= 4], [5, 3], 1)
+            factors[4] = np.where(pool.desired_weeks != 0, duration, 2)
+        else:
+            factors[4] = 2
+
+        # 6. Shift preference
+        if job.shift_type:
+            same_shift = pool.shift == pool.shift_codes.lookup(job.shift_type.lower())
+            factors[5] = np.where(pool.has_shift, np.where(same_shift, 3, 0), 1)
+        else:
+            factors[5] = 1
+
+        # 7. Housing
+        job_housing = bool(job.housing_stipend and job.housing_stipend > 0)
+        factors[6] = np.where(pool.needs_housing, 2 if job_housing else 0, 1)
+
+        return factors
+
+    # ---------- candidate vs job pool ----------
+
+    def _score_candidate(self, candidate, pool: PoolView) -> np.ndarray:
+        n = pool.n
+        factors = np.zeros((len(FACTORS), n), dtype=np.int32)
+
+        # 1. Specialty
+        if candidate.primary_specialty and self.engine.canonical_specialties:
+            factors[0] = np.where(pool.has_specialty, self._canonical_candidate_specialty(candidate, pool), 0)
+        elif candidate.primary_specialty:
+            exact = pool.specialty == pool.specialty_codes.lookup(candidate.primary_specialty.lower())
+            if candidate.sub_specialties:
+                sub_specs = _members(candidate.sub_specialties)
+                sub_hit = np.isin(pool.specialty_raw, pool.specialty_raw_codes.lookup_many(sub_specs))
+            else:
+                sub_hit = np.zeros(n, dtype=bool)
+            accepted_hit = pool.hit('accepted', candidate.primary_specialty)
+            specialty = np.select([exact, sub_hit, accepted_hit], [30, 25, 20], 0)
+            factors[0] = np.where(pool.has_specialty, specialty, 0)
+
+        # 2. Location
+        if candidate.preferred_states:
+            preferred = _members(candidate.preferred_states)
+            state_hit = np.isin(pool.state, pool.state_codes.lookup_many(preferred))
+            if candidate.preferred_regions:
+                regions = _members(candidate.preferred_regions)
+                region_hit = np.isin(pool.region, pool.region_codes.lookup_many(regions))
+            else:
+                region_hit = np.zeros(n, dtype=bool)
+            location = np.select([state_hit, region_hit], [25, 15], 0)
+            if self.engine.use_distance:
+                location = np.maximum(location, get_job_points(pool.pool).distance_points(preferred))
+        else:
+            location = 10
+        factors[1] = np.where(pool.has_state, location, 0)
+
+        # 3. Experience
+        if candidate.years_experience:
+            diff = candidate.years_experience - pool.min_years
+            experience = np.select([diff >= 5, diff >= 2, diff >= 0, diff >= -1], [20, 18, 15, 8], 0)
+            factors[2] = np.where(pool.min_years != 0, experience, 10)
+        else:
+            factors[2] = 10
+
+        # 4. Availability
+        if candidate.availability_date:
+            days_diff = pool.start - _ordinal(candidate.availability_date)
+            factors[3] = np.where(pool.has_start, _availability_points(days_diff), 5)
+        else:
+            factors[3] = 5
+
+        # 5. Contract duration
+        if candidate.desired_contract_weeks:
+            diff = np.abs(candidate.desired_contract_weeks - pool.contract_weeks)
+            duration = np.select([diff == 0, diff <= 4], [5, 3], 1)
+            factors[4] = np.where(pool.contract_weeks != 0, duration, 2)
+        else:
+            factors[4] = 2
+
+        # 6. Shift preference
+        preferred_shift = getattr(candidate, 'preferred_shift', None)
+        if preferred_shift:
+            same_shift = pool.shift == pool.shift_codes.lookup(preferred_shift.lower())
+            factors[5] = np.where(pool.has_shift, np.where(same_shift, 3, 0), 1)
+        else:
+            factors[5] = 1
+
+        # 7. Housing
+        if getattr(candidate, 'needs_housing', None):
+            factors[6] = np.where(pool.housing, 2, 0)
+        else:
+            factors[6] = 1
+
+        return factors
+
+
+def _availability_points(days_diff: np.ndarray) -> np.ndarray:
+    """Vectorized version of the _score_availability thresholds"""
+    return np.select(
+        [
+            (days_diff >= 0) & (days_diff <= 7),
+            (days_diff > 7) & (days_diff <= 14),
+            (days_diff > 14) & (days_diff <= 30),
+            (days_diff < 0) & (days_diff >= -7),
+        ],
+        [15, 12, 8, 10],
+        0,
+    )
@@ -67,7 +67,7 @@ const CandidateDetail = () => {
       setLoading(true);
       const [candidateResponse, matchesResponse] = await Promise.all([
         getCandidate(id),
-        getMatchesForCandidate(id, 50)
+        getMatchesForCandidate(id, 50, true)
       ]);
       
       let candidateData = candidateResponse.data;
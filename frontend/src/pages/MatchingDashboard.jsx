@@ -5,6 +5,7 @@ import {
   getEndingAssignmentsWithMatches,
   getMatchesForJob,
   getMatchesForCandidate,
+  getMatchDetails,
   getCandidate,
   getJob,
   sendEmailToCandidate,
@@ -586,8 +587,34 @@ const CircularScore = ({ score }) => {
   );
 };
 
-const MatchCard = ({ match, rank, navigate, onSendOpportunity, jobId }) => {
+// Match details are loaded on first expand (match lists come without them)
+const useMatchDetails = (candidateId, jobId) => {
   const [expanded, setExpanded] = useState(false);
+  const [details, setDetails] = useState(null);
+  const [loadingDetails, setLoadingDetails] = useState(false);
+
+  const toggle = async () => {
+    setExpanded(!expanded);
+    if (expanded || details) return;
+
+    try {
+      setLoadingDetails(true);
+      const response = await getMatchDetails(candidateId, jobId);
+      setDetails(response.data);
+    } catch (error) {
+      console.error('Error loading match details:', error);
+    } finally {
+      setLoadingDetails(false);
+    }
+  };
+
+  return { expanded, toggle, details, loadingDetails };
+};
+
+const MatchCard = ({ match, rank, navigate, onSendOpportunity, jobId }) => {
+  const { expanded, toggle, details, loadingDetails } = useMatchDetails(match.candidate_id, jobId);
+  const matchDetails = details?.match_details || match.match_details;
+  const ruleNotes = details?.rule_notes || match.rule_notes;
 
   return (
     <div className="match-card-detailed">
@@ -600,16 +627,22 @@ const MatchCard = ({ match, rank, navigate, onSendOpportunity, jobId }) => {
         <CircularScore score={match.score} />
       </div>
 
-      <div className="match-details-toggle" onClick={() => setExpanded(!expanded)}>
+      <div className="match-details-toggle" onClick={toggle}>
         <span>{expanded ? 'Hide' : 'Show'} Details</span>
         <span>{expanded ? '▼' : '▶'}</span>
       </div>
 
-      {expanded && (
+      {expanded && loadingDetails && (
+        <div className="match-details-content">
+          <p>Loading details...</p>
+        </div>
+      )}
+
+      {expanded && !loadingDetails && (
         <div className="match-details-content">
           <div className="match-reasons">
             <h5>Why this is a good match:</h5>
-            {match.match_details?.reasons?.map((reason, idx) => (
+            {matchDetails?.reasons?.map((reason, idx) => (
               <div key={idx} className="reason-item">
                 <CheckCircle size={16} className="check-icon" />
                 <span>{reason}</span>
@@ -617,10 +650,10 @@ const MatchCard = ({ match, rank, navigate, onSendOpportunity, jobId }) => {
             ))}
           </div>
 
-          {match.match_details?.concerns && match.match_details.concerns.length > 0 && (
+          {matchDetails?.concerns && matchDetails.concerns.length > 0 && (
             <div className="match-concerns">
               <h5>Considerations:</h5>
-              {match.match_details.concerns.map((concern, idx) => (
+              {matchDetails.concerns.map((concern, idx) => (
                 <div key={idx} className="concern-item">
                   <XCircle size={16} className="alert-icon" />
                   <span>{concern}</span>
@@ -629,10 +662,10 @@ const MatchCard = ({ match, rank, navigate, onSendOpportunity, jobId }) => {
             </div>
           )}
 
-          {match.rule_notes && match.rule_notes.length > 0 && (
+          {ruleNotes && ruleNotes.length > 0 && (
             <div className="rule-notes">
               <h5>Matching Rules Applied:</h5>
-              {match.rule_notes.map((note, idx) => (
+              {ruleNotes.map((note, idx) => (
                 <div key={idx} className="note-item">{note}</div>
               ))}
             </div>
@@ -663,7 +696,8 @@ const MatchCard = ({ match, rank, navigate, onSendOpportunity, jobId }) => {
 };
 
 const JobMatchCard = ({ match, rank, navigate, onSendOpportunity, candidateId }) => {
-  const [expanded, setExpanded] = useState(false);
+  const { expanded, toggle, details, loadingDetails } = useMatchDetails(candidateId, match.job_id);
+  const matchDetails = details?.match_details || match.match_details;
 
   return (
     <div className="match-card-detailed">
@@ -691,16 +725,22 @@ const JobMatchCard = ({ match, rank, navigate, onSendOpportunity, candidateId })
         </div>
       </div>
 
-      <div className="match-details-toggle" onClick={() => setExpanded(!expanded)}>
+      <div className="match-details-toggle" onClick={toggle}>
         <span>{expanded ? 'Hide' : 'Show'} Details</span>
         <span>{expanded ? '▼' : '▶'}</span>
       </div>
 
-      {expanded && (
+      {expanded && loadingDetails && (
+        <div className="match-details-content">
+          <p>Loading details...</p>
+        </div>
+      )}
+
+      {expanded && !loadingDetails && (
         <div className="match-details-content">
           <div className="match-reasons">
             <h5>Why this is a good match:</h5>
-            {match.match_details?.reasons?.map((reason, idx) => (
+            {matchDetails?.reasons?.map((reason, idx) => (
               <div key={idx} className="reason-item">
                 <CheckCircle size={16} className="check-icon" />
                 <span>{reason}</span>
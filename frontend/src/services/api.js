@@ -175,18 +175,22 @@ export const createExpense = (expenseData) => {
 };
 
 // ==================== MATCHING APIs ====================
-export const getMatchesForJob = (jobId, minScore = 50) => {
+export const getMatchesForJob = (jobId, minScore = 50, includeDetails = false) => {
   return api.get(`/matching/job/${jobId}`, {
-    params: { min_score: minScore }
+    params: { min_score: minScore, include_details: includeDetails }
   });
 };
 
-export const getMatchesForCandidate = (candidateId, minScore = 50) => {
+export const getMatchesForCandidate = (candidateId, minScore = 50, includeDetails = false) => {
   return api.get(`/matching/candidate/${candidateId}`, {
-    params: { min_score: minScore }
+    params: { min_score: minScore, include_details: includeDetails }
   });
 };
 
+export const getMatchDetails = (candidateId, jobId) => {
+  return api.get(`/matching/details/${candidateId}/${jobId}`);
+};
+
 export const getEndingAssignmentsWithMatches = (days = null) => {
   return api.get('/matching/ending-assignments', {
     params: days ? { days } : {}